@@ -4,24 +4,165 @@
 MOVIES_CSV_PATH = "data/movies.csv"
 EMOJI_CSV_PATH = "data/emoji_data.csv"
 
+# Binary movie catalog (float32 embedding matrix + slim metadata table)
+CATALOG_DIR = "data/catalog"
+CATALOG_EMBEDDINGS_FILE = "embeddings.npy"
+CATALOG_METADATA_FILE = "metadata.pkl"
+CATALOG_MANIFEST_FILE = "manifest.json"
+
 # Logging
 SIMILARITY_FILTERED_DIR = "logs/similarity_filtered"
 GENRE_FILTERED_DIR = "logs/genre_filtered"
 LOG_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+DEBUG_LOGGING_ENABLED = True  # Write every request's candidate and ranked lists as CSV (disable under load)
 
 # Model settings
 SENTENCE_TRANSFORMER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 OLLAMA_MODEL = "llama3.2:3b"
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
+OLLAMA_CONNECT_TIMEOUT = 3.05  # Seconds to establish a connection
+OLLAMA_READ_TIMEOUT = 60  # Seconds without response bytes before a call is abandoned
+OLLAMA_MAX_RETRIES = 2  # Retries after the first attempt (connection errors, timeouts, 429/5xx)
+OLLAMA_RETRY_BACKOFF = 0.5  # Base retry delay in seconds, doubled per retry, with full jitter
+OLLAMA_POOL_SIZE = 10  # Keep-alive connections shared by all sessions
+REQUEST_DEADLINE_SECONDS = 20  # Upper bound on generate_recommendations under backend trouble
+LLM_STAGE_BUDGET = 0.8  # Share of the request deadline the LLM calls may use
+EMBEDDING_STAGE_BUDGET = 0.1  # Share of the request deadline the query embedding may use
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3  # Consecutive Ollama failures before calls are skipped
+CIRCUIT_BREAKER_RESET_SECONDS = 30  # How long to skip Ollama before trying it again
+OLLAMA_MAX_IN_FLIGHT = 2  # Concurrent generations sent to Ollama (match OLLAMA_NUM_PARALLEL)
+OLLAMA_MAX_QUEUE = 16  # Callers allowed to wait for a slot; more are rejected right away
+OLLAMA_MAX_QUEUE_WAIT_SECONDS = 10  # Longest wait for a slot before the caller is rejected
+LLM_STREAMING_ENABLED = True  # Stream story overviews token by token into the UI
+STORY_OVERVIEW_MAX_WORDS = 50  # Streaming stops once the overview reaches this many words
+LLM_PARALLEL_CALLS = True  # Run genre prediction and story overview generation concurrently
+LLM_MAX_WORKERS = 4  # Threads shared by the concurrent Ollama calls
+LLM_COMBINED_PREDICTION = True  # One JSON-mode call returns genres, emotions and the story overview
+
+# Embedding-based genre/emotion prediction that skips the LLM when confident (see models/fast_mood_predictor.py)
+FAST_PATH_ENABLED = True
+FAST_PATH_CONFIDENCE = 0.4  # Minimum softmax probability of the top genre and top emotion
+FAST_PATH_TEMPERATURE = 0.05  # Softmax temperature over prototype cosine similarities
+FAST_PATH_MAX_GENRES = 3
+FAST_PATH_MAX_EMOTIONS = 2
+
+# Emoji -> genre/emotion vectors used as a ranking prior (see utils/emoji_vectors.py)
+EMOJI_VECTORS_FILE = "data/emoji_vectors.npz"  # Without it, selected emojis are sent to the LLM instead
+EMOJI_VECTOR_TEMPERATURE = 0.05  # Softmax temperature over emoji-to-label cosine similarities
+
+# Speculative prefetch while the questionnaire is filled in (see models/prefetcher.py)
+PREFETCH_ENABLED = True
+PREFETCH_DEBOUNCE_MS = 600  # Inputs must stay unchanged this long before background work starts
+PREFETCH_PRIORITY = 10  # Ollama queue priority of prefetch calls (interactive requests use 0)
+PREFETCH_MAX_JOIN_SECONDS = 15  # Longest a submitted request waits for its in-flight prefetch
+PREFETCH_WORKERS = 4  # Threads shared by prefetch jobs of all sessions
+
+# LLM response cache (see utils/response_cache.py)
+LLM_CACHE_ENABLED = True
+PROMPT_VERSION = 1  # Bump whenever the prompts in models/mood_predictor.py change, to invalidate cached answers
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600  # Cached answers expire after a week
+LLM_CACHE_MAX_ENTRIES = 10000  # Entry limit of the in-memory tier
+LLM_CACHE_DB_PATH = "cache/llm_responses.sqlite"  # Persistent tier (None = memory only)
+LLM_CACHE_DISK_MAX_ENTRIES = 100000  # Oldest entries are evicted from the on-disk tier beyond this
+
+# Labels the LLM may predict (anything else in its answer is dropped)
+MOVIE_GENRES = [
+    "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime",
+    "Documentary", "Drama", "Family", "Fantasy", "History", "Horror",
+    "Music", "Musical", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller", "War"
+]
+MOVIE_EMOTIONS = [
+    "Happy", "Sad", "Excited", "Relaxed", "Tense", "Romantic",
+    "Nostalgic", "Inspired", "Fearful", "Calm"
+]
+DEFAULT_GENRE = "Drama"  # Used when no valid genre could be predicted
+DEFAULT_EMOTION = "Relaxed"  # Used when no valid emotion could be predicted
+
+# Keywords whose presence in a movie's overview signals an emotion (see utils/emotion_features.py)
+EMOTION_KEYWORDS = {
+    'Happy': ['happy', 'joy', 'uplifting', 'comedy', 'funny', 'humor', 'laugh', 'cheerful', 'fun'],
+    'Sad': ['sad', 'tragedy', 'drama', 'melancholy', 'grief', 'sorrow', 'tear', 'heartbreak'],
+    'Excited': ['exciting', 'thrill', 'adventure', 'action', 'suspense', 'adrenaline', 'intense'],
+    'Relaxed': ['calm', 'peaceful', 'gentle', 'soothing', 'meditation', 'slow-paced', 'easy'],
+    'Tense': ['tense', 'anxiety', 'fear', 'horror', 'thriller', 'paranoia', 'stress', 'nervous'],
+    'Romantic': ['romance', 'love', 'relationship', 'passion', 'date', 'attraction', 'wedding'],
+    'Nostalgic': ['nostalgia', 'memory', 'childhood', 'reminisce', 'past', 'history', 'retro'],
+    'Inspired': ['inspiration', 'motivational', 'triumph', 'success', 'achievement', 'overcome'],
+    'Fearful': ['fear', 'scary', 'horror', 'terrifying', 'creepy', 'nightmare', 'dread'],
+    'Calm': ['calm', 'serene', 'peaceful', 'tranquil', 'relaxed', 'gentle', 'quiet']
+}
+
+EMBEDDING_BATCH_SIZE = 64  # Texts per forward pass in TextEmbedder.get_embeddings
+
+# Embedding inference backend: "torch" (sentence-transformers) or "onnx" (see models/onnx_encoder.py)
+EMBEDDING_BACKEND = "torch"
+ONNX_MODEL_DIR = "models/onnx/all-MiniLM-L6-v2"  # Output of `python models/onnx_encoder.py export`
+ONNX_QUANTIZED = True  # Use the dynamically int8-quantized export
+ONNX_NUM_THREADS = None  # Intra-op threads for onnxruntime (None = onnxruntime default)
+
+# Micro-batching of concurrent embedding requests (see models/embedding_batcher.py)
+EMBEDDING_BATCHING_ENABLED = True
+EMBEDDING_BATCH_MAX_WAIT_MS = 5  # How long the first request in a batch waits for company
+EMBEDDING_BATCH_MAX_SIZE = 32  # Flush a batch as soon as it holds this many texts
+
+# Embedding cache (see utils/embedding_cache.py)
+EMBEDDING_CACHE_MAX_BYTES = 32 * 1024 * 1024  # In-memory LRU tier size
+EMBEDDING_CACHE_DB_PATH = None  # Optional sqlite file for the on-disk tier, e.g. "cache/embeddings.sqlite"
+EMBEDDING_CACHE_DISK_MAX_ENTRIES = 200000  # Oldest entries are evicted from the on-disk tier beyond this
 
 # Recommendation settings
 TOP_N_SIMILARITY = 100  # Number of movies to retain after similarity filtering
 FINAL_RECOMMENDATIONS = 5  # Number of final recommendations to show
-EMOJI_WEIGHT = 4.0  # Weight multiplier for emoji-based emotions
-SIMILARITY_THRESHOLD = 0.55  # Minimum similarity score to consider
+EMOJI_WEIGHT = 0.5  # Emoji genre/emotion prior as a share of the predicted labels' weight (0.5 = a third of the total)
+SIMILARITY_THRESHOLD = 0.55  # Minimum cosine similarity of a candidate, dense or keyword match
 MIN_SCORE_THRESHOLD = 0.3  # Minimum score threshold for filtering
 MIN_RECOMMENDATIONS = 5  # Minimum number of recommendations to show
 
+# Recommendation pipeline (see models/pipeline.py): stages run in this order
+RECOMMENDATION_PIPELINE = ["fast_prediction", "llm_prediction", "embedding", "retrieval", "ranking", "debug_log"]
+# Add "quick_retrieval" after "fast_prediction" to skip the LLM when the user's own words already match well
+PIPELINE_STAGE_BUDGETS = {  # Share of REQUEST_DEADLINE_SECONDS per stage (missing = whatever is left)
+    "llm_prediction": LLM_STAGE_BUDGET,
+    "embedding": EMBEDDING_STAGE_BUDGET,
+    "quick_retrieval": EMBEDDING_STAGE_BUDGET,
+}
+PIPELINE_STAGE_MAX_CANDIDATES = {  # Candidate limit per stage (missing = stage default)
+    "quick_retrieval": TOP_N_SIMILARITY,
+    "retrieval": TOP_N_SIMILARITY,
+    "ranking": None,
+}
+PIPELINE_EARLY_EXIT_ENABLED = True
+PIPELINE_EARLY_EXIT_SIMILARITY = 0.75  # Early exit needs FINAL_RECOMMENDATIONS candidates at least this similar
+
+# Recommendation result cache: full ranked lists per input fingerprint, paged FINAL_RECOMMENDATIONS at a time
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_TTL_SECONDS = 30 * 60  # Identical submissions within this window skip the LLM, embedding and ranking
+RESULT_CACHE_MAX_ENTRIES = 512  # Least recently used ranked lists are evicted beyond this
+
+# Exact similarity search
+SIMILARITY_NUM_SHARDS = 1  # Split the embedding matrix into this many shards searched in parallel
+SIMILARITY_SEARCH_WORKERS = None  # Thread pool size for sharded search (None = number of CPUs)
+
+# Approximate nearest-neighbour search (see utils/ann_index.py)
+ANN_MIN_CATALOG_SIZE = 200000  # Use the ANN index only for catalogs at least this large
+ANN_INDEX_FILE = "ivf_index.npz"  # Stored next to the binary catalog in CATALOG_DIR
+ANN_NUM_LISTS = None  # Number of IVF clusters (None = 4 * sqrt(catalog size))
+ANN_NUM_PROBES = 16  # Clusters scanned per query; higher = better recall, slower
+
+# Quantized catalog embeddings (see utils/quantization.py)
+CATALOG_QUANTIZATION = None  # None, "int8" or "binary"
+QUANTIZATION_RESCORE_FACTOR = 4  # Shortlist size = TOP_N_SIMILARITY * factor, rescored at full precision
+
+# Hybrid lexical + embedding retrieval (see utils/lexical_index.py)
+HYBRID_RETRIEVAL_ENABLED = True
+LEXICAL_INDEX_FILE = "bm25_index.npz"  # Stored next to the binary catalog in CATALOG_DIR
+LEXICAL_TOP_N = 100  # Number of BM25 candidates fused with the embedding candidates
+HYBRID_FUSION = "rrf"  # "rrf" (reciprocal rank fusion) or "weighted" (score blend)
+RRF_K = 60  # Reciprocal rank fusion damping constant
+HYBRID_LEXICAL_WEIGHT = 0.3  # Lexical share of the blended score for "weighted" fusion
+BM25_K1 = 1.5
+BM25_B = 0.75
+
 # Default values
 DEFAULT_TIME_AVAILABLE = "No time limit"
 
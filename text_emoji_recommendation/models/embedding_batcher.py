@@ -0,0 +1,137 @@
+import sys
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from models.text_embedder import TextEmbedder
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching scheduler in front of the shared TextEmbedder
+
+    Concurrent get_embedding calls (e.g. from several Streamlit sessions) are
+    queued; a single worker thread collects them for up to max_wait_ms or
+    max_batch_size texts, runs one batched encode and hands every caller its
+    own vector back.
+    """
+
+    def __init__(self, text_embedder=None, max_wait_ms=None, max_batch_size=None):
+        """
+        Initialize the batcher and start its worker thread
+
+        Args:
+            text_embedder: TextEmbedder used for the batched encodes
+            max_wait_ms: Maximum time a request waits for a batch to fill up
+            max_batch_size: Maximum number of texts per batch
+        """
+        self.text_embedder = text_embedder or TextEmbedder()
+        self.max_wait = (config.EMBEDDING_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        self.max_batch_size = max_batch_size or config.EMBEDDING_BATCH_MAX_SIZE
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._batch_size_counts = {}
+
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def get_embedding(self, text, timeout=None):
+        """
+        Generate embedding for the given text as part of a shared batch
+
+        Args:
+            text: Text to generate embedding for
+            timeout: Seconds to wait for the result (None waits indefinitely)
+
+        Returns:
+            Embedding vector as a float32 NumPy array, or None on failure
+        """
+        if not text:
+            return None
+
+        # Cache hits never need the model, so they skip the queue entirely
+        cached = self.text_embedder.cache.get(text)
+        if cached is not None:
+            return cached
+
+        future = Future()
+        self._queue.put((text, future))
+        return future.result(timeout=timeout)
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Worker loop: one batched encode per collected batch"""
+        while True:
+            batch = self._collect_batch()
+            texts = [text for text, _ in batch]
+
+            try:
+                # Callers already missed the cache, so only fill it here
+                embeddings = self.text_embedder.get_embeddings(texts, batch_size=len(texts), use_cache=False)
+            except Exception as e:
+                print(f"Error generating batched embeddings: {e}")
+                embeddings = None
+
+            for row, (text, future) in enumerate(batch):
+                if embeddings is None:
+                    future.set_result(None)
+                else:
+                    future.set_result(self.text_embedder.cache.put(text, embeddings[row]))
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._largest_batch = max(self._largest_batch, len(batch))
+                self._batch_size_counts[len(batch)] = self._batch_size_counts.get(len(batch), 0) + 1
+
+    def stats(self):
+        """
+        Scheduler counters for monitoring
+
+        Returns:
+            Dictionary with queue depth and batch size statistics
+        """
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "batch_size_counts": dict(sorted(self._batch_size_counts.items())),
+            }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher(text_embedder=None):
+    """Return the process-wide EmbeddingBatcher, creating it on first use"""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = EmbeddingBatcher(text_embedder)
+        return _batcher
@@ -0,0 +1,211 @@
+import sys
+import os
+import numpy as np
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from models.text_embedder import TextEmbedder
+from utils.embedding_utils import normalize_embeddings
+
+# Short descriptions embedded as label prototypes (labels without one use their name alone)
+GENRE_DESCRIPTIONS = {
+    "Action": "fights, explosions, car chases and high-stakes heroics",
+    "Adventure": "a daring journey or quest to faraway, exciting places",
+    "Animation": "an animated, colorful cartoon world",
+    "Biography": "the true life story of a real person",
+    "Comedy": "funny, lighthearted jokes and laughs",
+    "Crime": "gangsters, heists, detectives and criminals",
+    "Documentary": "real events and facts about the real world",
+    "Drama": "serious, emotional stories about people and relationships",
+    "Family": "wholesome fun for kids and parents together",
+    "Fantasy": "magic, mythical creatures and enchanted worlds",
+    "History": "historical events and past eras",
+    "Horror": "terrifying, scary monsters, ghosts and dread",
+    "Music": "musicians, bands, concerts and songs",
+    "Musical": "characters singing and dancing through the story",
+    "Mystery": "puzzling secrets, clues and a whodunit to solve",
+    "Romance": "falling in love, romantic relationships and dates",
+    "Sci-Fi": "space, futuristic technology, aliens and science fiction",
+    "Sport": "athletes, competition, teams and the big game",
+    "Thriller": "suspenseful, tense, edge-of-your-seat danger",
+    "War": "soldiers, battles and the front lines of war",
+}
+EMOTION_DESCRIPTIONS = {
+    "Happy": "cheerful, joyful, upbeat and smiling",
+    "Sad": "sad, melancholy, heartbroken and tearful",
+    "Excited": "excited, energetic, pumped up and thrilled",
+    "Relaxed": "relaxed, laid-back, easygoing and unwinding",
+    "Tense": "tense, on edge, anxious and suspenseful",
+    "Romantic": "romantic, loving, affectionate and in love",
+    "Nostalgic": "nostalgic, reminiscing about the past and childhood memories",
+    "Inspired": "inspired, motivated, uplifted and hopeful",
+    "Fearful": "scared, afraid, frightened and spooked",
+    "Calm": "calm, peaceful, quiet and serene",
+}
+
+# Free-text answers carry the most signal, categorical context the least
+TEXT_WEIGHT = 1.0
+CONTEXT_WEIGHT = 0.5
+# Emojis only reach the query text when no emoji vectors are loaded; they then stand in for the prior
+EMOJI_TEXT_WEIGHT = 4.0
+
+
+class FastMoodPredictor:
+    """
+    In-process genre and emotion predictor built on TextEmbedder
+
+    Each label of config.MOVIE_GENRES / MOVIE_EMOTIONS is represented by the
+    embedding of a short description. A request's answers are embedded and
+    scored against all prototypes in one matrix multiply; the prediction is
+    only returned when it is clearly ahead of the alternatives, otherwise the
+    caller falls back to the LLM.
+    """
+
+    def __init__(self, text_embedder=None, confidence_threshold=None, temperature=None):
+        """
+        Initialize the predictor and embed the label prototypes
+
+        Args:
+            text_embedder: TextEmbedder used for prototypes and queries
+            confidence_threshold: Minimum top-label probability for genres and emotions
+            temperature: Softmax temperature applied to cosine scores
+        """
+        self.text_embedder = text_embedder or TextEmbedder()
+        self.confidence_threshold = confidence_threshold or config.FAST_PATH_CONFIDENCE
+        self.temperature = temperature or config.FAST_PATH_TEMPERATURE
+
+        self.genres = list(config.MOVIE_GENRES)
+        self.emotions = list(config.MOVIE_EMOTIONS)
+        texts = [self._prototype_text(genre, GENRE_DESCRIPTIONS, "movie") for genre in self.genres]
+        texts += [self._prototype_text(emotion, EMOTION_DESCRIPTIONS, "mood") for emotion in self.emotions]
+
+        prototypes = self.text_embedder.get_embeddings(texts)
+        # (labels, dim), genres first; None disables the fast path
+        self.prototypes = normalize_embeddings(prototypes) if prototypes is not None else None
+
+    def _prototype_text(self, label, descriptions, kind):
+        """Text embedded for one label"""
+        description = descriptions.get(label)
+        return f"{label} {kind}: {description}" if description else f"{label} {kind}"
+
+    def predict(self, user_responses):
+        """
+        Predict genres and emotions without calling the LLM
+
+        Args:
+            user_responses: Dictionary of user responses (may include 'selected_emojis')
+
+        Returns:
+            Dictionary with genres, emotions and confidence, or None when the
+            prediction is not confident enough (or the model is unavailable)
+        """
+        if self.prototypes is None:
+            return None
+
+        texts, weights = self._query_texts(user_responses)
+        if not texts:
+            return None
+        queries = self.text_embedder.get_embeddings(texts)
+        if queries is None:
+            return None
+
+        # One multiply scores every answer against every label; answers are then pooled by weight
+        similarities = normalize_embeddings(queries) @ self.prototypes.T
+        scores = np.asarray(weights, dtype=np.float32) @ similarities / sum(weights)
+
+        genres, genre_confidence = self._top_labels(
+            scores[:len(self.genres)], self.genres, config.FAST_PATH_MAX_GENRES
+        )
+        emotions, emotion_confidence = self._top_labels(
+            scores[len(self.genres):], self.emotions, config.FAST_PATH_MAX_EMOTIONS
+        )
+        if min(genre_confidence, emotion_confidence) < self.confidence_threshold:
+            return None
+
+        return {
+            "genres": genres,
+            "emotions": emotions,
+            "confidence": {"genres": genre_confidence, "emotions": emotion_confidence}
+        }
+
+    def _query_texts(self, user_responses):
+        """
+        Texts to embed for a request, with their pooling weights
+
+        Args:
+            user_responses: Dictionary of user responses
+
+        Returns:
+            Tuple of (list of texts, list of weights)
+        """
+        texts = []
+        weights = []
+        for key in ('scene_visualization', 'mood_description'):
+            value = user_responses.get(key)
+            if isinstance(value, str) and value.strip():
+                texts.append(value.strip())
+                weights.append(TEXT_WEIGHT)
+
+        emojis = user_responses.get('selected_emojis')
+        if isinstance(emojis, str) and emojis.strip():
+            texts.append(f"Feeling {emojis.strip()}")
+            weights.append(EMOJI_TEXT_WEIGHT)
+
+        context = [
+            f"{key.replace('_', ' ')}: {value}" for key, value in user_responses.items()
+            if key not in ('scene_visualization', 'mood_description', 'selected_emojis')
+            and value not in (None, "")
+        ]
+        if context:
+            texts.append("Watching a movie. " + ", ".join(context))
+            weights.append(CONTEXT_WEIGHT)
+
+        return texts, weights
+
+    def _top_labels(self, scores, labels, max_labels):
+        """
+        Pick the leading labels from one vocabulary
+
+        Args:
+            scores: Pooled cosine score per label
+            labels: Labels in score order
+            max_labels: Maximum number of labels to return
+
+        Returns:
+            Tuple of (labels, best first; softmax probability of the top label)
+        """
+        logits = (scores - scores.max()) / self.temperature
+        probabilities = np.exp(logits) / np.exp(logits).sum()
+        order = np.argsort(-probabilities)[:max_labels]
+        # Keep runner-up labels only while they are reasonably close to the top one
+        chosen = [labels[i] for i in order if probabilities[i] >= 0.5 * probabilities[order[0]]]
+        return chosen, float(probabilities[order[0]])
+
+
+def main():
+    """Command-line entry point: show the fast-path prediction and confidence for a mood description"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Try the embedding-based genre/emotion predictor")
+    parser.add_argument("mood", help="Mood description, as typed in the questionnaire")
+    parser.add_argument("--scene", default="", help="Scene the user is craving")
+    parser.add_argument("--threshold", type=float, default=config.FAST_PATH_CONFIDENCE)
+    args = parser.parse_args()
+
+    # A zero threshold always returns the prediction, so its confidence can be compared to the real one
+    predictor = FastMoodPredictor(confidence_threshold=1e-9)
+    prediction = predictor.predict({"mood_description": args.mood, "scene_visualization": args.scene})
+    if prediction is None:
+        print("Embedding model is not available")
+        return
+
+    confidence = prediction["confidence"]
+    accepted = min(confidence.values()) >= args.threshold
+    print(f"genres:   {', '.join(prediction['genres'])} ({confidence['genres']:.2f})")
+    print(f"emotions: {', '.join(prediction['emotions'])} ({confidence['emotions']:.2f})")
+    print(f"{'fast path' if accepted else 'falls back to Ollama'} at threshold {args.threshold}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 import sys
 import os
-import requests
-import json
-from langchain.prompts import PromptTemplate
+from contextlib import closing
 
 # Add project root to path to allow imports from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from utils.json_parser import parse_json_object, IncrementalJSONParser
+from utils.http_client import get_ollama_client
+from utils.response_cache import get_response_cache, response_cache_key
+from utils.resilience import (
+    OllamaUnavailableError, AdmissionRejectedError, get_circuit_breaker, get_concurrency_limiter
+)
 
 
 class MoodPredictor:
@@ -14,92 +18,390 @@ class MoodPredictor:
     Class for predicting genre and mood using Ollama's Llama3.2 model
     """
     
-    def __init__(self, model_name=None, api_url=None):
+    def __init__(self, model_name=None, api_url=None, priority=0):
         """
         Initialize the mood predictor
         
         Args:
             model_name: Name of the Ollama model to use
             api_url: URL of the Ollama API
+            priority: Queue priority of this predictor's Ollama calls (lower is served first)
         """
         self.model_name = model_name or config.OLLAMA_MODEL
         self.api_url = api_url or config.OLLAMA_API_URL
+        self.client = get_ollama_client(self.api_url)
+        self.circuit_breaker = get_circuit_breaker(self.api_url)
+        self.limiter = get_concurrency_limiter(self.api_url)
+        self.priority = priority
+        self.response_cache = get_response_cache() if config.LLM_CACHE_ENABLED else None
     
-    def predict_genre_and_emotions(self, user_responses):
+    def predict_genre_and_emotions(self, user_responses, deadline=None):
         """
         Predict genres and emotions based on user responses
         
         Args:
             user_responses: Dictionary of user responses to questions
+            deadline: Optional Deadline for the Ollama call
             
         Returns:
             Dictionary with predicted genres and emotions
+            
+        Raises:
+            OllamaUnavailableError: If Ollama failed, timed out or its circuit is open
         """
+        cache_key = response_cache_key("genres", self.model_name, user_responses)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Format the prompt
         prompt = self._format_genre_prediction_prompt(user_responses)
         
         # Get response from Ollama
-        response = self._call_ollama(prompt)
+        response = self._call_ollama(prompt, json_format=True, deadline=deadline)
         
-        # Parse response
-        try:
-            result = json.loads(response)
-            return result
-        except:
+        result = self._parse_prediction(response)
+        if response:
+            self._cache_put(cache_key, result)
+        return result
+    
+    def predict_all(self, user_responses, scene_text, feelings_text, on_update=None, deadline=None):
+        """
+        Predict genres, emotions and the story overview with one structured call
+        
+        The user context is sent once and Ollama's JSON mode constrains the
+        answer to a single object, replacing the two separate prompts of
+        predict_genre_and_emotions and generate_story_overview.
+        
+        Args:
+            user_responses: Dictionary of user responses to questions
+            scene_text: Text describing a specific scene
+            feelings_text: Text describing user feelings
+            on_update: Optional callback receiving the partial overview while it streams
+            deadline: Optional Deadline for the Ollama call(s)
+            
+        Returns:
+            Dictionary with predicted genres, emotions and overview
+            
+        Raises:
+            OllamaUnavailableError: If Ollama failed, timed out or its circuit is open
+        """
+        cache_key = response_cache_key(
+            "combined", self.model_name,
+            dict(user_responses, scene_visualization=scene_text, mood_description=feelings_text)
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            if on_update:
+                on_update(cached["overview"])
+            return cached
+        
+        prompt = self._format_combined_prompt(user_responses, scene_text, feelings_text)
+        if config.LLM_STREAMING_ENABLED:
+            response, parsed = self._stream_prediction(prompt, on_update, deadline)
+            result = self._parse_prediction(response, parsed)
+        else:
+            response = self._call_ollama(prompt, json_format=True, deadline=deadline)
+            result = self._parse_prediction(response)
+        
+        overview = result.get("overview")
+        if not overview:
+            # The structured answer had no usable overview, ask for it separately
+            overview = self.generate_story_overview(scene_text, feelings_text, on_update, deadline)
+        result["overview"] = overview
+        if response and overview:
+            self._cache_put(cache_key, result)
+        return result
+    
+    def _stream_prediction(self, prompt, on_update=None, deadline=None):
+        """
+        Stream a combined JSON prediction, parsing it as it arrives
+        
+        Generation stops as soon as the object is complete, or once genres and
+        emotions are in and the overview has reached its word limit.
+        
+        Args:
+            prompt: The combined prediction prompt
+            on_update: Optional callback receiving the partial overview
+            deadline: Optional Deadline for the stream
+            
+        Returns:
+            Tuple of (raw response text, best-effort parsed object)
+        """
+        parser = IncrementalJSONParser()
+        response = ""
+        with closing(self._stream_ollama(prompt, json_format=True, deadline=deadline)) as stream:
+            for chunk in stream:
+                response += chunk
+                parser.feed(chunk)
+                partial = parser.snapshot()
+                if not isinstance(partial, dict) or not isinstance(partial.get("overview"), str):
+                    continue
+                
+                overview, reached_limit = self._limit_words(partial["overview"])
+                if on_update and overview:
+                    on_update(overview)
+                if parser.complete or (reached_limit and "genres" in partial and "emotions" in partial):
+                    break
+        
+        parsed = parser.snapshot()
+        if isinstance(parsed, dict) and isinstance(parsed.get("overview"), str):
+            parsed["overview"] = self._limit_words(parsed["overview"])[0]
+        return response, parsed
+    
+    def _parse_prediction(self, response, parsed=None):
+        """
+        Parse a JSON prediction and keep only labels from the allowed vocabularies
+        
+        Args:
+            response: Raw response text from Ollama
+            parsed: Already parsed object (e.g. from streaming), parsed from response if None
+            
+        Returns:
+            Dictionary with genres, emotions and (if present) overview
+        """
+        if not isinstance(parsed, dict):
+            parsed = parse_json_object(response)
+        if parsed is None:
             # If can't parse as JSON, try to extract genres and emotions from text
-            genres = self._extract_genres_from_text(response)
-            emotions = self._extract_emotions_from_text(response)
             return {
-                "genres": genres,
-                "emotions": emotions
+                "genres": self._extract_genres_from_text(response),
+                "emotions": self._extract_emotions_from_text(response)
             }
+        
+        result = {
+            "genres": self._validate_labels(parsed.get("genres"), config.MOVIE_GENRES, config.DEFAULT_GENRE),
+            "emotions": self._validate_labels(parsed.get("emotions"), config.MOVIE_EMOTIONS, config.DEFAULT_EMOTION)
+        }
+        overview = parsed.get("overview")
+        if isinstance(overview, str) and overview.strip():
+            result["overview"] = overview.strip()
+        return result
+    
+    def _validate_labels(self, values, vocabulary, default):
+        """
+        Map predicted labels onto a vocabulary, case-insensitively
+        
+        Args:
+            values: Predicted labels (a list, or a single string)
+            vocabulary: Allowed labels in their canonical spelling
+            default: Label returned when nothing valid remains
+            
+        Returns:
+            List of unique canonical labels, in predicted order
+        """
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list):
+            values = []
+        
+        canonical = {label.lower(): label for label in vocabulary}
+        labels = []
+        for value in values:
+            label = canonical.get(str(value).strip().lower())
+            if label and label not in labels:
+                labels.append(label)
+        return labels or [default]
     
-    def generate_story_overview(self, scene_text, feelings_text):
+    def generate_story_overview(self, scene_text, feelings_text, on_update=None, deadline=None):
         """
         Generate a 50-word story overview based on user inputs
         
         Args:
             scene_text: Text describing a specific scene
             feelings_text: Text describing user feelings
+            on_update: Optional callback receiving the partial overview while it streams
+            deadline: Optional Deadline for the Ollama call
             
         Returns:
             Story overview as a string
+            
+        Raises:
+            OllamaUnavailableError: If Ollama failed, timed out or its circuit is open
         """
+        cache_key = response_cache_key(
+            "overview", self.model_name, {"scene_visualization": scene_text, "mood_description": feelings_text}
+        )
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            if on_update:
+                on_update(cached)
+            return cached
+        
         # Format the prompt
         prompt = self._format_story_overview_prompt(scene_text, feelings_text)
         
-        # Get response from Ollama
-        response = self._call_ollama(prompt)
+        if config.LLM_STREAMING_ENABLED:
+            overview = self.stream_story_overview(prompt, on_update, deadline)
+        else:
+            # Get response from Ollama
+            overview = self._call_ollama(prompt, deadline=deadline).strip()
         
-        return response.strip()
+        if overview:
+            self._cache_put(cache_key, overview)
+        return overview
+    
+    def stream_story_overview(self, prompt, on_update=None, deadline=None):
+        """
+        Stream a story overview and stop generating once it reaches the word limit
+        
+        Args:
+            prompt: The story overview prompt
+            on_update: Optional callback receiving the overview generated so far
+            deadline: Optional Deadline for the stream
+            
+        Returns:
+            Story overview as a string
+        """
+        overview = ""
+        response = ""
+        with closing(self._stream_ollama(prompt, deadline=deadline)) as stream:
+            for chunk in stream:
+                response += chunk
+                overview, reached_limit = self._limit_words(response)
+                if on_update and overview:
+                    on_update(overview)
+                if reached_limit:
+                    break
+        return overview
     
-    def _call_ollama(self, prompt):
+    def _limit_words(self, text, max_words=None):
+        """
+        Cut text to the overview word limit
+        
+        Args:
+            text: Text generated so far
+            max_words: Word limit (defaults to config.STORY_OVERVIEW_MAX_WORDS)
+            
+        Returns:
+            Tuple of (text with at most max_words words, whether the limit was exceeded)
+        """
+        max_words = max_words or config.STORY_OVERVIEW_MAX_WORDS
+        words = text.split()
+        if len(words) > max_words:
+            return " ".join(words[:max_words]), True
+        return text.strip(), False
+    
+    def admission_stats(self):
+        """Return queue and rejection counters of the shared Ollama concurrency limiter"""
+        return dict(self.limiter.stats(), circuit=self.circuit_breaker.state)
+    
+    def cache_stats(self):
+        """Return hit/miss counters of the LLM response cache (None when disabled)"""
+        return self.response_cache.stats() if self.response_cache is not None else None
+    
+    def _cache_get(self, key):
+        """Look up a cached LLM answer (None when caching is disabled or on a miss)"""
+        return self.response_cache.get(key) if self.response_cache is not None else None
+    
+    def _cache_put(self, key, value):
+        """Store an LLM answer when caching is enabled"""
+        if self.response_cache is not None:
+            self.response_cache.put(key, value)
+    
+    def _call_ollama(self, prompt, json_format=False, deadline=None):
         """
         Call Ollama API with the given prompt
         
         Args:
             prompt: The prompt to send to Ollama
+            json_format: Whether to constrain the answer to valid JSON
+            deadline: Optional Deadline for the call, retries included
             
         Returns:
             Response from Ollama as a string
+            
+        Raises:
+            OllamaUnavailableError: If the call failed, timed out or the circuit is open
+            AdmissionRejectedError: If Ollama is saturated and no slot freed up in time
         """
+        data = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False
+        }
+        if json_format:
+            data["format"] = "json"
+        
+        self._admit(deadline)
         try:
-            data = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False
-            }
-            
-            response = requests.post(self.api_url, json=data)
-            
-            if response.status_code == 200:
-                return response.json().get("response", "")
-            else:
-                print(f"Error calling Ollama API: {response.status_code}")
-                return ""
+            response = self.client.generate(data, deadline=deadline).get("response", "")
         except Exception as e:
             print(f"Exception when calling Ollama API: {e}")
-            return ""
+            self.circuit_breaker.record_failure()
+            raise OllamaUnavailableError(str(e)) from e
+        finally:
+            self.limiter.release()
+        
+        self.circuit_breaker.record_success()
+        return response
+    
+    def _stream_ollama(self, prompt, json_format=False, deadline=None):
+        """
+        Call Ollama API in streaming mode
+        
+        Args:
+            prompt: The prompt to send to Ollama
+            json_format: Whether to constrain the answer to valid JSON
+            deadline: Optional Deadline for the whole stream
+            
+        Yields:
+            Response text fragments as they are generated
+            
+        Raises:
+            OllamaUnavailableError: If the stream failed, timed out or the circuit is open
+            AdmissionRejectedError: If Ollama is saturated and no slot freed up in time
+        """
+        data = {
+            "model": self.model_name,
+            "prompt": prompt
+        }
+        if json_format:
+            data["format"] = "json"
+        
+        # The slot is held until the stream ends or the caller closes it
+        self._admit(deadline)
+        try:
+            first_chunk = True
+            try:
+                for chunk in self.client.stream(data, deadline=deadline):
+                    if first_chunk:
+                        # The backend is answering; callers may stop reading at any point after this
+                        self.circuit_breaker.record_success()
+                        first_chunk = False
+                    yield chunk
+            except Exception as e:
+                print(f"Exception when streaming from Ollama API: {e}")
+                self.circuit_breaker.record_failure()
+                raise OllamaUnavailableError(str(e)) from e
+            
+            if first_chunk:
+                self.circuit_breaker.record_success()
+        finally:
+            self.limiter.release()
+    
+    def _admit(self, deadline=None):
+        """
+        Pass the circuit breaker, then take an Ollama slot
+        
+        The breaker is checked first, so an open circuit fails fast instead of
+        queueing for a slot. The caller releases the slot with limiter.release().
+        
+        Args:
+            deadline: Optional Deadline bounding the wait for a slot
+            
+        Raises:
+            OllamaUnavailableError: If the circuit is open
+            AdmissionRejectedError: If Ollama is saturated and no slot freed up in time
+        """
+        if not self.circuit_breaker.allow_request():
+            raise OllamaUnavailableError("Ollama circuit is open")
+        try:
+            self.limiter.acquire(self.priority, deadline.remaining() if deadline is not None else None)
+        except AdmissionRejectedError:
+            # A half-open trial that never reached Ollama must not keep the circuit half-open
+            self.circuit_breaker.release_trial()
+            raise
     
     def _format_genre_prediction_prompt(self, user_responses):
         """
@@ -116,17 +418,48 @@ class MoodPredictor:
         """
         for key, value in user_responses.items():
             prompt += f"\n- {key}: {value}"
-        prompt += """
+        prompt += f"""
         Return your response as valid JSON like this:
-        {
+        {{
         "genres": ["Genre1", "Genre2", "Genre3"],
         "emotions": ["Emotion1", "Emotion2"]
-        }
+        }}
         Choose from these common movie genres:
-        Action, Adventure, Animation, Biography, Comedy, Crime, Documentary, Drama, Family,
-        Fantasy, History, Horror, Music, Musical, Mystery, Romance, Sci-Fi, Sport, Thriller, War
+        {", ".join(config.MOVIE_GENRES)}
         Choose from these common emotions:
-        Happy, Sad, Excited, Relaxed, Tense, Romantic, Nostalgic, Inspired, Fearful, Calm
+        {", ".join(config.MOVIE_EMOTIONS)}
+        """
+        return prompt
+
+    def _format_combined_prompt(self, user_responses, scene_text, feelings_text):
+        """
+        Format prompt for the combined genre, emotion and story overview prediction
+        Args:
+        user_responses: Dictionary of user responses to questions
+        scene_text: Text describing a specific scene
+        feelings_text: Text describing user feelings
+        Returns:
+        Formatted prompt string
+        """
+        prompt = """Based on the following user responses about their movie watching context,
+        predict the most suitable movie genres and emotions/mood for recommendations,
+        and write a concise 50-word overview of a story the user might enjoy watching.
+        User responses:
+        """
+        for key, value in user_responses.items():
+            if key not in ('scene_visualization', 'mood_description'):
+                prompt += f"\n- {key}: {value}"
+        prompt += f"""
+        Specific scene in mind: {scene_text}
+        Current feelings: {feelings_text}
+        Return a single JSON object like this:
+        {{
+        "genres": ["Genre1", "Genre2", "Genre3"],
+        "emotions": ["Emotion1", "Emotion2"],
+        "overview": "50-word story overview"
+        }}
+        Choose genres only from: {", ".join(config.MOVIE_GENRES)}
+        Choose emotions only from: {", ".join(config.MOVIE_EMOTIONS)}
         """
         return prompt
 
@@ -157,18 +490,12 @@ class MoodPredictor:
         Returns:
             List of identified genres
         """
-        common_genres = [
-            "Action", "Adventure", "Animation", "Biography", "Comedy", "Crime", 
-            "Documentary", "Drama", "Family", "Fantasy", "History", "Horror", 
-            "Music", "Musical", "Mystery", "Romance", "Sci-Fi", "Sport", "Thriller", "War"
-        ]
-        
         found_genres = []
-        for genre in common_genres:
+        for genre in config.MOVIE_GENRES:
             if genre.lower() in text.lower():
                 found_genres.append(genre)
         
-        return found_genres or ["Drama"]  # Default to Drama if nothing found
+        return found_genres or [config.DEFAULT_GENRE]  # Default to Drama if nothing found
     
     def _extract_emotions_from_text(self, text):
         """
@@ -180,14 +507,9 @@ class MoodPredictor:
         Returns:
             List of identified emotions
         """
-        common_emotions = [
-            "Happy", "Sad", "Excited", "Relaxed", "Tense", "Romantic", 
-            "Nostalgic", "Inspired", "Fearful", "Calm"
-        ]
-        
         found_emotions = []
-        for emotion in common_emotions:
+        for emotion in config.MOVIE_EMOTIONS:
             if emotion.lower() in text.lower():
                 found_emotions.append(emotion)
         
-        return found_emotions or ["Relaxed"]  # Default to Relaxed if nothing found
\ No newline at end of file
+        return found_emotions or [config.DEFAULT_EMOTION]  # Default to Relaxed if nothing found
\ No newline at end of file
@@ -0,0 +1,256 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model.int8.onnx"
+MAX_SEQUENCE_LENGTH = 256  # Same truncation as the sentence-transformers MiniLM pipeline
+
+PARITY_TEXTS = [
+    "A lonely astronaut fights to survive after being stranded on a hostile planet.",
+    "Two childhood friends reunite for one last summer road trip along the coast.",
+    "A detective unravels a web of lies in a city gripped by fear.",
+    "I'm feeling relaxed but a bit nostalgic, looking for something that lifts my spirits.",
+    "A heartfelt reunion",
+    "A thrilling car chase through the night",
+    "A family of misfits discovers a magical world hidden beneath their town.",
+    "cozy and dim, late night, just me",
+]
+
+
+class OnnxSentenceEncoder:
+    """
+    ONNX Runtime implementation of the sentence-transformers encode() API
+
+    Runs the exported MiniLM transformer, then applies the same mean pooling
+    and L2 normalization as the sentence-transformers pipeline, so it can be
+    used as a drop-in replacement for SentenceTransformer in TextEmbedder.
+    """
+
+    def __init__(self, model_dir=None, quantized=True, num_threads=None):
+        """
+        Load the exported model and tokenizer
+
+        Args:
+            model_dir: Directory written by export_onnx_model()
+            quantized: Whether to load the int8 model instead of the float32 one
+            num_threads: Intra-op thread count (None = onnxruntime default)
+        """
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        model_dir = model_dir or config.ONNX_MODEL_DIR
+        model_path = os.path.join(model_dir, INT8_MODEL_FILE if quantized else FP32_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found, run `python models/onnx_encoder.py export` first")
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self):
+        """Embedding dimension of the model"""
+        return self.dimension
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True):
+        """
+        Embed one text or a list of texts
+
+        Args:
+            sentences: A string or a list of strings
+            batch_size: Number of texts per forward pass
+            convert_to_numpy: Accepted for API compatibility; output is always NumPy
+
+        Returns:
+            float32 vector for a single string, otherwise a (len, dim) matrix
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            tokens = self.tokenizer(batch, padding=True, truncation=True, max_length=MAX_SEQUENCE_LENGTH,
+                                    return_tensors="np")
+            inputs = {name: tokens[name].astype(np.int64) for name in tokens if name in self.input_names}
+            token_embeddings = self.session.run(None, inputs)[0]
+
+            # Mean pooling over real tokens, then L2 normalization
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            embeddings[start:start + len(batch)] = pooled / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+
+def export_onnx_model(model_name=None, output_dir=None, quantize=True):
+    """
+    Export the sentence-transformer's transformer to ONNX, optionally with an int8 copy
+
+    Args:
+        model_name: Hugging Face name of the sentence-transformer model
+        output_dir: Directory for the .onnx files and tokenizer
+        quantize: Whether to also write a dynamically int8-quantized model
+
+    Returns:
+        Path of the output directory
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    model_name = model_name or config.SENTENCE_TRANSFORMER_MODEL
+    output_dir = output_dir or config.ONNX_MODEL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(output_dir, INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    return output_dir
+
+
+def check_parity(reference_model, candidate_model, texts=None, min_cosine=0.99):
+    """
+    Check that a candidate backend produces the same embeddings as the reference
+
+    Args:
+        reference_model: Object with encode(), e.g. SentenceTransformer
+        candidate_model: Object with encode(), e.g. OnnxSentenceEncoder
+        texts: Texts to compare (defaults to PARITY_TEXTS)
+        min_cosine: Smallest acceptable per-text cosine similarity
+
+    Returns:
+        Dictionary with the shape check, min/mean cosine and a pass flag
+    """
+    texts = texts or PARITY_TEXTS
+    reference = np.asarray(reference_model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    candidate = np.asarray(candidate_model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+
+    same_shape = reference.shape == candidate.shape
+    if not same_shape:
+        return {"same_shape": False, "min_cosine": 0.0, "mean_cosine": 0.0, "passed": False}
+
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = (reference * candidate).sum(axis=1)
+    return {
+        "same_shape": True,
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "passed": bool(cosines.min() >= min_cosine),
+    }
+
+
+def benchmark_encoder(model, texts=None, repeats=20, batch_size=32):
+    """
+    Measure per-text and batched encode latency
+
+    Args:
+        model: Object with encode()
+        texts: Texts to encode (defaults to PARITY_TEXTS repeated to 64 texts)
+        repeats: Number of timed runs
+        batch_size: Batch size for the batched runs
+
+    Returns:
+        Dictionary with mean per-text latency and batched latency per text, in ms
+    """
+    texts = texts or (PARITY_TEXTS * 8)
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts[:batch_size]:
+            model.encode(text)
+    single_ms = 1000 * (time.perf_counter() - start) / (repeats * min(batch_size, len(texts)))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.encode(texts, batch_size=batch_size)
+    batched_ms = 1000 * (time.perf_counter() - start) / (repeats * len(texts))
+
+    return {"single_ms_per_text": single_ms, "batched_ms_per_text": batched_ms}
+
+
+def main():
+    """Command-line entry point: export the model, or compare backends"""
+    parser = argparse.ArgumentParser(description="ONNX backend for TextEmbedder")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the model to ONNX (+ int8)")
+    export_parser.add_argument("--model", default=config.SENTENCE_TRANSFORMER_MODEL)
+    export_parser.add_argument("--out", default=config.ONNX_MODEL_DIR)
+    export_parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 model")
+
+    compare_parser = subparsers.add_parser("compare", help="Parity check and latency benchmark vs PyTorch")
+    compare_parser.add_argument("--model-dir", default=config.ONNX_MODEL_DIR)
+    compare_parser.add_argument("--threads", type=int, default=config.ONNX_NUM_THREADS)
+    compare_parser.add_argument("--min-cosine", type=float, default=0.99)
+    compare_parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        output_dir = export_onnx_model(args.model, args.out, quantize=not args.no_quantize)
+        print(f"Exported ONNX model to {output_dir}")
+        return
+
+    from sentence_transformers import SentenceTransformer
+
+    backends = {"torch": SentenceTransformer(config.SENTENCE_TRANSFORMER_MODEL)}
+    for quantized in (False, True):
+        name = "onnx-int8" if quantized else "onnx-fp32"
+        try:
+            backends[name] = OnnxSentenceEncoder(args.model_dir, quantized=quantized, num_threads=args.threads)
+        except FileNotFoundError as e:
+            print(f"Skipping {name}: {e}")
+
+    failed = False
+    for name, model in backends.items():
+        timings = benchmark_encoder(model, repeats=args.repeats)
+        line = (f"{name:>10}: {timings['single_ms_per_text']:7.2f} ms/text single, "
+                f"{timings['batched_ms_per_text']:7.2f} ms/text batched")
+        if name != "torch":
+            parity = check_parity(backends["torch"], model, min_cosine=args.min_cosine)
+            failed = failed or not parity["passed"]
+            line += (f" | cosine min {parity['min_cosine']:.4f} mean {parity['mean_cosine']:.4f} "
+                     f"{'OK' if parity['passed'] else 'FAIL'}")
+        print(line)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import sys
+import os
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.resilience import OllamaUnavailableError
+from utils.debug_logger import save_similarity_filtered_data, save_genre_filtered_data
+
+# Context keys every request starts with
+REQUEST_KEYS = (
+    'user_responses', 'selected_emojis', 'genre_emotion_responses', 'scene_text', 'feelings_text',
+    'report', 'deadline', 'timings', 'request_start', 'degraded'
+)
+
+
+class Stage:
+    """
+    One registered step of the recommendation pipeline
+
+    A stage is a function(engine, ctx, deadline, max_candidates) that reads
+    its inputs from the request context and writes its outputs back to it.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), skip_on_early_exit=False, exit_when=None):
+        """
+        Describe a stage
+
+        Args:
+            name: Name used in config.RECOMMENDATION_PIPELINE and in the timings
+            func: Callable implementing the stage
+            inputs: Context keys the stage reads
+            outputs: Context keys the stage writes
+            skip_on_early_exit: Whether the stage is skipped once an earlier stage triggered early exit
+            exit_when: Optional predicate(ctx) checked after the stage; True triggers early exit
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.skip_on_early_exit = skip_on_early_exit
+        self.exit_when = exit_when
+
+    @property
+    def budget(self):
+        """Share of the request deadline the stage may use (None = whatever is left)"""
+        return config.PIPELINE_STAGE_BUDGETS.get(self.name)
+
+    @property
+    def max_candidates(self):
+        """Candidate limit of the stage (None = stage default)"""
+        return config.PIPELINE_STAGE_MAX_CANDIDATES.get(self.name)
+
+
+STAGE_REGISTRY = {}
+
+
+def register_stage(name, inputs=(), outputs=(), skip_on_early_exit=False, exit_when=None):
+    """
+    Decorator registering a function as a pipeline stage
+
+    Args:
+        name: Stage name, as listed in config.RECOMMENDATION_PIPELINE
+        inputs: Context keys the stage reads
+        outputs: Context keys the stage writes
+        skip_on_early_exit: Whether early exit skips the stage
+        exit_when: Optional predicate(ctx) that triggers early exit after the stage
+    """
+    def decorator(func):
+        STAGE_REGISTRY[name] = Stage(name, func, inputs, outputs, skip_on_early_exit, exit_when)
+        return func
+    return decorator
+
+
+class RecommendationPipeline:
+    """
+    Runs the configured stages of a recommendation request in order
+
+    Stage wiring is checked when the pipeline is built, so a stage list in
+    config that reads a key no earlier stage writes fails at startup rather
+    than mid-request. Every stage gets a sub-deadline from its budget and is
+    timed; once a stage triggers early exit, the remaining stages marked
+    skip_on_early_exit are skipped.
+    """
+
+    def __init__(self, engine, stage_names=None):
+        """
+        Resolve and validate the stage list
+
+        Args:
+            engine: RecommendationEngine the stages operate on
+            stage_names: Stage names in execution order (defaults to config.RECOMMENDATION_PIPELINE)
+
+        Raises:
+            ValueError: If a stage is unknown or reads a key nothing provides
+        """
+        self.engine = engine
+        stage_names = stage_names or config.RECOMMENDATION_PIPELINE
+
+        unknown = [name for name in stage_names if name not in STAGE_REGISTRY]
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {', '.join(unknown)}")
+        self.stages = [STAGE_REGISTRY[name] for name in stage_names]
+
+        available = set(REQUEST_KEYS)
+        for stage in self.stages:
+            missing = [key for key in stage.inputs if key not in available]
+            if missing:
+                raise ValueError(f"Pipeline stage '{stage.name}' needs {', '.join(missing)}, "
+                                 f"which no earlier stage provides")
+            available.update(stage.outputs)
+
+    def run(self, ctx):
+        """
+        Run every stage on a request context
+
+        Args:
+            ctx: Dictionary holding at least the REQUEST_KEYS
+
+        Returns:
+            The same dictionary, with every stage's outputs (None for skipped stages)
+        """
+        early_exit = None
+        for stage in self.stages:
+            if early_exit and stage.skip_on_early_exit:
+                for key in stage.outputs:
+                    ctx.setdefault(key, None)
+                continue
+
+            deadline = ctx['deadline'].stage(stage.budget) if stage.budget else ctx['deadline']
+            start = time.perf_counter()
+            try:
+                stage.func(self.engine, ctx, deadline, stage.max_candidates)
+            finally:
+                ctx['timings'][stage.name] = (1000 * (start - ctx['request_start']),
+                                              1000 * (time.perf_counter() - ctx['request_start']))
+
+            if not early_exit and config.PIPELINE_EARLY_EXIT_ENABLED and stage.exit_when and stage.exit_when(ctx):
+                early_exit = stage.name
+                print(f"Enough confident candidates after '{stage.name}', skipping the remaining optional stages")
+
+        ctx['early_exit'] = early_exit
+        return ctx
+
+
+def _submit(engine, ctx, name, func, *args):
+    """
+    Start timed work on the engine's LLM thread pool (or run it inline when disabled)
+
+    Args:
+        engine: RecommendationEngine whose llm_executor runs the work
+        ctx: Request context receiving the timing under name
+        name: Name recorded in the timings
+        func: Callable doing the work
+        *args: Arguments for func
+
+    Returns:
+        Future holding func's return value
+    """
+    def timed():
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            ctx['timings'][name] = (1000 * (start - ctx['request_start']),
+                                    1000 * (time.perf_counter() - ctx['request_start']))
+
+    if engine.llm_executor is not None:
+        return engine.llm_executor.submit(timed)
+
+    future = Future()
+    future.set_result(timed())
+    return future
+
+
+def _confident_candidates(ctx):
+    """Whether the genres are known and enough candidates are already very similar"""
+    scores = ctx.get('similarity_scores')
+    return (
+        ctx.get('fast_prediction') is not None and scores is not None and
+        int((scores >= config.PIPELINE_EARLY_EXIT_SIMILARITY).sum()) >= config.FINAL_RECOMMENDATIONS
+    )
+
+
+@register_stage('fast_prediction', inputs=('genre_emotion_responses',), outputs=('fast_prediction', 'genre_future'))
+def fast_prediction_stage(engine, ctx, deadline, max_candidates):
+    """Genres and emotions from the embedding-based predictor, when it is confident"""
+    prediction = None
+    if engine.fast_mood_predictor is not None:
+        prediction = engine.fast_mood_predictor.predict(ctx['genre_emotion_responses'])
+    ctx['fast_prediction'] = prediction
+    ctx['genre_future'] = None
+    if prediction is not None:
+        ctx['genre_future'] = Future()
+        ctx['genre_future'].set_result(prediction)
+
+
+@register_stage('quick_retrieval', inputs=('user_responses', 'fast_prediction'),
+                outputs=('positions', 'similarity_scores'), exit_when=_confident_candidates)
+def quick_retrieval_stage(engine, ctx, deadline, max_candidates):
+    """Retrieve with the user's own words before any LLM call; strong matches end the request early"""
+    user_text = engine.user_text(ctx['user_responses'])
+    embedding = engine.embed_text(user_text, deadline.remaining())
+    ctx['positions'], ctx['similarity_scores'] = engine.retrieve_candidates(embedding, user_text, max_candidates)
+
+
+@register_stage('llm_prediction',
+                inputs=('fast_prediction', 'genre_future', 'genre_emotion_responses', 'scene_text', 'feelings_text'),
+                outputs=('story_overview', 'genre_future', 'llm_deadline'), skip_on_early_exit=True)
+def llm_prediction_stage(engine, ctx, deadline, max_candidates):
+    """Story overview, plus genres and emotions unless the fast path already has them"""
+    # The overview is produced on this thread so streamed updates reach the caller directly
+    report = ctx['report']
+    on_overview = lambda text: report("overview", text)
+    scene_text, feelings_text = ctx['scene_text'], ctx['feelings_text']
+    ctx['llm_deadline'] = deadline
+    ctx['story_overview'] = ""
+    try:
+        if ctx['fast_prediction'] is not None:
+            # Confident local prediction: only the overview still needs the LLM
+            ctx['story_overview'] = engine.mood_predictor.generate_story_overview(
+                scene_text, feelings_text, on_overview, deadline
+            )
+        elif config.LLM_COMBINED_PREDICTION:
+            # One structured call returns genres, emotions and the overview together
+            predicted = engine.mood_predictor.predict_all(
+                ctx['genre_emotion_responses'], scene_text, feelings_text, on_overview, deadline
+            )
+            ctx['genre_future'] = Future()
+            ctx['genre_future'].set_result(predicted)
+            ctx['story_overview'] = predicted.get('overview', '')
+        else:
+            # Neither LLM call needs the other's output, so the genre prediction runs alongside
+            ctx['genre_future'] = _submit(
+                engine, ctx, "genre_prediction",
+                engine.mood_predictor.predict_genre_and_emotions, ctx['genre_emotion_responses'], deadline
+            )
+            ctx['story_overview'] = engine.mood_predictor.generate_story_overview(
+                scene_text, feelings_text, on_overview, deadline
+            )
+    except OllamaUnavailableError as e:
+        print(f"Ollama unavailable, recommending without LLM features: {e}")
+        ctx['degraded'] = True
+
+
+@register_stage('embedding', inputs=('user_responses', 'story_overview'),
+                outputs=('story_overview', 'story_embedding', 'query_text'), skip_on_early_exit=True)
+def embedding_stage(engine, ctx, deadline, max_candidates):
+    """Embed the story overview, or the user's own words when there is none"""
+    ctx['report']("matching")
+    story_overview = ctx.get('story_overview')
+    if not story_overview:
+        ctx['degraded'] = True
+        story_overview = engine.user_text(ctx['user_responses'])
+    ctx['story_overview'] = story_overview
+    ctx['story_embedding'] = engine.embed_text(story_overview, deadline.remaining())
+    ctx['query_text'] = " ".join(
+        text for text in (story_overview, ctx['scene_text'], ctx['feelings_text']) if text
+    )
+
+
+@register_stage('retrieval', inputs=('story_embedding', 'query_text'),
+                outputs=('positions', 'similarity_scores'), skip_on_early_exit=True)
+def retrieval_stage(engine, ctx, deadline, max_candidates):
+    """Dense (and lexical) candidate retrieval for the story overview"""
+    ctx['positions'], ctx['similarity_scores'] = engine.retrieve_candidates(
+        ctx['story_embedding'], ctx['query_text'], max_candidates
+    )
+
+
+@register_stage('ranking', inputs=('positions', 'similarity_scores', 'genre_future', 'selected_emojis'),
+                outputs=('predicted_genres', 'ranked_positions', 'ranked_scores'))
+def ranking_stage(engine, ctx, deadline, max_candidates):
+    """Score candidates on similarity, genres, emotions (with the emoji prior) and metadata"""
+    ctx['report']("ranking")
+    positions, similarity_scores = ctx['positions'], ctx['similarity_scores']
+    if max_candidates:
+        # Candidates arrive best first, so the limit keeps the most similar ones
+        positions, similarity_scores = positions[:max_candidates], similarity_scores[:max_candidates]
+
+    emoji_prior = engine.emoji_vectors.prior(ctx['selected_emojis']) if engine.emoji_vectors is not None else None
+    predicted_genres = []
+    predicted_emotions = []
+    if ctx['genre_future'] is not None:
+        wait_deadline = ctx.get('llm_deadline') or deadline
+        try:
+            predicted = ctx['genre_future'].result(timeout=wait_deadline.remaining())
+            predicted_genres = predicted.get('genres', [])
+            predicted_emotions = predicted.get('emotions', [])
+        except (OllamaUnavailableError, FutureTimeoutError) as e:
+            print(f"Genre prediction unavailable, ranking without it: {e or 'deadline exceeded'}")
+            ctx['degraded'] = True
+
+    if predicted_genres or predicted_emotions or emoji_prior:
+        weights = (0.5, 0.3, 0.2)
+    else:
+        # Degraded mode: rank on similarity (and metadata) alone
+        weights = (1.0, 0.0, 0.0)
+    ctx['predicted_genres'] = predicted_genres
+    ctx['ranked_positions'], ctx['ranked_scores'] = engine.rank_candidates(
+        positions, similarity_scores, predicted_genres, predicted_emotions, ctx['user_responses'],
+        *weights, emoji_prior
+    )
+
+
+@register_stage('debug_log', inputs=('positions', 'similarity_scores', 'ranked_positions', 'ranked_scores'))
+def debug_log_stage(engine, ctx, deadline, max_candidates):
+    """Save the candidate and ranked lists as CSV for debugging"""
+    if not config.DEBUG_LOGGING_ENABLED:
+        return
+    save_similarity_filtered_data(
+        engine.candidate_frame(ctx['positions'], {'similarity_score': ctx['similarity_scores']})
+    )
+    save_genre_filtered_data(engine.candidate_frame(ctx['ranked_positions'], ctx['ranked_scores']))
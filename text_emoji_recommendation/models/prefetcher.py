@@ -0,0 +1,209 @@
+import sys
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.response_cache import normalize_inputs
+
+
+class PrefetchCancelled(Exception):
+    """Raised inside a prefetch job once its inputs have been superseded"""
+
+
+def input_fingerprint(user_responses, selected_emojis=None):
+    """
+    Identify a set of questionnaire inputs
+
+    Uses the same normalization as the LLM response cache, so inputs that
+    would share cached answers also share a fingerprint.
+
+    Args:
+        user_responses: Dictionary of questionnaire responses
+        selected_emojis: List of selected emoji data (optional)
+
+    Returns:
+        Hex digest of the normalized inputs
+    """
+    emojis = sorted(e['emoji'] for e in selected_emojis or [])
+    payload = json.dumps([normalize_inputs(user_responses), emojis], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _PrefetchJob:
+    """One speculative run for one input fingerprint"""
+
+    def __init__(self, fingerprint, user_responses, selected_emojis):
+        self.fingerprint = fingerprint
+        self.user_responses = dict(user_responses)
+        self.selected_emojis = list(selected_emojis or [])
+        self.cancelled = threading.Event()
+        self.wake = threading.Event()  # Ends the debounce early (on submit or cancel)
+        self.future = None
+
+    def cancel(self):
+        self.cancelled.set()
+        self.wake.set()
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise PrefetchCancelled(self.fingerprint[:12])
+
+
+class SpeculativePrefetcher:
+    """
+    Runs the slow parts of a recommendation request while the user is still typing
+
+    Every time the questionnaire draft changes, submit() schedules a job for
+    its fingerprint. The job waits for the debounce interval and, unless newer
+    inputs arrived meanwhile, calls engine.prefetch, which fills the shared
+    embedding and LLM response caches. When the user submits, wait() joins a
+    job for the same inputs so generate_recommendations is served from cache;
+    a job for different inputs is cancelled. One prefetcher per session.
+    """
+
+    def __init__(self, engine, debounce_ms=None):
+        """
+        Initialize the prefetcher
+
+        Args:
+            engine: RecommendationEngine whose prefetch method does the work
+            debounce_ms: Quiet period before work starts (defaults to config.PREFETCH_DEBOUNCE_MS)
+        """
+        self.engine = engine
+        self.debounce = (config.PREFETCH_DEBOUNCE_MS if debounce_ms is None else debounce_ms) / 1000.0
+        self._lock = threading.Lock()
+        self._job = None
+
+        self.submitted = 0
+        self.superseded = 0
+        self.completed = 0
+        self.joined = 0
+
+    def submit(self, user_responses, selected_emojis=None):
+        """
+        Schedule speculative work for the current draft, cancelling work for older drafts
+
+        Args:
+            user_responses: Dictionary of questionnaire responses entered so far
+            selected_emojis: List of selected emoji data (optional)
+        """
+        if not self._worth_prefetching(user_responses):
+            return
+
+        fingerprint = input_fingerprint(user_responses, selected_emojis)
+        with self._lock:
+            if self._job is not None and self._job.fingerprint == fingerprint:
+                return
+            self._cancel_locked()
+            job = _PrefetchJob(fingerprint, user_responses, selected_emojis)
+            job.future = get_prefetch_executor().submit(self._run, job)
+            self._job = job
+            self.submitted += 1
+
+    def wait(self, user_responses, selected_emojis=None, timeout=None):
+        """
+        Let the prefetch for the submitted inputs finish before the real request runs
+
+        Args:
+            user_responses: Dictionary of submitted questionnaire responses
+            selected_emojis: List of selected emoji data (optional)
+            timeout: Seconds to wait at most (defaults to config.PREFETCH_MAX_JOIN_SECONDS)
+
+        Returns:
+            True if a prefetch for these inputs completed, False otherwise
+        """
+        timeout = config.PREFETCH_MAX_JOIN_SECONDS if timeout is None else timeout
+        fingerprint = input_fingerprint(user_responses, selected_emojis)
+        with self._lock:
+            job = self._job
+            if job is None:
+                return False
+            if job.fingerprint != fingerprint:
+                self._cancel_locked()
+                return False
+            self._job = None
+            self.joined += 1
+
+        # The inputs are final, so there is no point waiting out the debounce
+        job.wake.set()
+        try:
+            return job.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # The request goes ahead; whatever the job finishes still lands in the caches
+            return False
+
+    def cancel(self):
+        """Cancel any scheduled or running prefetch"""
+        with self._lock:
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        if self._job is not None:
+            self._job.cancel()
+            self._job.future.cancel()
+            self.superseded += 1
+            self._job = None
+
+    def _worth_prefetching(self, user_responses):
+        """Only the free-text answers make prefetching pay off; skip until one is filled in"""
+        return any(
+            isinstance(user_responses.get(key), str) and user_responses[key].strip()
+            for key in ('scene_visualization', 'mood_description')
+        )
+
+    def _run(self, job):
+        """Body of a prefetch job, run on the shared prefetch pool"""
+        # Debounce: inputs that change again within the interval never reach the engine
+        job.wake.wait(self.debounce)
+        if job.cancelled.is_set():
+            return False
+
+        start = time.perf_counter()
+        try:
+            self.engine.prefetch(job.user_responses, job.selected_emojis, check_cancelled=job.check_cancelled)
+        except PrefetchCancelled:
+            return False
+        except Exception as e:
+            print(f"Error in speculative prefetch: {e}")
+            return False
+
+        with self._lock:
+            self.completed += 1
+        print(f"Prefetched recommendation inputs in {time.perf_counter() - start:.2f}s")
+        return True
+
+    def stats(self):
+        """
+        Prefetch counters for monitoring
+
+        Returns:
+            Dictionary with submitted, superseded, completed and joined job counts
+        """
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "superseded": self.superseded,
+                "completed": self.completed,
+                "joined": self.joined,
+            }
+
+
+_prefetch_executor = None
+_prefetch_executor_lock = threading.Lock()
+
+
+def get_prefetch_executor():
+    """Return the process-wide thread pool running prefetch jobs, creating it on first use"""
+    global _prefetch_executor
+    with _prefetch_executor_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=config.PREFETCH_WORKERS, thread_name_prefix="prefetch"
+            )
+        return _prefetch_executor
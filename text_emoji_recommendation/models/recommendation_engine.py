@@ -2,311 +2,561 @@
 
 import sys
 import os
+import time
+import threading
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
 # Add project root to path to allow imports from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
-from utils.data_processor import load_movies_data, parse_genres
-from utils.embedding_utils import find_similar_movies
-from utils.debug_logger import save_similarity_filtered_data, save_genre_filtered_data
+from utils.data_processor import load_movie_catalog
+from utils.embedding_utils import normalize_embeddings
+from utils.ann_index import load_search_index
+from utils.lexical_index import load_lexical_index, reciprocal_rank_fusion, weighted_score_fusion
+from utils.emoji_vectors import load_emoji_vectors
+from utils.emotion_features import EmotionFeatures
+from utils.genre_index import GenreIndex
+from utils.response_cache import ResponseCache
+from utils.resilience import Deadline
 from models.text_embedder import TextEmbedder
+from models.embedding_batcher import get_embedding_batcher
 from models.mood_predictor import MoodPredictor
+from models.fast_mood_predictor import FastMoodPredictor
+from models.prefetcher import input_fingerprint
+from models.pipeline import RecommendationPipeline
 
 
 class RecommendationEngine:
     """
     Core recommendation engine for MoodFlixx
+    
+    Pipeline stages (models/pipeline.py) work through the public methods
+    user_text, embed_text, retrieve_candidates, rank_candidates and
+    candidate_frame, and the predictors, indexes and llm_executor.
     """
     
     def __init__(self):
         """Initialize the recommendation engine"""
-        self.movies_df = load_movies_data()
+        self.movies_df, self.embeddings = load_movie_catalog()
+        self.search_index = load_search_index(self.embeddings)
+        self._prepare_ranking_features()
+        self.lexical_index = load_lexical_index(self.movies_df) if config.HYBRID_RETRIEVAL_ENABLED else None
         self.text_embedder = TextEmbedder()
+        self.embedding_batcher = (
+            get_embedding_batcher(self.text_embedder) if config.EMBEDDING_BATCHING_ENABLED else None
+        )
         self.mood_predictor = MoodPredictor()
+        # Speculative work queues behind interactive requests for Ollama slots
+        self.prefetch_mood_predictor = MoodPredictor(priority=config.PREFETCH_PRIORITY)
+        self.fast_mood_predictor = FastMoodPredictor(self.text_embedder) if config.FAST_PATH_ENABLED else None
+        self.pipeline = RecommendationPipeline(self)
+        self.emoji_vectors = load_emoji_vectors()
+        # Ranked lists per input fingerprint (memory only: positions depend on the loaded catalog)
+        self.result_cache = (
+            ResponseCache(config.RESULT_CACHE_TTL_SECONDS, config.RESULT_CACHE_MAX_ENTRIES)
+            if config.RESULT_CACHE_ENABLED else None
+        )
+        self.llm_executor = (
+            ThreadPoolExecutor(max_workers=config.LLM_MAX_WORKERS, thread_name_prefix="ollama")
+            if config.LLM_PARALLEL_CALLS else None
+        )
+        # The engine is shared by all sessions, so per-request results are kept per thread
+        self._local = threading.local()
+    
+    @property
+    def last_timings(self):
+        """Stage start/end offsets (ms) of the last request made from this thread"""
+        return getattr(self._local, 'timings', {})
+    
+    @property
+    def last_degraded(self):
+        """Whether the last request made from this thread was answered without LLM features"""
+        return getattr(self._local, 'degraded', False)
+    
+    @property
+    def last_result(self):
+        """Full ranked result of the last request made from this thread, for paging with result_page"""
+        return getattr(self._local, 'result', None)
     
-    def generate_recommendations(self, user_responses, selected_emojis=None):
+    def generate_recommendations(self, user_responses, selected_emojis=None, progress_callback=None, page=0):
         """
         Generate movie recommendations based on user responses
         
+        The full ranked list is cached per input fingerprint, so identical
+        submissions are served without recomputation. It is also available
+        as last_result; callers page through it with result_page rather than
+        calling this method again.
+        
         Args:
             user_responses: Dictionary of user responses to questionnaire
             selected_emojis: List of selected emoji data (optional)
+            progress_callback: Optional callable(stage, detail) called from the calling thread:
+                ("overview", partial overview text) while it streams, then ("matching", None)
+                and ("ranking", None)
+            page: Which FINAL_RECOMMENDATIONS-sized page of the ranked list to return
             
         Returns:
             Tuple of (DataFrame with top recommendations, List of predicted genres)
         """
-        # Step 1: Predict genres and emotions from user responses
-        genre_emotion_responses = user_responses.copy()
+        request_start = time.perf_counter()
+        timings = {}
+        
+        fingerprint = input_fingerprint(user_responses, selected_emojis)
+        cached = self.result_cache.get(fingerprint) if self.result_cache is not None else None
+        if cached is not None:
+            timings["total"] = (0.0, 1000 * (time.perf_counter() - request_start))
+            self._local.timings = timings
+            self._local.degraded = False
+            self._local.result = cached
+            return self.result_page(cached, page), cached["predicted_genres"]
+        
+        def report(stage, detail=None):
+            if progress_callback is not None:
+                progress_callback(stage, detail)
+        
+        # The stages (see models/pipeline.py and config.RECOMMENDATION_PIPELINE) share one context
+        ctx = self.pipeline.run({
+            'user_responses': user_responses,
+            'selected_emojis': selected_emojis,
+            'genre_emotion_responses': self._genre_emotion_responses(user_responses, selected_emojis),
+            'scene_text': user_responses.get('scene_visualization', ''),
+            'feelings_text': user_responses.get('mood_description', ''),
+            'report': report,
+            'deadline': Deadline(config.REQUEST_DEADLINE_SECONDS),
+            'timings': timings,
+            'request_start': request_start,
+            'degraded': False,
+        })
+        ranked_positions, ranked_scores = ctx['ranked_positions'], ctx['ranked_scores']
+        predicted_genres = ctx['predicted_genres']
+        degraded = ctx['degraded']
+        
+        result = {
+            "positions": ranked_positions.tolist(),
+            "scores": {column: values.tolist() for column, values in ranked_scores.items()},
+            "predicted_genres": predicted_genres,
+        }
+        # Degraded results are not cached, so the next identical submission retries the LLM
+        if self.result_cache is not None and not degraded:
+            self.result_cache.put(fingerprint, result)
         
-        # Add emojis if provided
-        if selected_emojis and len(selected_emojis) > 0:
-            emoji_str = ", ".join([f"{e['emoji']} ({e['name']})" for e in selected_emojis])
-            genre_emotion_responses['selected_emojis'] = emoji_str
+        timings["total"] = (0.0, 1000 * (time.perf_counter() - request_start))
+        self._local.timings = timings
+        self._local.degraded = degraded
+        self._local.result = result
+        
+        # Return top recommendations along with predicted genres as a tuple
+        return self.result_page(result, page), predicted_genres
+    
+    def prefetch(self, user_responses, selected_emojis=None, check_cancelled=None):
+        """
+        Speculatively run the LLM and embedding work for a request that may be submitted soon
         
-        predicted = self.mood_predictor.predict_genre_and_emotions(genre_emotion_responses)
-        predicted_genres = predicted.get('genres', [])
-        predicted_emotions = predicted.get('emotions', [])
+        Results land in the shared embedding and LLM response caches, so a
+        later generate_recommendations call with the same inputs reuses them.
+        The same LLM calls as generate_recommendations are made, at the
+        prefetch queue priority, and only while Ollama has an idle slot.
         
-        # Step 2: Generate story overview from text inputs
+        Args:
+            user_responses: Dictionary of (draft) questionnaire responses
+            selected_emojis: List of selected emoji data (optional)
+            check_cancelled: Optional callable that raises when the work is no longer wanted;
+                it is called between stages and for every streamed chunk
+        """
+        check_cancelled = check_cancelled or (lambda: None)
+        deadline = Deadline(config.REQUEST_DEADLINE_SECONDS)
+        genre_emotion_responses = self._genre_emotion_responses(user_responses, selected_emojis)
         scene_text = user_responses.get('scene_visualization', '')
         feelings_text = user_responses.get('mood_description', '')
+        on_overview = lambda text: check_cancelled()
+        
+        # Embeds the user's own words as a side effect
+        fast_prediction = None
+        if self.fast_mood_predictor is not None:
+            fast_prediction = self.fast_mood_predictor.predict(genre_emotion_responses)
+        else:
+            self.text_embedder.get_embeddings([scene_text, feelings_text])
+        check_cancelled()
+        
+        predictor = self.prefetch_mood_predictor
+        if not predictor.limiter.has_idle_slot():
+            # Never make an interactive request queue behind speculative work
+            return
+        
+        if fast_prediction is not None:
+            story_overview = predictor.generate_story_overview(scene_text, feelings_text, on_overview, deadline)
+        elif config.LLM_COMBINED_PREDICTION:
+            story_overview = predictor.predict_all(
+                genre_emotion_responses, scene_text, feelings_text, on_overview, deadline
+            ).get('overview', '')
+        else:
+            predictor.predict_genre_and_emotions(genre_emotion_responses, deadline)
+            check_cancelled()
+            story_overview = predictor.generate_story_overview(scene_text, feelings_text, on_overview, deadline)
+        check_cancelled()
         
-        story_overview = self.mood_predictor.generate_story_overview(scene_text, feelings_text)
+        if story_overview:
+            self.embed_text(story_overview, deadline.remaining())
+    
+    def _genre_emotion_responses(self, user_responses, selected_emojis=None):
+        """
+        Responses sent for genre and emotion prediction
         
-        # Step 3: Find similar movies based on story overview
-        story_embedding = self.text_embedder.get_embedding(story_overview)
+        Selected emojis are only added when there are no precomputed emoji
+        vectors; otherwise they enter ranking as a prior instead.
         
-        if story_embedding:
-            similar_movies = find_similar_movies(
-                self.movies_df, 
-                story_embedding,
-                top_n=config.TOP_N_SIMILARITY,
-                threshold=config.SIMILARITY_THRESHOLD
-            )
+        Args:
+            user_responses: Dictionary of user responses to questionnaire
+            selected_emojis: List of selected emoji data (optional)
+            
+        Returns:
+            New dictionary of responses
+        """
+        genre_emotion_responses = user_responses.copy()
+        
+        # Add emojis if provided and not handled by the emoji prior
+        if selected_emojis and len(selected_emojis) > 0 and self.emoji_vectors is None:
+            emoji_str = ", ".join([f"{e['emoji']} ({e['name']})" for e in selected_emojis])
+            genre_emotion_responses['selected_emojis'] = emoji_str
+        
+        return genre_emotion_responses
+    
+    def retrieve_candidates(self, query_embedding, query_text, top_n=None):
+        """
+        Build the candidate set from embedding search fused with BM25 lexical search
+        
+        The lexical side catches exact title, cast and keyword matches the
+        dense search misses, and keeps retrieval working when the embedder
+        is unavailable. With an embedding, every fused candidate is rescored
+        by cosine similarity and must reach config.SIMILARITY_THRESHOLD, like
+        dense candidates; without one, lexical hits are used as they are.
+        
+        Args:
+            query_embedding: Embedding of the story overview (None if embedding failed)
+            query_text: Story overview plus the user's own scene and mood text
+            top_n: Maximum number of candidates (defaults to config.TOP_N_SIMILARITY)
+            
+        Returns:
+            Tuple of (catalog positions of the candidates, similarity scores), best first
+        """
+        top_n = top_n or config.TOP_N_SIMILARITY
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        
+        dense = empty
+        if query_embedding is not None:
+            dense = self.search_index.search(query_embedding, top_n=top_n, threshold=config.SIMILARITY_THRESHOLD)
+        
+        lexical = empty
+        if self.lexical_index is not None and query_text:
+            lexical = self.lexical_index.search(query_text, top_n=config.LEXICAL_TOP_N)
+        
+        if len(lexical[0]) == 0:
+            if query_embedding is not None:
+                positions, scores = dense
+            else:
+                # Neither retrieval path produced anything, use a subset of movies
+                positions = np.random.default_rng().choice(
+                    len(self.movies_df), min(top_n, len(self.movies_df)), replace=False
+                )
+                scores = np.full(len(positions), 0.5, dtype=np.float32)  # Default score
+        elif query_embedding is None:
+            positions, scores = lexical[0][:top_n], lexical[1][:top_n] / lexical[1][0]
         else:
-            # If embedding fails, use a subset of movies
-            similar_movies = self.movies_df.sample(min(config.TOP_N_SIMILARITY, len(self.movies_df)))
-            similar_movies['similarity_score'] = 0.5  # Default score
-        
-        # Save similarity filtered data for debugging
-        similarity_filtered_file = save_similarity_filtered_data(similar_movies)
-        
-        # Step 4: Apply enhanced filtering with genre, emotion, and metadata
-        final_recommendations = self._apply_enhanced_filtering(
-            similar_movies, 
-            predicted_genres, 
-            predicted_emotions,
-            user_responses
-        )
+            if config.HYBRID_FUSION == "weighted":
+                positions, _ = weighted_score_fusion(dense, lexical, top_n=top_n)
+            else:
+                positions, _ = reciprocal_rank_fusion([dense[0], lexical[0]], top_n=top_n)
+            # Candidates are scored downstream by their true cosine similarity
+            # (sorted positions keep reads from the memory-mapped matrix sequential)
+            positions = np.sort(positions)
+            query = normalize_embeddings(np.asarray(query_embedding, dtype=np.float32).reshape(-1))
+            scores = np.asarray(self.embeddings[positions] @ query)
+            # Keyword hits face the same similarity threshold as dense candidates
+            keep = scores >= config.SIMILARITY_THRESHOLD
+            positions, scores = positions[keep], scores[keep]
+            order = np.argsort(-scores, kind='stable')
+            positions, scores = positions[order], scores[order]
+        
+        return positions, scores
+    
+    def user_text(self, user_responses):
+        """
+        The user's own words, used as the query when no story overview is available
+        
+        Args:
+            user_responses: Dictionary of user responses to questionnaire
+            
+        Returns:
+            Scene and mood descriptions, or all answers when those are empty
+        """
+        texts = [user_responses.get('scene_visualization', ''), user_responses.get('mood_description', '')]
+        text = " ".join(t for t in texts if isinstance(t, str) and t.strip())
+        if not text:
+            text = " ".join(str(v) for v in user_responses.values() if isinstance(v, str) and v.strip())
+        return text
+    
+    def embed_text(self, text, timeout=None):
+        """
+        Embed text through the shared micro-batcher when enabled
+        
+        Args:
+            text: Text to embed
+            timeout: Seconds to wait for a batched embedding (None waits indefinitely)
+            
+        Returns:
+            Embedding vector, or None on failure or timeout
+        """
+        if self.embedding_batcher is not None:
+            try:
+                return self.embedding_batcher.get_embedding(text, timeout=timeout)
+            except FutureTimeoutError:
+                print("Embedding timed out, retrieving by keywords only")
+                return None
+        return self.text_embedder.get_embedding(text)
+    
+    def result_page(self, result, page):
+        """
+        One page of a ranked result as a DataFrame
         
-        # Save genre filtered data for debugging
-        genre_filtered_file = save_genre_filtered_data(final_recommendations)
+        Only reads the catalog, so paging never reruns the recommendation pipeline.
         
-        # Return top recommendations along with predicted genres as a tuple
-        return final_recommendations.head(config.FINAL_RECOMMENDATIONS), predicted_genres
+        Args:
+            result: Ranked result (see last_result) with 'positions' and per-column 'scores' lists
+            page: Zero-based page number; pages hold config.FINAL_RECOMMENDATIONS movies
+            
+        Returns:
+            DataFrame with the page's movies (empty past the end of the list)
+        """
+        start = page * config.FINAL_RECOMMENDATIONS
+        end = start + config.FINAL_RECOMMENDATIONS
+        return self.candidate_frame(
+            np.asarray(result["positions"][start:end], dtype=np.int64),
+            {column: np.asarray(values[start:end], dtype=np.float64) for column, values in result["scores"].items()}
+        )
+    
+    def candidate_frame(self, positions, scores):
+        """
+        Materialize candidates as a DataFrame
+        
+        Args:
+            positions: Catalog row positions
+            scores: Dictionary of column name -> score array aligned with positions
+            
+        Returns:
+            DataFrame with the movies' metadata and one column per score
+        """
+        return self.movies_df.iloc[positions].assign(**scores)
     
-    def _apply_enhanced_filtering(self, similar_movies, predicted_genres, predicted_emotions, user_responses,
-                                 similarity_weight=0.5, genre_weight=0.3, emotion_weight=0.2):
+    def rank_candidates(self, positions, similarity_scores, predicted_genres, predicted_emotions,
+                        user_responses, similarity_weight=0.5, genre_weight=0.3, emotion_weight=0.2,
+                        emoji_prior=None):
         """
         Apply enhanced filtering to similarity-filtered movies
         
+        Works on catalog positions and score arrays only; callers build a
+        DataFrame for the rows they actually show.
+        
         Args:
-            similar_movies: DataFrame with similarity-filtered movies
+            positions: Catalog positions of the similarity-filtered movies
+            similarity_scores: Similarity score per position
             predicted_genres: List of predicted genres
             predicted_emotions: List of predicted emotions
             user_responses: Dictionary of user responses
             similarity_weight: Weight for similarity score
             genre_weight: Weight for genre match score
             emotion_weight: Weight for emotion match score
+            emoji_prior: Optional genre/emotion prior of the selected emojis (see EmojiVectors.prior)
             
         Returns:
-            DataFrame with filtered movies and final scores
+            Tuple of (positions of the filtered movies sorted by final score,
+            dictionary of similarity/genre/emotion/final score arrays in the same order)
         """
-        # Create a copy to avoid modifying the original
-        result_df = similar_movies.copy()
+        positions = np.asarray(positions, dtype=np.int64)
+        similarity_scores = np.asarray(similarity_scores, dtype=np.float64)
+        genre_prior = emoji_prior["genres"] if emoji_prior else None
+        emotion_prior = emoji_prior["emotions"] if emoji_prior else None
         
         # Calculate genre match score with weighted importance
-        result_df['genre_match_score'] = result_df['genres'].apply(
-            lambda x: self._calculate_weighted_genre_match(x, predicted_genres)
-        )
+        genre_scores = self._calculate_weighted_genre_match(positions, predicted_genres, genre_prior)
         
         # Calculate emotion match score
-        result_df['emotion_match_score'] = result_df.apply(
-            lambda row: self._calculate_emotion_match(row, predicted_emotions), axis=1
-        )
-        
-        # Calculate metadata relevance (recency and popularity if available)
-        self._calculate_metadata_relevance(result_df)
+        emotion_scores = self._calculate_emotion_match(positions, predicted_emotions, emotion_prior)
         
         # Calculate final score (combination of all factors)
         # Normalize weights to sum to 1
         total_weight = similarity_weight + genre_weight + emotion_weight
-        norm_similarity_weight = similarity_weight / total_weight
-        norm_genre_weight = genre_weight / total_weight
-        norm_emotion_weight = emotion_weight / total_weight
-        
-        result_df['final_score'] = (
-            result_df['similarity_score'] * norm_similarity_weight + 
-            result_df['genre_match_score'] * norm_genre_weight +
-            result_df['emotion_match_score'] * norm_emotion_weight
+        final_scores = (
+            similarity_scores * (similarity_weight / total_weight) +
+            genre_scores * (genre_weight / total_weight) +
+            emotion_scores * (emotion_weight / total_weight)
         )
         
         # Apply recency and popularity modifiers if available
-        if 'recency_score' in result_df.columns:
-            result_df['final_score'] = result_df['final_score'] * 0.9 + result_df['recency_score'] * 0.1
+        recency_scores, popularity_scores = self._calculate_metadata_relevance(positions)
+        if recency_scores is not None:
+            final_scores = final_scores * 0.9 + recency_scores * 0.1
         
-        if 'popularity_score' in result_df.columns:
-            result_df['final_score'] = result_df['final_score'] * 0.9 + result_df['popularity_score'] * 0.1
+        if popularity_scores is not None:
+            final_scores = final_scores * 0.9 + popularity_scores * 0.1
         
         # Apply dynamic threshold based on score distribution
-        mean_score = result_df['final_score'].mean()
-        std_score = result_df['final_score'].std()
-        min_threshold = getattr(config, 'MIN_SCORE_THRESHOLD', 0.3)
-        threshold = max(min_threshold, mean_score - 0.5 * std_score)
-        
-        # Filter by threshold
-        filtered_df = result_df[result_df['final_score'] >= threshold]
-        
-        # If filtering results in too few recommendations, use the original set
-        min_recommendations = getattr(config, 'MIN_RECOMMENDATIONS', 5)
-        if len(filtered_df) < min_recommendations:
-            filtered_df = result_df
+        keep = np.arange(len(positions))
+        if len(final_scores) > 0:
+            std_score = final_scores.std(ddof=1) if len(final_scores) > 1 else np.nan
+            min_threshold = getattr(config, 'MIN_SCORE_THRESHOLD', 0.3)
+            threshold = max(min_threshold, final_scores.mean() - 0.5 * std_score)
+            
+            # Filter by threshold; if that leaves too few recommendations, use the original set
+            above = np.flatnonzero(final_scores >= threshold)
+            if len(above) >= getattr(config, 'MIN_RECOMMENDATIONS', 5):
+                keep = above
         
         # Sort by final score
-        filtered_df = filtered_df.sort_values('final_score', ascending=False)
-        
-        return filtered_df
+        order = keep[np.argsort(-final_scores[keep], kind='stable')]
+        return positions[order], {
+            'similarity_score': similarity_scores[order],
+            'genre_match_score': genre_scores[order],
+            'emotion_match_score': emotion_scores[order],
+            'final_score': final_scores[order],
+        }
     
-    def _calculate_weighted_genre_match(self, movie_genres_str, predicted_genres):
+    def _calculate_weighted_genre_match(self, positions, predicted_genres, genre_prior=None):
         """
-        Calculate how well a movie's genres match the predicted genres with weighted importance
+        Calculate how well movies' genres match the predicted genres with weighted importance
         
         Args:
-            movie_genres_str: String of pipe-separated genres
+            positions: Catalog positions of the movies to score
             predicted_genres: List of predicted genres
+            genre_prior: Optional genre -> probability mapping from the selected emojis
             
         Returns:
-            Score between 0 and 1
+            Array of scores between 0 and 1
         """
-        if not predicted_genres:
-            return 0.5  # Neutral score if no predictions
-        
-        movie_genres = parse_genres(movie_genres_str)
-        
-        if not movie_genres:
-            return 0
+        if not predicted_genres and not genre_prior:
+            return np.full(len(positions), 0.5)  # Neutral score if no predictions
         
         # Give higher weight to primary genres (first in the predicted list)
         primary_weight = 1.5
         secondary_weight = 1.0
         
-        weighted_matches = 0
-        weighted_max = 0
+        genre_weights = {}
+        for i, genre in enumerate(predicted_genres):
+            genre_weights[genre] = genre_weights.get(genre, 0.0) + (primary_weight if i == 0 else secondary_weight)
         
-        # Process primary genre (first predicted)
-        if predicted_genres and len(predicted_genres) > 0:
-            primary_genre = predicted_genres[0]
-            weighted_max += primary_weight
-            
-            if primary_genre in movie_genres:
-                weighted_matches += primary_weight
-        
-        # Process secondary genres (remaining predicted)
-        for genre in predicted_genres[1:]:
-            weighted_max += secondary_weight
-            if genre in movie_genres:
-                weighted_matches += secondary_weight
-        
-        # Calculate weighted score
-        if weighted_max > 0:
-            score = weighted_matches / weighted_max
-        else:
-            score = 0.5
+        genre_weights = self._add_emoji_prior(genre_weights, genre_prior, self.genre_index.bit_of)
         
-        return score
+        weighted_max = sum(genre_weights.values())
+        if weighted_max <= 0:
+            return np.full(len(positions), 0.5)
+        
+        # Bit tests against the genre index; movies without genres score 0
+        return self.genre_index.weighted_matches(positions, genre_weights) / weighted_max
     
-    def _calculate_emotion_match(self, movie_row, predicted_emotions):
+    def _calculate_emotion_match(self, positions, predicted_emotions, emotion_prior=None):
         """
-        Calculate how well a movie's emotional content matches predicted emotions
+        Calculate how well movies' emotional content matches predicted emotions
         
         Args:
-            movie_row: DataFrame row with movie data
+            positions: Catalog positions of the movies to score
             predicted_emotions: List of predicted emotions
+            emotion_prior: Optional emotion -> probability mapping from the selected emojis
             
         Returns:
-            Score between 0 and 1
+            Array of scores between 0 and 1
         """
-        if not predicted_emotions:
-            return 0.5  # Neutral score if no predictions
-        
-        # Extract movie description or overview if available
-        movie_text = ""
-        for field in ['overview', 'description', 'summary', 'plot']:
-            if field in movie_row and isinstance(movie_row[field], str):
-                movie_text += movie_row[field] + " "
-        
-        movie_text = movie_text.lower()
-        
-        # Define emotion keywords dictionary
-        emotion_keywords = {
-            'Happy': ['happy', 'joy', 'uplifting', 'comedy', 'funny', 'humor', 'laugh', 'cheerful', 'fun'],
-            'Sad': ['sad', 'tragedy', 'drama', 'melancholy', 'grief', 'sorrow', 'tear', 'heartbreak'],
-            'Excited': ['exciting', 'thrill', 'adventure', 'action', 'suspense', 'adrenaline', 'intense'],
-            'Relaxed': ['calm', 'peaceful', 'gentle', 'soothing', 'meditation', 'slow-paced', 'easy'],
-            'Tense': ['tense', 'anxiety', 'fear', 'horror', 'thriller', 'paranoia', 'stress', 'nervous'],
-            'Romantic': ['romance', 'love', 'relationship', 'passion', 'date', 'attraction', 'wedding'],
-            'Nostalgic': ['nostalgia', 'memory', 'childhood', 'reminisce', 'past', 'history', 'retro'],
-            'Inspired': ['inspiration', 'motivational', 'triumph', 'success', 'achievement', 'overcome'],
-            'Fearful': ['fear', 'scary', 'horror', 'terrifying', 'creepy', 'nightmare', 'dread'],
-            'Calm': ['calm', 'serene', 'peaceful', 'tranquil', 'relaxed', 'gentle', 'quiet']
-        }
+        if not predicted_emotions and not emotion_prior:
+            return np.full(len(positions), 0.5)  # Neutral score if no predictions
+        
+        # Each predicted emotion counts once
+        emotion_weights = dict.fromkeys(predicted_emotions, 1.0)
+        emotion_weights = self._add_emoji_prior(emotion_weights, emotion_prior, self.emotion_features.column_of)
+        
+        # Weighted average of the normalized keyword match score of each emotion
+        scores = self.emotion_features.scores(positions, emotion_weights)
+        if scores is None:
+            return np.full(len(positions), 0.5)  # Default if no emotions matched
+        return scores
+    
+    def _add_emoji_prior(self, label_weights, prior, known_labels):
+        """
+        Add the emoji prior to the weights of the predicted labels
         
-        # Calculate emotion match score
-        total_score = 0
-        num_emotions = 0
-        
-        for emotion in predicted_emotions:
-            if emotion in emotion_keywords:
-                keywords = emotion_keywords[emotion]
-                matches = sum(1 for keyword in keywords if keyword in movie_text)
-                if keywords:
-                    # Calculate normalized score for this emotion
-                    emotion_score = min(1.0, matches / max(1, len(keywords) / 3))
-                    total_score += emotion_score
-                    num_emotions += 1
-        
-        # Return average score or default if no emotions matched
-        if num_emotions > 0:
-            return total_score / num_emotions
-        else:
-            return 0.5
+        Prior labels the catalog does not know are dropped and the rest
+        renormalized, so they never dilute the scores. The prior then gets
+        EMOJI_WEIGHT times the predicted labels' combined weight (all
+        of the weight when nothing was predicted), so it adjusts the
+        prediction instead of overriding it.
+        
+        Args:
+            label_weights: Dictionary of predicted label -> weight
+            prior: Optional label -> probability mapping from the selected emojis
+            known_labels: Labels present in the catalog
+            
+        Returns:
+            New dictionary of label -> weight
+        """
+        prior = {label: p for label, p in (prior or {}).items() if label in known_labels and p > 0}
+        prior_mass = sum(prior.values())
+        if prior_mass <= 0:
+            return label_weights
+        
+        predicted_weight = sum(label_weights.values())
+        prior_weight = config.EMOJI_WEIGHT * predicted_weight if predicted_weight > 0 else 1.0
+        weights = dict(label_weights)
+        for label, probability in prior.items():
+            weights[label] = weights.get(label, 0.0) + prior_weight * probability / prior_mass
+        return weights
     
-    def _calculate_metadata_relevance(self, df):
+    def _calculate_metadata_relevance(self, positions):
         """
         Calculate relevance scores based on movie metadata (recency, popularity)
         
         Args:
-            df: DataFrame with movies
+            positions: Catalog positions of the movies to score
             
-        Modifies:
-            Adds recency_score and popularity_score columns to the DataFrame
+        Returns:
+            Tuple of (recency score array, popularity score array); either is
+            None when the catalog has no such metadata
         """
-        # Calculate recency score if release_year is available
-        if 'release_year' in df.columns:
-            try:
-                # Convert to numeric and handle non-numeric values
-                df['release_year'] = pd.to_numeric(df['release_year'], errors='coerce')
-                
-                # Calculate recency score (normalize between 0 and 1)
-                current_year = pd.Timestamp.now().year
-                df['recency_score'] = df['release_year'].apply(
-                    lambda y: 0.5 if pd.isna(y) else min(1.0, max(0.0, (y - 1990) / (current_year - 1990)))
-                )
-            except Exception:
-                # If any error occurs, use default value
-                df['recency_score'] = 0.5
+        recency_scores = None
+        popularity_scores = None
+        
+        # Calculate recency score (normalize between 0 and 1) if release_year is available
+        if self._release_years is not None:
+            current_year = pd.Timestamp.now().year
+            years = self._release_years[positions]
+            recency_scores = np.where(
+                np.isnan(years), 0.5, np.clip((years - 1990) / (current_year - 1990), 0.0, 1.0)
+            )
+        
+        # Calculate popularity score (normalize between 0 and 1 by the candidates' maximum) if available
+        if self._popularity is not None:
+            values = self._popularity[positions]
+            max_val = np.nanmax(values) if len(values) and not np.isnan(values).all() else np.nan
+            if max_val > 0:
+                popularity_scores = np.where(np.isnan(values), 0.5, np.clip(values / max_val, 0.0, 1.0))
+            else:
+                popularity_scores = np.full(len(positions), 0.5)
+        
+        return recency_scores, popularity_scores
+    
+    def _prepare_ranking_features(self):
+        """Pull the catalog columns used for ranking into arrays once, so requests never touch the DataFrame"""
+        columns = self.movies_df.columns
+        # Genre bitmasks and inverted index, so genre scoring never parses strings
+        self.genre_index = GenreIndex(
+            self.movies_df['genres'] if 'genres' in columns else np.full(len(self.movies_df), None, dtype=object)
+        )
+        # Keyword matches of every movie, so emotion scoring is a column gather
+        self.emotion_features = EmotionFeatures(self.movies_df)
         
-        # Calculate popularity score if available
-        popularity_field = next((f for f in ['vote_count', 'popularity', 'vote_average'] 
-                               if f in df.columns), None)
+        self._release_years = None
+        if 'release_year' in columns:
+            self._release_years = pd.to_numeric(self.movies_df['release_year'], errors='coerce').to_numpy(np.float64)
         
+        self._popularity = None
+        popularity_field = next((f for f in ['vote_count', 'popularity', 'vote_average'] if f in columns), None)
         if popularity_field:
-            try:
-                # Convert to numeric and handle non-numeric values
-                df[popularity_field] = pd.to_numeric(df[popularity_field], errors='coerce')
-                
-                # Get max value for normalization
-                max_val = df[popularity_field].max()
-                
-                # Calculate popularity score (normalize between 0 and 1)
-                if max_val > 0:
-                    df['popularity_score'] = df[popularity_field].apply(
-                        lambda v: 0.5 if pd.isna(v) else min(1.0, max(0.0, v / max_val))
-                    )
-                else:
-                    df['popularity_score'] = 0.5
-            except Exception:
-                # If any error occurs, use default value
-                df['popularity_score'] = 0.5
\ No newline at end of file
+            self._popularity = pd.to_numeric(self.movies_df[popularity_field], errors='coerce').to_numpy(np.float64)
@@ -1,10 +1,12 @@
 import sys
 import os
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
 # Add project root to path to allow imports from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from utils.embedding_cache import EmbeddingCache
 
 
 class TextEmbedder:
@@ -12,19 +14,20 @@ class TextEmbedder:
     
     _instance = None
     
-    def __new__(cls, model_name=None):
+    def __new__(cls, model_name=None, backend=None):
         """Singleton pattern to avoid loading model multiple times"""
         if cls._instance is None:
             cls._instance = super(TextEmbedder, cls).__new__(cls)
             cls._instance.initialized = False
         return cls._instance
     
-    def __init__(self, model_name=None):
+    def __init__(self, model_name=None, backend=None):
         """
         Initialize the text embedder
         
         Args:
             model_name: Name of the sentence transformer model to use
+            backend: "torch" or "onnx" (defaults to config.EMBEDDING_BACKEND)
         """
         if self.initialized:
             return
@@ -32,13 +35,29 @@ class TextEmbedder:
         if model_name is None:
             model_name = config.SENTENCE_TRANSFORMER_MODEL
         
-        try:
-            self.model = SentenceTransformer(model_name)
-            self.initialized = True
-        except Exception as e:
-            print(f"Error loading sentence transformer model: {e}")
-            self.model = None
-            self.initialized = False
+        self.model_name = model_name
+        self.backend = backend or config.EMBEDDING_BACKEND
+        
+        self.model = None
+        if self.backend == "onnx":
+            try:
+                from models.onnx_encoder import OnnxSentenceEncoder
+                self.model = OnnxSentenceEncoder(config.ONNX_MODEL_DIR, quantized=config.ONNX_QUANTIZED,
+                                                 num_threads=config.ONNX_NUM_THREADS)
+            except Exception as e:
+                print(f"Error loading ONNX model, falling back to PyTorch: {e}")
+                self.backend = "torch"
+        
+        if self.model is None:
+            try:
+                self.model = SentenceTransformer(model_name)
+            except Exception as e:
+                print(f"Error loading sentence transformer model: {e}")
+                self.model = None
+        
+        # ONNX (especially int8) vectors differ slightly, so each backend gets its own cache entries
+        self.cache = EmbeddingCache(namespace=f"{model_name}:{self.backend}")
+        self.initialized = self.model is not None
     
     def get_embedding(self, text):
         """
@@ -48,7 +67,7 @@ class TextEmbedder:
             text: Text to generate embedding for
             
         Returns:
-            Embedding vector
+            Embedding vector as a read-only float32 NumPy array
         """
         if self.model is None:
             return None
@@ -56,9 +75,65 @@ class TextEmbedder:
         if not text:
             return None
         
+        embedding = self.cache.get(text)
+        if embedding is not None:
+            return embedding
+        
         try:
             embedding = self.model.encode(text)
-            return embedding.tolist()
+            return self.cache.put(text, embedding)
         except Exception as e:
             print(f"Error generating embedding: {e}")
-            return None
\ No newline at end of file
+            return None
+    
+    def get_embeddings(self, texts, batch_size=None, use_cache=True):
+        """
+        Generate embeddings for many texts with batched forward passes
+        
+        Args:
+            texts: List of texts to generate embeddings for
+            batch_size: Number of texts encoded per forward pass
+            use_cache: Whether to read and fill the embedding cache (bulk
+                catalog builds skip it so they do not evict hot entries)
+            
+        Returns:
+            float32 matrix with one row per text (zeros for empty texts),
+            or None if the model is unavailable
+        """
+        if self.model is None:
+            return None
+        
+        batch_size = batch_size or config.EMBEDDING_BATCH_SIZE
+        embeddings = np.zeros((len(texts), self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        
+        # Encode each distinct non-empty text that is not cached yet exactly once
+        pending = {}
+        for row, text in enumerate(texts):
+            if not text:
+                continue
+            cached = self.cache.get(text) if use_cache else None
+            if cached is not None:
+                embeddings[row] = cached
+            else:
+                pending.setdefault(text, []).append(row)
+        
+        if not pending:
+            return embeddings
+        
+        try:
+            unique_texts = list(pending)
+            encoded = self.model.encode(unique_texts, batch_size=batch_size, convert_to_numpy=True)
+        except Exception as e:
+            print(f"Error generating embeddings: {e}")
+            return None
+        
+        for text, embedding in zip(unique_texts, encoded):
+            embeddings[pending[text]] = embedding
+            if use_cache:
+                self.cache.put(text, embedding)
+        
+        return embeddings
+    
+    def cache_stats(self):
+        """Return hit/miss counters of the embedding cache"""
+        return self.cache.stats()
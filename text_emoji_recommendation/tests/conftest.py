@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Add project root to path so tests import modules the way the app does
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from utils.embedding_utils import normalize_embeddings, select_top_k, top_k_similar
+
+
+def full_sort(scores, top_n, threshold):
+    """Reference selection: full stable argsort, cut to top_n, then the threshold"""
+    order = np.argsort(-scores, kind='stable')[:max(top_n, 0)]
+    return order[scores[order] >= threshold]
+
+
+def assert_matches_full_sort(positions, scores, all_scores, top_n, threshold):
+    """
+    Check a selection against full_sort
+
+    Scores must match exactly in order. Among equal scores any row may be
+    picked, so positions are only compared where the score is unambiguous.
+    """
+    expected = full_sort(all_scores, top_n, threshold)
+    np.testing.assert_allclose(scores, all_scores[expected], rtol=0, atol=1e-6)
+    assert len(set(positions.tolist())) == len(positions)
+    np.testing.assert_allclose(all_scores[positions], scores, rtol=0, atol=1e-6)
+    if len(expected):
+        boundary = all_scores[expected[-1]]
+        assert set(expected[all_scores[expected] > boundary + 1e-6].tolist()) <= set(positions.tolist())
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+@pytest.fixture
+def catalog():
+    """Random rows plus repeated basis vectors, which give exactly tied scores"""
+    rng = np.random.default_rng(7)
+    random_rows = rng.normal(size=(500, 16))
+    tied_rows = np.tile(np.eye(16)[:4], (25, 1))
+    embeddings = np.vstack([random_rows, tied_rows])
+    rng.shuffle(embeddings)
+    return normalize_embeddings(embeddings.astype(np.float32))
+
+
+@pytest.mark.parametrize("top_n", [1, 5, 37, 599, 600, 1000])
+@pytest.mark.parametrize("threshold", [-1.0, 0.0, 0.3])
+def test_select_top_k_matches_full_sort(top_n, threshold):
+    rng = np.random.default_rng(top_n)
+    # Few distinct values, so the top_n boundary usually falls inside a run of ties
+    scores = rng.integers(-10, 10, size=600).astype(np.float32) / 10
+    positions = np.arange(len(scores)) + 1000
+
+    selected, selected_scores = select_top_k(positions, scores, top_n, threshold)
+    assert_matches_full_sort(selected - 1000, selected_scores, scores, top_n, threshold)
+
+
+def test_select_top_k_keeps_arrival_order_among_ties_when_all_fit():
+    scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1], dtype=np.float32)
+    positions, selected = select_top_k(np.arange(5), scores, 10, 0.0)
+    assert positions.tolist() == [1, 3, 0, 2, 4]
+    assert selected.tolist() == pytest.approx([0.9, 0.9, 0.5, 0.5, 0.1])
+
+
+@pytest.mark.parametrize("top_n", [0, -3])
+def test_select_top_k_with_nothing_to_keep(top_n):
+    positions, scores = select_top_k(np.arange(3), np.ones(3, dtype=np.float32), top_n, 0.0)
+    assert len(positions) == 0 and len(scores) == 0
+
+
+@pytest.mark.parametrize("num_shards", [1, 2, 3, 7, 64])
+@pytest.mark.parametrize("top_n", [1, 10, 100, 600, 1000])
+@pytest.mark.parametrize("threshold", [-1.0, 0.2])
+def test_top_k_similar_matches_full_sort(catalog, executor, num_shards, top_n, threshold):
+    query = np.random.default_rng(num_shards * top_n).normal(size=16)
+    # Make the tied basis-vector rows score highest so ties straddle the cut
+    query[:4] = np.abs(query[:4]) + 3
+    all_scores = catalog @ normalize_embeddings(query.astype(np.float32))
+
+    positions, scores = top_k_similar(catalog, query, top_n, threshold, num_shards=num_shards, executor=executor)
+    assert_matches_full_sort(positions, scores, all_scores, top_n, threshold)
+
+
+def test_top_k_similar_default_executor(catalog):
+    query = np.random.default_rng(0).normal(size=16)
+    all_scores = catalog @ normalize_embeddings(query.astype(np.float32))
+    positions, scores = top_k_similar(catalog, query, 50, 0.0, num_shards=4)
+    assert_matches_full_sort(positions, scores, all_scores, 50, 0.0)
+
+
+def test_top_k_similar_of_an_empty_catalog():
+    positions, scores = top_k_similar(np.empty((0, 0), dtype=np.float32), np.ones(16), 10, 0.0, num_shards=4)
+    assert len(positions) == 0 and len(scores) == 0
@@ -0,0 +1,140 @@
+import json
+
+import pytest
+
+from utils.json_parser import IncrementalJSONParser, parse_json_object
+
+RESPONSE = (
+    'Sure, here it is:\n```json\n'
+    '{"genres": ["Drama", "Sci-Fi"], "emotions": ["Happy"], '
+    '"overview": "A \\"quiet\\" caf\\u00e9, a \\\\ and \\ud83d\\ude00 {not a brace}, [nor a list]."}'
+    '\n```\nEnjoy!'
+)
+EXPECTED = {
+    "genres": ["Drama", "Sci-Fi"],
+    "emotions": ["Happy"],
+    "overview": 'A "quiet" café, a \\ and 😀 {not a brace}, [nor a list].',
+}
+
+
+def stream(text, chunk_size):
+    """Feed text in fixed-size chunks and return the parser"""
+    parser = IncrementalJSONParser()
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+    return parser
+
+
+def test_skips_prose_and_code_fences():
+    assert parse_json_object(RESPONSE) == EXPECTED
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_chunking_does_not_change_the_result(chunk_size):
+    parser = stream(RESPONSE, chunk_size)
+    assert parser.complete
+    assert parser.snapshot() == EXPECTED
+
+
+def test_every_prefix_matches_a_single_feed():
+    parser = IncrementalJSONParser()
+    for end in range(1, len(RESPONSE) + 1):
+        parser.feed(RESPONSE[end - 1])
+        whole = IncrementalJSONParser()
+        whole.feed(RESPONSE[:end])
+        assert parser.snapshot() == whole.snapshot(), RESPONSE[:end]
+
+
+def test_nothing_before_the_first_brace():
+    parser = IncrementalJSONParser()
+    parser.feed("The answer is")
+    assert parser.snapshot() is None
+    parser.feed(" {")
+    assert parser.snapshot() == {}
+
+
+def test_open_overview_is_reported_while_it_streams():
+    parser = IncrementalJSONParser()
+    parser.feed('{"genres": ["Comedy"], "overview": "Two friends')
+    assert parser.snapshot() == {"genres": ["Comedy"], "overview": "Two friends"}
+    parser.feed(' take a road trip')
+    assert parser.snapshot()["overview"] == "Two friends take a road trip"
+
+
+@pytest.mark.parametrize("split", ['\\', '\\u', '\\u00', '\\u00e'])
+def test_escape_split_across_chunks(split):
+    text = '{"overview": "caf\\u00e9 done"}'
+    head = text[:text.index("\\u00e9")] + split
+    parser = IncrementalJSONParser()
+    parser.feed(head)
+    assert parser.snapshot() == {"overview": "caf"}
+    parser.feed(text[len(head):])
+    assert parser.snapshot() == {"overview": "café done"}
+
+
+def test_surrogate_pair_is_held_back_until_complete():
+    parser = IncrementalJSONParser()
+    parser.feed('{"overview": "smile \\ud83d')
+    assert parser.snapshot() == {"overview": "smile "}
+    parser.feed('\\ude00 ok"}')
+    assert parser.snapshot() == {"overview": "smile 😀 ok"}
+
+
+def test_escaped_quote_does_not_end_the_string():
+    parser = IncrementalJSONParser()
+    parser.feed('{"overview": "say \\"hi\\", then')
+    assert parser.snapshot() == {"overview": 'say "hi", then'}
+    assert not parser.complete
+
+
+@pytest.mark.parametrize("truncated, expected", [
+    ('{"genres": ["Drama", "Com', {"genres": ["Drama"]}),
+    ('{"genres": ["Drama"], "emo', {"genres": ["Drama"]}),
+    ('{"genres": ["Drama"], "emotions"', {"genres": ["Drama"]}),
+    ('{"genres": ["Drama"], "emotions": [', {"genres": ["Drama"], "emotions": []}),
+    ('{"score": 12', {}),
+    ('{"score": 12, "flag": tr', {"score": 12}),
+    ('{"nested": {"a": [1, {"b": "c', {"nested": {"a": [1, {}]}}),
+])
+def test_truncated_members_are_dropped(truncated, expected):
+    parser = IncrementalJSONParser()
+    parser.feed(truncated)
+    assert parser.snapshot() == expected
+    assert parse_json_object(truncated) == expected
+
+
+def test_trailing_commas_are_tolerated():
+    assert parse_json_object('{"genres": ["Drama", "Comedy",], "emotions": ["Happy"],}') == {
+        "genres": ["Drama", "Comedy"], "emotions": ["Happy"]
+    }
+
+
+def test_text_after_the_object_is_ignored():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1} {"b": 2}')
+    assert parser.complete
+    assert parser.snapshot() == {"a": 1}
+
+
+def test_malformed_complete_object_is_none():
+    assert parse_json_object("{'genres': ['Drama']}") is None
+    assert parse_json_object("no json here") is None
+
+
+def test_snapshot_returns_a_copy():
+    parser = IncrementalJSONParser()
+    parser.feed('{"genres": ["Drama"], "overview": "x"}')
+    parser.snapshot()["overview"] = "changed"
+    assert parser.snapshot()["overview"] == "x"
+
+
+def test_full_parses_do_not_grow_with_the_number_of_chunks():
+    overview = " ".join(f"word{i}" for i in range(3000))
+    text = json.dumps({"genres": ["Drama", "Comedy"], "emotions": ["Happy"], "overview": overview})
+    parser = IncrementalJSONParser()
+    for start in range(0, len(text), 4):
+        parser.feed(text[start:start + 4])
+        parser.snapshot()
+    assert parser.snapshot() == json.loads(text)
+    # One parse per structural boundary, not per chunk
+    assert parser.parses <= 12
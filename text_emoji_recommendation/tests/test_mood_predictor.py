@@ -0,0 +1,66 @@
+import pytest
+
+import config
+from models.mood_predictor import MoodPredictor
+
+
+@pytest.fixture
+def predictor(monkeypatch):
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+    return MoodPredictor(api_url="http://localhost:1")
+
+
+@pytest.mark.parametrize("values, expected", [
+    (["drama", " COMEDY ", "Sci-fi"], ["Drama", "Comedy", "Sci-Fi"]),
+    (["Comedy", "comedy", "Drama", "COMEDY"], ["Comedy", "Drama"]),
+    (["Thriller", "Cyberpunk", "Drama"], ["Thriller", "Drama"]),
+    ("horror", ["Horror"]),
+    (["Cyberpunk", "Space Opera"], ["Drama"]),
+    ([], ["Drama"]),
+    (None, ["Drama"]),
+    ({"genre": "Comedy"}, ["Drama"]),
+    ([42, None, "Action"], ["Action"]),
+])
+def test_validate_labels(predictor, values, expected):
+    assert predictor._validate_labels(values, config.MOVIE_GENRES, "Drama") == expected
+
+
+def test_parse_prediction_keeps_vocabulary_labels(predictor):
+    response = ('Here you go: {"genres": ["comedy", "Space Western"], "emotions": ["HAPPY", "Giddy"], '
+                '"overview": "  A light road trip.  "}')
+    assert predictor._parse_prediction(response) == {
+        "genres": ["Comedy"],
+        "emotions": ["Happy"],
+        "overview": "A light road trip.",
+    }
+
+
+def test_parse_prediction_defaults_when_no_label_is_valid(predictor):
+    result = predictor._parse_prediction('{"genres": ["Cyberpunk"], "emotions": "Giddy"}')
+    assert result == {"genres": [config.DEFAULT_GENRE], "emotions": [config.DEFAULT_EMOTION]}
+
+
+@pytest.mark.parametrize("overview", ["", "   ", None, 12, ["a"]])
+def test_parse_prediction_drops_empty_or_non_string_overview(predictor, overview):
+    result = predictor._parse_prediction("", parsed={"genres": ["Drama"], "emotions": ["Calm"], "overview": overview})
+    assert "overview" not in result
+
+
+def test_parse_prediction_prefers_the_streamed_object(predictor):
+    result = predictor._parse_prediction('{"genres": ["Horror"]}', parsed={"genres": ["Romance"], "emotions": []})
+    assert result == {"genres": ["Romance"], "emotions": [config.DEFAULT_EMOTION]}
+
+
+def test_parse_prediction_of_a_truncated_response(predictor):
+    result = predictor._parse_prediction('{"genres": ["Action", "Thriller"], "emotions": ["Ten')
+    assert result == {"genres": ["Action", "Thriller"], "emotions": [config.DEFAULT_EMOTION]}
+
+
+def test_parse_prediction_falls_back_to_text_scan(predictor):
+    result = predictor._parse_prediction("I would suggest a Comedy or maybe Romance, something Happy.")
+    assert result == {"genres": ["Comedy", "Romance"], "emotions": ["Happy"]}
+
+
+def test_parse_prediction_of_unrelated_text_uses_defaults(predictor):
+    result = predictor._parse_prediction("Sorry, I cannot help with that.")
+    assert result == {"genres": [config.DEFAULT_GENRE], "emotions": [config.DEFAULT_EMOTION]}
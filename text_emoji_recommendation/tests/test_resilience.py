@@ -0,0 +1,190 @@
+import time
+import threading
+
+import pytest
+
+import config
+from models.mood_predictor import MoodPredictor
+from utils.resilience import AdmissionRejectedError, CircuitBreaker, ConcurrencyLimiter
+
+
+def wait_until(predicate, timeout=2.0):
+    """Poll until predicate() holds, failing the test if it never does"""
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "condition not reached"
+        time.sleep(0.001)
+
+
+def run_in_thread(func, *args):
+    """Run func in a thread and return (thread, results list holding its return value or exception)"""
+    results = []
+
+    def target():
+        try:
+            results.append(func(*args))
+        except Exception as exc:
+            results.append(exc)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(5)
+    return results
+
+
+def enqueue(limiter, served, priority, label):
+    """Start a thread that queues for a slot, records label once served and releases; wait until it is queued"""
+    depth = limiter.stats()["queue_depth"]
+
+    def worker():
+        limiter.acquire(priority)
+        served.append(label)
+        limiter.release()
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    wait_until(lambda: limiter.stats()["queue_depth"] == depth + 1)
+    return thread
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=10, max_wait=5)
+    limiter.acquire()
+    served = []
+    threads = [
+        enqueue(limiter, served, 5, "low"),
+        enqueue(limiter, served, 1, "high-1"),
+        enqueue(limiter, served, 3, "mid"),
+        enqueue(limiter, served, 1, "high-2"),
+    ]
+    limiter.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert served == ["high-1", "high-2", "mid", "low"]
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.admitted == 5
+
+
+def test_idle_slot_is_granted_without_queueing():
+    limiter = ConcurrencyLimiter(max_in_flight=2, max_queue=0, max_wait=0)
+    limiter.acquire()
+    assert limiter.has_idle_slot()
+    limiter.acquire()
+    assert not limiter.has_idle_slot()
+    assert limiter.stats()["in_flight"] == 2
+
+
+def test_full_queue_rejects_immediately():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, max_wait=5)
+    limiter.acquire()
+    served = []
+    thread = enqueue(limiter, served, 0, "queued")
+
+    start = time.monotonic()
+    with pytest.raises(AdmissionRejectedError):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.5
+    assert limiter.rejected_queue_full == 1
+
+    limiter.release()
+    thread.join(5)
+    assert served == ["queued"]
+    assert limiter.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("limiter_wait, call_wait", [(0.05, None), (5, 0.05), (0.05, 5)])
+def test_wait_timeout_rejects_and_leaves_the_queue(limiter_wait, call_wait):
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, max_wait=limiter_wait)
+    limiter.acquire()
+
+    start = time.monotonic()
+    with pytest.raises(AdmissionRejectedError):
+        limiter.acquire(max_wait=call_wait)
+    assert 0.04 <= time.monotonic() - start < 1.0
+    assert limiter.rejected_timeout == 1
+    assert limiter.stats()["queue_depth"] == 0
+
+    # The timed-out waiter must not be handed the slot
+    limiter.release()
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.has_idle_slot()
+
+
+def test_slot_context_manager_releases_on_error():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0, max_wait=0)
+    with pytest.raises(RuntimeError):
+        with limiter.slot():
+            raise RuntimeError("boom")
+    assert limiter.stats()["in_flight"] == 0
+
+
+def open_breaker(reset_timeout=0):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_threshold_and_refuses_calls():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_half_open_grants_one_trial_to_one_thread():
+    breaker = open_breaker()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert run_in_thread(breaker.allow_request) == [False]
+
+
+def test_release_trial_only_works_for_the_owner():
+    breaker = open_breaker()
+    assert breaker.allow_request()
+
+    run_in_thread(breaker.release_trial)
+    assert run_in_thread(breaker.allow_request) == [False]
+
+    breaker.release_trial()
+    assert run_in_thread(breaker.allow_request) == [True]
+
+
+def test_release_trial_without_a_trial_is_a_no_op():
+    breaker = open_breaker(reset_timeout=60)
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_trial_outcome_closes_or_reopens_the_circuit():
+    breaker = open_breaker()
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker = open_breaker()
+    assert breaker.allow_request()
+    breaker.reset_timeout = 60
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_rejected_admission_gives_back_the_trial(monkeypatch):
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+    predictor = MoodPredictor(api_url="http://localhost:1")
+    predictor.circuit_breaker = open_breaker()
+    predictor.limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=0, max_wait=0)
+    predictor.limiter.acquire()
+
+    with pytest.raises(AdmissionRejectedError):
+        predictor._admit()
+
+    # The trial never reached Ollama, so another caller may take it
+    assert run_in_thread(predictor.circuit_breaker.allow_request) == [True]
@@ -4,12 +4,12 @@ import streamlit as st
 import sys
 import os
 import pandas as pd
-import time
 
 # Add project root to path to allow imports from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
 from models.recommendation_engine import RecommendationEngine
+from models.prefetcher import SpeculativePrefetcher
 from ui.components.questionnaire import display_questionnaire
 from ui.components.emoji_selector import display_emoji_selector
 from ui.components.results_display import display_movie_recommendations
@@ -81,6 +81,12 @@ def setup_page():
     st.markdown("---")
 
 
+@st.cache_resource
+def get_recommendation_engine():
+    """Load the recommendation engine once and share it across sessions and reruns"""
+    return RecommendationEngine()
+
+
 def display_mood_summary(selected_emojis, responses):
     """Display a dynamic mood summary"""
     st.markdown("### Your Current Vibe Check ✨")
@@ -106,7 +112,7 @@ def main():
     setup_page()
     
     # Initialize recommendation engine
-    recommendation_engine = RecommendationEngine()
+    recommendation_engine = get_recommendation_engine()
     
     # Initialize session state for tracking app flow
     if 'app_stage' not in st.session_state:
@@ -118,6 +124,9 @@ def main():
     if 'predicted_genres' not in st.session_state:
         st.session_state.predicted_genres = None
     
+    if config.PREFETCH_ENABLED and 'prefetcher' not in st.session_state:
+        st.session_state.prefetcher = SpeculativePrefetcher(recommendation_engine)
+    
     # Handle different stages of the app
     if st.session_state.app_stage == 'input':
         # Create columns for layout
@@ -136,6 +145,10 @@ def main():
                 with st.sidebar:
                     display_mood_summary(selected_emojis, responses)
         
+        # Start the slow work on the answers given so far while the user keeps filling in the form
+        if config.PREFETCH_ENABLED and responses is None:
+            st.session_state.prefetcher.submit(st.session_state.questionnaire_draft, selected_emojis)
+        
         # Proceed to recommendations when form is submitted
         if responses is not None:
             st.session_state.responses = responses
@@ -144,42 +157,59 @@ def main():
             st.rerun()
     
     elif st.session_state.app_stage == 'generating':
-        # Display loading animation
+        # Display progress driven by the recommendation engine
         progress_bar = st.progress(0)
         status_text = st.empty()
+        overview_text = st.empty()
         
         status_text.text("🎭 Analyzing your mood...")
-        progress_bar.progress(25)
-        time.sleep(0.5)
+        progress_bar.progress(10)
         
-        status_text.text("🎬 Finding perfect movie matches...")
-        progress_bar.progress(50)
-        time.sleep(0.5)
+        def show_progress(stage, detail):
+            if stage == "overview":
+                # Story overview appears word by word while the model writes it
+                overview_text.markdown(f"📝 *{detail}*")
+                words = len(detail.split())
+                progress_bar.progress(10 + min(60, int(60 * words / config.STORY_OVERVIEW_MAX_WORDS)))
+            elif stage == "matching":
+                status_text.text("🎬 Finding perfect movie matches...")
+                progress_bar.progress(75)
+            elif stage == "ranking":
+                status_text.text("🎯 Calculating match scores...")
+                progress_bar.progress(90)
         
-        status_text.text("🎯 Calculating match scores...")
-        progress_bar.progress(75)
-        time.sleep(0.5)
+        # Let speculative work for these exact answers finish, so the request below is served from cache
+        if config.PREFETCH_ENABLED:
+            st.session_state.prefetcher.wait(st.session_state.responses, st.session_state.selected_emojis)
         
         # Generate recommendations and predicted genres
         recommendations, predicted_genres = recommendation_engine.generate_recommendations(
             st.session_state.responses,
-            st.session_state.selected_emojis
+            st.session_state.selected_emojis,
+            progress_callback=show_progress
         )
         
         # Store results in session state
         st.session_state.recommendations = recommendations
         st.session_state.predicted_genres = predicted_genres
+        st.session_state.degraded = recommendation_engine.last_degraded
+        # The full ranked list stays in the session, so further pages never rerun the pipeline
+        st.session_state.ranked_result = recommendation_engine.last_result
+        st.session_state.recommendation_page = 0
         st.session_state.app_stage = 'recommendations'
         
         status_text.text("✨ Ready! Preparing your recommendations...")
         progress_bar.progress(100)
-        time.sleep(0.5)
         st.rerun()
     
     elif st.session_state.app_stage == 'recommendations':
         # Display mood summary in main area
         display_mood_summary(st.session_state.selected_emojis, st.session_state.responses)
         
+        if st.session_state.get('degraded'):
+            st.warning("Our mood analysis is taking a break, so these picks are based on your own words only. "
+                       "Try again in a moment for fully personalized results.")
+        
         # Display predicted genres prominently
         if st.session_state.predicted_genres:
             st.markdown("### Predicted Genres Based on Your Mood")
@@ -190,17 +220,31 @@ def main():
             st.markdown("---")
         
         # Display recommendations
-        display_movie_recommendations(st.session_state.recommendations)
+        page = st.session_state.get('recommendation_page', 0)
+        display_movie_recommendations(
+            st.session_state.recommendations, start_rank=page * config.FINAL_RECOMMENDATIONS + 1
+        )
         
         # Display feedback collector
         feedback = display_feedback_collector()
         
-        # Option to start over with fun animation
-        if st.button("✨ Discover More Movies", type="primary", use_container_width=True):
-            # Reset session state
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
-            st.rerun()
+        col1, col2 = st.columns(2)
+        with col1:
+            # Next page of the ranked list kept in the session (degraded lists included)
+            ranked_result = st.session_state.get('ranked_result')
+            total = len(ranked_result["positions"]) if ranked_result else 0
+            has_more = (page + 1) * config.FINAL_RECOMMENDATIONS < total
+            if st.button("✨ Discover More Movies", type="primary", use_container_width=True, disabled=not has_more):
+                st.session_state.recommendation_page = page + 1
+                st.session_state.recommendations = recommendation_engine.result_page(ranked_result, page + 1)
+                st.rerun()
+        with col2:
+            # Option to start over with fun animation
+            if st.button("🔄 Start Over", use_container_width=True):
+                # Reset session state
+                for key in list(st.session_state.keys()):
+                    del st.session_state[key]
+                st.rerun()
 
 
 if __name__ == "__main__":
@@ -96,20 +96,23 @@ def display_questionnaire():
         height=100
     )
     
+    # Answers so far (time_available is fixed to "No time limit"); kept on every rerun so work can start early
+    st.session_state.questionnaire_draft = {
+        "surroundings": surroundings,
+        "location": location,
+        "lighting": lighting,
+        "companions": companions,
+        "time_available": "No time limit",  # Fixed value
+        "time_of_day": time_of_day,
+        "energy_level": energy_level,
+        "scene_visualization": scene_visualization,
+        "mood_description": mood_description
+    }
+    
     # Submit button with animation
     if st.button("🎬 Find My Perfect Movies", type="primary", use_container_width=True):
-        # Save all responses to session state (time_available is fixed to "No time limit")
-        st.session_state.questionnaire_responses = {
-            "surroundings": surroundings,
-            "location": location,
-            "lighting": lighting,
-            "companions": companions,
-            "time_available": "No time limit",  # Fixed value
-            "time_of_day": time_of_day,
-            "energy_level": energy_level,
-            "scene_visualization": scene_visualization,
-            "mood_description": mood_description
-        }
+        # Save all responses to session state
+        st.session_state.questionnaire_responses = dict(st.session_state.questionnaire_draft)
         
         # Add loading animation
         with st.spinner("Preparing your personalized recommendations..."):
@@ -9,12 +9,13 @@ import pandas as pd
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 
-def display_movie_recommendations(recommendations_df):
+def display_movie_recommendations(recommendations_df, start_rank=1):
     """
     Display movie recommendations in an enhanced, interactive format
     
     Args:
         recommendations_df: DataFrame with movie recommendations
+        start_rank: Rank of the first movie (pages after the first continue the numbering)
     """
     st.markdown("""
         <div style="text-align: center; margin: 2rem 0;">
@@ -29,11 +30,11 @@ def display_movie_recommendations(recommendations_df):
     
     # Ensure we show exactly 5 recommendations
     num_to_show = min(5, len(recommendations_df))
-    if num_to_show < 5:
+    if num_to_show < 5 and start_rank == 1:
         st.warning(f"Only {num_to_show} movies matched your criteria. Consider broadening your preferences.")
     
     # Display each recommendation with enhanced styling
-    for i, (_, movie) in enumerate(recommendations_df.head(5).iterrows(), 1):
+    for i, (_, movie) in enumerate(recommendations_df.head(5).iterrows(), start_rank):
         # Create a card for each movie
         st.markdown(f"""
             <div style="background: linear-gradient(45deg, #f6f8fc, #ffffff); 
@@ -0,0 +1,349 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.embedding_utils import normalize_embeddings, select_top_k, top_k_similar
+
+
+class ExactIndex:
+    """Brute-force search over the full normalized embedding matrix"""
+
+    def __init__(self, normalized_embeddings, num_shards=None):
+        """
+        Initialize the exact index
+
+        Args:
+            normalized_embeddings: Row-normalized float32 embedding matrix
+            num_shards: Number of shards searched in parallel (defaults to
+                config.SIMILARITY_NUM_SHARDS)
+        """
+        self.embeddings = normalized_embeddings
+        self.num_shards = num_shards
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    def search(self, query_embedding, top_n=50, threshold=0.6):
+        """
+        Find the most similar movies to the query embedding
+
+        Args:
+            query_embedding: The embedding to compare against
+            top_n: Number of top similar movies to return
+            threshold: Minimum similarity score to consider
+
+        Returns:
+            Tuple of (row positions, similarity scores), sorted by descending score
+        """
+        return top_k_similar(self.embeddings, query_embedding, top_n=top_n, threshold=threshold,
+                             num_shards=self.num_shards)
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index for approximate cosine similarity search
+
+    The catalog is clustered with spherical k-means. Each query only scans the
+    movies in the n_probe clusters whose centroids are closest to it, and those
+    candidates are scored exactly against the full-precision embeddings.
+    """
+
+    def __init__(self, centroids, list_offsets, list_positions, embeddings=None, n_probe=None):
+        """
+        Initialize the IVF index
+
+        Args:
+            centroids: Normalized cluster centroids, shape (n_lists, dim)
+            list_offsets: Start offset of each cluster in list_positions (length n_lists + 1)
+            list_positions: Catalog row positions grouped by cluster
+            embeddings: Row-normalized embedding matrix the positions refer to
+            n_probe: Number of clusters to scan per query
+        """
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_positions = list_positions
+        self.embeddings = embeddings
+        self.n_probe = n_probe or config.ANN_NUM_PROBES
+
+    def __len__(self):
+        return len(self.list_positions)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, normalized_embeddings, n_lists=None, n_iter=10, sample_size=None, seed=0,
+              chunk_size=65536):
+        """
+        Cluster the catalog embeddings and build the inverted lists
+
+        Args:
+            normalized_embeddings: Row-normalized float32 embedding matrix
+            n_lists: Number of clusters (defaults to 4 * sqrt(catalog size))
+            n_iter: Number of k-means iterations
+            sample_size: Number of movies used to train the centroids
+            seed: Random seed for reproducible builds
+            chunk_size: Rows assigned to clusters at a time, bounding memory use
+
+        Returns:
+            IVFIndex over the given embeddings
+        """
+        num_movies = len(normalized_embeddings)
+        if num_movies == 0:
+            raise ValueError("Cannot build an IVF index over an empty catalog")
+
+        n_lists = n_lists or config.ANN_NUM_LISTS or int(4 * np.sqrt(num_movies))
+        n_lists = max(1, min(n_lists, num_movies))
+        sample_size = min(num_movies, sample_size or 64 * n_lists)
+
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(normalized_embeddings[np.sort(rng.choice(num_movies, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        # Spherical k-means on the training sample
+        for _ in range(n_iter):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty clusters with random training points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = normalize_embeddings(sums)
+
+        # Assign every movie to its nearest centroid
+        assignments = np.empty(num_movies, dtype=np.int32)
+        for start in range(0, num_movies, chunk_size):
+            chunk = np.asarray(normalized_embeddings[start:start + chunk_size])
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+
+        list_positions = np.argsort(assignments, kind='stable').astype(np.int64)
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        return cls(centroids.astype(np.float32), list_offsets, list_positions, normalized_embeddings)
+
+    def search(self, query_embedding, top_n=50, threshold=0.6, n_probe=None):
+        """
+        Find approximately the most similar movies to the query embedding
+
+        Args:
+            query_embedding: The embedding to compare against
+            top_n: Number of top similar movies to return
+            threshold: Minimum similarity score to consider
+            n_probe: Number of clusters to scan (defaults to the index setting)
+
+        Returns:
+            Tuple of (row positions, similarity scores), sorted by descending score
+        """
+        if self.embeddings is None:
+            raise ValueError("IVF index has no embeddings attached")
+
+        query = normalize_embeddings(np.asarray(query_embedding).reshape(-1))
+        n_probe = max(1, min(n_probe or self.n_probe, self.n_lists))
+
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        candidates = np.concatenate([
+            self.list_positions[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes
+        ])
+        if len(candidates) == 0 or top_n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Sorted gather keeps reads from a memory-mapped matrix sequential
+        candidates.sort()
+        scores = self.embeddings[candidates] @ query
+        return select_top_k(candidates, scores, top_n, threshold)
+
+    def save(self, path, catalog_id=None):
+        """
+        Save the index structure (not the embeddings) to a .npz file
+
+        Args:
+            path: Output path
+            catalog_id: Identity of the catalog the index was built over (see catalog_identity)
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_positions=self.list_positions,
+            catalog_id=np.array(catalog_id or "")
+        )
+
+    @classmethod
+    def load(cls, path, embeddings, n_probe=None, catalog_id=None):
+        """
+        Load an index saved with save() and attach the catalog embeddings
+
+        Args:
+            path: Path of the .npz file
+            embeddings: Row-normalized embedding matrix the index was built over
+            n_probe: Number of clusters to scan per query
+            catalog_id: Identity of the loaded catalog; the index must have been built over it
+
+        Returns:
+            IVFIndex ready for search
+
+        Raises:
+            ValueError: If the index was built over a different catalog
+        """
+        with np.load(path) as data:
+            index = cls(data['centroids'], data['list_offsets'], data['list_positions'],
+                        embeddings, n_probe)
+            built_for = str(data['catalog_id']) if 'catalog_id' in data.files else ""
+        if catalog_id is not None and built_for != catalog_id:
+            raise ValueError(f"ANN index at {path} was built for a different catalog, rebuild it")
+        if len(index) != len(embeddings):
+            raise ValueError(f"ANN index at {path} covers {len(index)} movies, catalog has {len(embeddings)}")
+        return index
+
+
+def default_index_path():
+    """Location of the ANN index inside the catalog directory"""
+    return os.path.join(config.CATALOG_DIR, config.ANN_INDEX_FILE)
+
+
+def load_search_index(normalized_embeddings, index_path=None):
+    """
+    Choose the search index for a catalog
+
+    Catalogs of at least config.ANN_MIN_CATALOG_SIZE movies use the prebuilt
+    IVF index. Otherwise, when config.CATALOG_QUANTIZATION is set and codes
+    have been built, the quantized index is used; everything else falls back
+    to exact search.
+
+    Args:
+        normalized_embeddings: Row-normalized float32 embedding matrix
+        index_path: Path of a prebuilt IVF index
+
+    Returns:
+        ExactIndex, IVFIndex or QuantizedIndex
+    """
+    from utils.quantization import codes_path, load_quantized_index
+    from utils.data_processor import catalog_identity
+
+    index_path = index_path or default_index_path()
+    if len(normalized_embeddings) >= config.ANN_MIN_CATALOG_SIZE and os.path.exists(index_path):
+        try:
+            return IVFIndex.load(index_path, normalized_embeddings, catalog_id=catalog_identity())
+        except Exception as e:
+            print(f"Error loading ANN index, using exact search: {e}")
+
+    if config.CATALOG_QUANTIZATION and os.path.exists(codes_path(config.CATALOG_QUANTIZATION)):
+        try:
+            return load_quantized_index(codes_path(config.CATALOG_QUANTIZATION), normalized_embeddings,
+                                        catalog_id=catalog_identity())
+        except Exception as e:
+            print(f"Error loading quantized codes, using exact search: {e}")
+
+    return ExactIndex(normalized_embeddings)
+
+
+def evaluate_index(index, normalized_embeddings, queries, top_n=None, threshold=None):
+    """
+    Compare an approximate index against exact search
+
+    Args:
+        index: Index with a search(query, top_n, threshold) method
+        normalized_embeddings: Row-normalized embedding matrix for exact search
+        queries: Matrix of query embeddings
+        top_n: Number of results per query (defaults to config.TOP_N_SIMILARITY)
+        threshold: Minimum similarity (defaults to config.SIMILARITY_THRESHOLD)
+
+    Returns:
+        Dictionary with mean recall@k and latency percentiles in milliseconds
+    """
+    top_n = top_n or config.TOP_N_SIMILARITY
+    threshold = config.SIMILARITY_THRESHOLD if threshold is None else threshold
+    exact = ExactIndex(normalized_embeddings)
+
+    recalls = []
+    exact_latencies = []
+    index_latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        exact_positions, _ = exact.search(query, top_n, threshold)
+        exact_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        index_positions, _ = index.search(query, top_n, threshold)
+        index_latencies.append(time.perf_counter() - start)
+
+        if len(exact_positions) > 0:
+            found = np.intersect1d(exact_positions, index_positions).size
+            recalls.append(found / len(exact_positions))
+
+    exact_ms = np.array(exact_latencies) * 1000
+    index_ms = np.array(index_latencies) * 1000
+    return {
+        "queries": len(queries),
+        "top_n": top_n,
+        "threshold": threshold,
+        "recall_at_k": float(np.mean(recalls)) if recalls else 1.0,
+        "exact_p50_ms": float(np.percentile(exact_ms, 50)),
+        "exact_p95_ms": float(np.percentile(exact_ms, 95)),
+        "index_p50_ms": float(np.percentile(index_ms, 50)),
+        "index_p95_ms": float(np.percentile(index_ms, 95)),
+    }
+
+
+def sample_queries(normalized_embeddings, num_queries=200, noise=0.05, seed=0):
+    """Draw perturbed catalog embeddings to use as evaluation queries"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(normalized_embeddings), min(num_queries, len(normalized_embeddings)), replace=False)
+    queries = np.asarray(normalized_embeddings[np.sort(rows)])
+    queries = queries + rng.normal(0, noise, queries.shape).astype(np.float32)
+    return normalize_embeddings(queries)
+
+
+def main():
+    """Command-line entry point for building and evaluating the ANN index"""
+    from utils.data_processor import load_movie_catalog, catalog_identity
+
+    parser = argparse.ArgumentParser(description="Build or evaluate the IVF index over the movie catalog")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build the index and save it next to the catalog")
+    build_parser.add_argument("--lists", type=int, default=config.ANN_NUM_LISTS, help="Number of clusters")
+    build_parser.add_argument("--iterations", type=int, default=10, help="k-means iterations")
+    build_parser.add_argument("--out", default=default_index_path(), help="Output path")
+
+    report_parser = subparsers.add_parser("report", help="Recall@k and latency against exact search")
+    report_parser.add_argument("--index", default=default_index_path(), help="Index path")
+    report_parser.add_argument("--queries", type=int, default=200, help="Number of sampled queries")
+    report_parser.add_argument("--top-n", type=int, default=config.TOP_N_SIMILARITY)
+    report_parser.add_argument("--threshold", type=float, default=config.SIMILARITY_THRESHOLD)
+    report_parser.add_argument("--probes", type=int, nargs="+", default=[config.ANN_NUM_PROBES],
+                               help="n_probe values to compare")
+    args = parser.parse_args()
+
+    _, embeddings = load_movie_catalog()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = IVFIndex.build(embeddings, n_lists=args.lists, n_iter=args.iterations)
+        index.save(args.out, catalog_identity())
+        print(f"Built IVF index with {index.n_lists} lists over {len(index)} movies "
+              f"in {time.perf_counter() - start:.1f}s -> {args.out}")
+    else:
+        index = IVFIndex.load(args.index, embeddings, catalog_id=catalog_identity())
+        queries = sample_queries(embeddings, args.queries)
+        for n_probe in args.probes:
+            index.n_probe = n_probe
+            report = evaluate_index(index, embeddings, queries, args.top_n, args.threshold)
+            print(f"n_probe={n_probe:4d}  recall@{report['top_n']}={report['recall_at_k']:.3f}  "
+                  f"exact p50/p95={report['exact_p50_ms']:.2f}/{report['exact_p95_ms']:.2f}ms  "
+                  f"ivf p50/p95={report['index_p50_ms']:.2f}/{report['index_p95_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
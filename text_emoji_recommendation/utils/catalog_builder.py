@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.catalog_store import catalog_paths, write_catalog_manifest, replace_catalog_dir, EMBEDDING_COLUMN
+from utils.embedding_utils import normalize_embeddings
+
+CHECKPOINT_FILE = "build_checkpoint.json"
+
+
+def _staging_dir(catalog_dir):
+    """Directory the catalog is built in before it replaces the live one"""
+    return catalog_dir.rstrip(os.sep) + ".building"
+
+
+def _read_checkpoint(staging_dir):
+    """Load the build checkpoint, or None when there is nothing to resume"""
+    path = os.path.join(staging_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_checkpoint(staging_dir, checkpoint):
+    """Atomically replace the build checkpoint"""
+    path = os.path.join(staging_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def movie_texts(chunk, text_column='overview'):
+    """Text embedded for each movie: its overview, or its title when the overview is missing"""
+    texts = chunk[text_column] if text_column in chunk.columns else pd.Series("", index=chunk.index)
+    if 'movie_name' in chunk.columns:
+        texts = texts.where(texts.notna() & (texts.astype(str).str.strip() != ""), chunk['movie_name'])
+    return texts.fillna("").astype(str).tolist()
+
+
+def build_catalog_embeddings(embedder, csv_path=None, catalog_dir=None, chunk_size=10000, batch_size=256,
+                             text_column='overview', resume=True):
+    """
+    Embed every movie overview and write the binary catalog as a restartable batch job
+
+    The CSV is streamed in chunks and each chunk is encoded in large batches
+    straight into a memory-mapped .npy file in a staging directory. After
+    every chunk a checkpoint records how many rows are done, so an
+    interrupted build resumes where it stopped. The finished catalog
+    replaces the live one in a single directory swap; indexes built over the
+    old embeddings (ANN index, quantized codes) are dropped with it and need
+    to be rebuilt.
+
+    Args:
+        embedder: TextEmbedder (or any object with get_embeddings and a model name)
+        csv_path: Path of the movies CSV
+        catalog_dir: Directory of the catalog to (re)build
+        chunk_size: Number of movies read and checkpointed at a time
+        batch_size: Number of texts per forward pass
+        text_column: Column holding the text to embed
+        resume: Whether to continue a matching interrupted build
+
+    Returns:
+        Path of the written manifest file
+    """
+    csv_path = csv_path or config.MOVIES_CSV_PATH
+    catalog_dir = catalog_dir or config.CATALOG_DIR
+    staging_dir = _staging_dir(catalog_dir)
+    embeddings_path, metadata_path, _ = catalog_paths(staging_dir)
+
+    checkpoint = _read_checkpoint(staging_dir) if resume else None
+    source_mtime = os.path.getmtime(csv_path)
+    if checkpoint is not None and (checkpoint.get("source") != csv_path
+                                   or checkpoint.get("source_mtime") != source_mtime
+                                   or checkpoint.get("model") != embedder.model_name):
+        print("Existing checkpoint is for a different source or model, starting over")
+        checkpoint = None
+
+    if checkpoint is None:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        # First pass: the slim metadata table (also gives the row count)
+        metadata_df = pd.concat(
+            [chunk.drop(columns=[EMBEDDING_COLUMN], errors='ignore')
+             for chunk in pd.read_csv(csv_path, chunksize=chunk_size)],
+            ignore_index=True
+        )
+        metadata_df.to_pickle(metadata_path)
+
+        probe = embedder.get_embeddings(["probe"], use_cache=False)
+        if probe is None:
+            raise RuntimeError("Embedding model is not available")
+
+        checkpoint = {
+            "source": csv_path,
+            "source_mtime": source_mtime,
+            "model": embedder.model_name,
+            "num_movies": len(metadata_df),
+            "embedding_dim": int(probe.shape[1]),
+            "rows_done": 0
+        }
+        matrix = np.lib.format.open_memmap(
+            embeddings_path, mode='w+', dtype=np.float32,
+            shape=(checkpoint["num_movies"], checkpoint["embedding_dim"])
+        )
+        _write_checkpoint(staging_dir, checkpoint)
+    else:
+        print(f"Resuming build at row {checkpoint['rows_done']} of {checkpoint['num_movies']}")
+        matrix = np.lib.format.open_memmap(embeddings_path, mode='r+')
+
+    rows_done = resumed_from = checkpoint["rows_done"]
+    rows_read = 0
+    start_time = time.perf_counter()
+    reader = pd.read_csv(csv_path, chunksize=chunk_size, usecols=lambda c: c in (text_column, 'movie_name'))
+
+    for chunk in reader:
+        # Skip rows embedded by a previous run (quoted overviews may span lines,
+        # so rows are counted by the parser rather than skipped as raw lines)
+        rows_read += len(chunk)
+        if rows_read <= rows_done:
+            continue
+        chunk = chunk.iloc[len(chunk) - (rows_read - rows_done):]
+
+        texts = movie_texts(chunk, text_column)
+        embeddings = embedder.get_embeddings(texts, batch_size=batch_size, use_cache=False)
+        if embeddings is None:
+            raise RuntimeError(f"Embedding failed at row {rows_done}")
+
+        matrix[rows_done:rows_done + len(texts)] = normalize_embeddings(embeddings)
+        matrix.flush()
+        rows_done += len(texts)
+        checkpoint["rows_done"] = rows_done
+        _write_checkpoint(staging_dir, checkpoint)
+
+        rate = (rows_done - resumed_from) / max(time.perf_counter() - start_time, 1e-9)
+        print(f"Embedded {rows_done}/{checkpoint['num_movies']} movies ({rate:.0f}/s)")
+
+    if rows_done != checkpoint["num_movies"]:
+        raise RuntimeError(f"Source has {rows_done} rows, expected {checkpoint['num_movies']}")
+    del matrix
+
+    write_catalog_manifest(staging_dir, checkpoint["num_movies"], checkpoint["embedding_dim"],
+                           source=csv_path, model=embedder.model_name)
+    os.remove(os.path.join(staging_dir, CHECKPOINT_FILE))
+
+    # Swap the finished catalog in; processes that still map the old files keep working
+    replace_catalog_dir(staging_dir, catalog_dir)
+
+    return catalog_paths(catalog_dir)[2]
+
+
+def main():
+    """Command-line entry point for (re)building the catalog embeddings"""
+    from models.text_embedder import TextEmbedder
+
+    parser = argparse.ArgumentParser(description="Embed movie overviews into the binary catalog format")
+    parser.add_argument("--csv", default=config.MOVIES_CSV_PATH, help="Path of the movies CSV")
+    parser.add_argument("--out", default=config.CATALOG_DIR, help="Catalog output directory")
+    parser.add_argument("--model", default=config.SENTENCE_TRANSFORMER_MODEL, help="Sentence transformer model")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Movies per checkpoint")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per forward pass")
+    parser.add_argument("--text-column", default="overview", help="Column holding the text to embed")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start over")
+    args = parser.parse_args()
+
+    embedder = TextEmbedder(args.model)
+    manifest_path = build_catalog_embeddings(
+        embedder, args.csv, args.out, args.chunk_size, args.batch_size, args.text_column, resume=not args.restart
+    )
+    print(f"Catalog written to {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
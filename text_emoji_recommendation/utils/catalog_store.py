@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.embedding_utils import normalize_embeddings, parse_embedding_column
+
+CATALOG_FORMAT_VERSION = 1
+EMBEDDING_COLUMN = 'overview_embedding'
+
+
+def catalog_paths(catalog_dir):
+    """Return the (embeddings, metadata, manifest) file paths of a catalog directory"""
+    return (
+        os.path.join(catalog_dir, config.CATALOG_EMBEDDINGS_FILE),
+        os.path.join(catalog_dir, config.CATALOG_METADATA_FILE),
+        os.path.join(catalog_dir, config.CATALOG_MANIFEST_FILE)
+    )
+
+
+def catalog_exists(catalog_dir=None):
+    """Check whether a complete binary catalog is present in the given directory"""
+    catalog_dir = catalog_dir or config.CATALOG_DIR
+    return all(os.path.exists(path) for path in catalog_paths(catalog_dir))
+
+
+def save_catalog(metadata_df, embeddings, catalog_dir=None, source=None):
+    """
+    Write a binary catalog: a float32 embedding matrix plus a slim metadata table
+
+    Embeddings are L2-normalized before they are written, so similarity search
+    can use the memory-mapped matrix directly without an in-memory copy. The
+    files are written to a staging directory that then replaces catalog_dir,
+    so readers never see a half-written catalog; indexes in the replaced
+    directory are dropped with it.
+
+    Args:
+        metadata_df: DataFrame with one row per movie (without the embedding column)
+        embeddings: Array of shape (num_movies, embedding_dim)
+        catalog_dir: Directory to write the catalog to
+        source: Optional description of where the catalog was built from
+
+    Returns:
+        Path of the written manifest file
+    """
+    catalog_dir = catalog_dir or config.CATALOG_DIR
+    embeddings = np.ascontiguousarray(normalize_embeddings(embeddings))
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(metadata_df):
+        raise ValueError(
+            f"Embedding matrix shape {embeddings.shape} does not match {len(metadata_df)} movies"
+        )
+
+    staging_dir = catalog_dir.rstrip(os.sep) + ".writing"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    embeddings_path, metadata_path, _ = catalog_paths(staging_dir)
+
+    metadata_df = metadata_df.drop(columns=[EMBEDDING_COLUMN], errors='ignore').reset_index(drop=True)
+    np.save(embeddings_path, embeddings)
+    metadata_df.to_pickle(metadata_path)
+    write_catalog_manifest(staging_dir, embeddings.shape[0], embeddings.shape[1], source)
+
+    replace_catalog_dir(staging_dir, catalog_dir)
+    return catalog_paths(catalog_dir)[2]
+
+
+def replace_catalog_dir(staging_dir, catalog_dir):
+    """
+    Swap a completely written catalog directory in place of the live one
+
+    Readers see either the old catalog, the new one, or (between the two
+    renames) no catalog at all, never a mix of both; processes that still
+    map the old files keep working.
+
+    Args:
+        staging_dir: Directory holding the finished catalog
+        catalog_dir: Live catalog directory to replace
+    """
+    previous_dir = catalog_dir.rstrip(os.sep) + ".previous"
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(catalog_dir):
+        os.replace(catalog_dir, previous_dir)
+    os.replace(staging_dir, catalog_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+
+def catalog_checksum(catalog_dir, block_size=1 << 23):
+    """
+    Checksum of a catalog's embedding and metadata files
+
+    Indexes built over a catalog store it, so they are never used with a
+    rebuilt catalog, even one with the same number of movies.
+
+    Args:
+        catalog_dir: Directory containing the catalog files
+        block_size: Bytes read at a time
+
+    Returns:
+        Hex digest
+    """
+    embeddings_path, metadata_path, _ = catalog_paths(catalog_dir)
+    digest = hashlib.sha256()
+    for path in (embeddings_path, metadata_path):
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def write_catalog_manifest(catalog_dir, num_movies, embedding_dim, source=None, model=None):
+    """
+    Write the manifest that marks a catalog directory as complete
+
+    The embedding and metadata files must already be written, since the
+    manifest records their checksum.
+
+    Args:
+        catalog_dir: Directory containing the catalog files
+        num_movies: Number of rows in the embedding matrix and metadata table
+        embedding_dim: Embedding dimension
+        source: Optional description of where the catalog was built from
+        model: Name of the model that produced the (normalized) embeddings
+
+    Returns:
+        Path of the written manifest file
+    """
+    _, _, manifest_path = catalog_paths(catalog_dir)
+    manifest = {
+        "format_version": CATALOG_FORMAT_VERSION,
+        "num_movies": int(num_movies),
+        "embedding_dim": int(embedding_dim),
+        "dtype": "float32",
+        "normalized": True,
+        "model": model or config.SENTENCE_TRANSFORMER_MODEL,
+        "source": source,
+        "checksum": catalog_checksum(catalog_dir),
+        "created_at": datetime.now().isoformat(timespec='seconds')
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest_path
+
+
+def load_catalog_manifest(catalog_dir=None):
+    """Load the manifest describing a binary catalog"""
+    catalog_dir = catalog_dir or config.CATALOG_DIR
+    _, _, manifest_path = catalog_paths(catalog_dir)
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def load_catalog(catalog_dir=None, mmap=True):
+    """
+    Load a binary catalog
+
+    The embedding matrix is memory-mapped read-only by default, so loading is
+    near-instant regardless of catalog size and the pages are shared by every
+    process that maps the same file.
+
+    Args:
+        catalog_dir: Directory containing the catalog
+        mmap: Whether to memory-map the embedding matrix instead of reading it
+
+    Returns:
+        Tuple of (metadata DataFrame, row-normalized float32 embedding matrix)
+    """
+    catalog_dir = catalog_dir or config.CATALOG_DIR
+    embeddings_path, metadata_path, _ = catalog_paths(catalog_dir)
+
+    # A catalog swapped in while the files are read (see replace_catalog_dir) is a new directory; read again
+    for _ in range(3):
+        directory_id = os.stat(catalog_dir).st_ino
+        manifest = load_catalog_manifest(catalog_dir)
+        if manifest.get("format_version") != CATALOG_FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog format version: {manifest.get('format_version')}")
+
+        embeddings = np.load(embeddings_path, mmap_mode='r' if mmap else None)
+        metadata_df = pd.read_pickle(metadata_path)
+        if os.stat(catalog_dir).st_ino == directory_id:
+            break
+    else:
+        raise ValueError(f"Catalog in {catalog_dir} kept changing while it was loaded")
+
+    if embeddings.shape != (manifest["num_movies"], manifest["embedding_dim"]) or \
+            len(metadata_df) != embeddings.shape[0]:
+        raise ValueError(f"Catalog in {catalog_dir} is inconsistent with its manifest")
+
+    if not manifest.get("normalized", False):
+        embeddings = normalize_embeddings(embeddings)
+
+    return metadata_df, embeddings
+
+
+def convert_csv_to_catalog(csv_path=None, catalog_dir=None, chunksize=10000):
+    """
+    Convert the movies CSV with JSON embeddings into the binary catalog format
+
+    Args:
+        csv_path: Path of the movies CSV
+        catalog_dir: Directory to write the catalog to
+        chunksize: Number of CSV rows parsed at a time
+
+    Returns:
+        Path of the written manifest file
+    """
+    csv_path = csv_path or config.MOVIES_CSV_PATH
+    catalog_dir = catalog_dir or config.CATALOG_DIR
+
+    metadata_chunks = []
+    embedding_chunks = []
+    embedding_dim = None
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        if EMBEDDING_COLUMN not in chunk.columns:
+            raise ValueError(f"{csv_path} has no '{EMBEDDING_COLUMN}' column")
+        matrix, embedding_dim = parse_embedding_column(chunk[EMBEDDING_COLUMN], embedding_dim)
+        embedding_chunks.append(matrix)
+        metadata_chunks.append(chunk.drop(columns=[EMBEDDING_COLUMN]))
+
+    if not metadata_chunks:
+        raise ValueError(f"{csv_path} contains no movies")
+
+    metadata_df = pd.concat(metadata_chunks, ignore_index=True)
+    embeddings = np.vstack(embedding_chunks)
+
+    return save_catalog(metadata_df, embeddings, catalog_dir, source=csv_path)
+
+
+def main():
+    """Command-line entry point for converting the movies CSV"""
+    parser = argparse.ArgumentParser(description="Convert the movies CSV into the binary catalog format")
+    parser.add_argument("--csv", default=config.MOVIES_CSV_PATH, help="Path of the movies CSV")
+    parser.add_argument("--out", default=config.CATALOG_DIR, help="Catalog output directory")
+    parser.add_argument("--chunksize", type=int, default=10000, help="CSV rows parsed at a time")
+    args = parser.parse_args()
+
+    manifest_path = convert_csv_to_catalog(args.csv, args.out, args.chunksize)
+    manifest = load_catalog_manifest(args.out)
+    print(f"Wrote {manifest['num_movies']} movies x {manifest['embedding_dim']} dims to {manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
 import json
@@ -7,6 +8,11 @@ from datetime import datetime
 # Add project root to path to allow imports from other modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from utils.catalog_store import (
+    catalog_exists, catalog_paths, load_catalog, load_catalog_manifest, EMBEDDING_COLUMN
+)
+from utils.embedding_utils import normalize_embeddings, parse_embedding_column
+from utils.genre_index import GenreIndex
 
 
 def load_movies_data():
@@ -23,6 +29,54 @@ def load_movies_data():
         return pd.DataFrame()
 
 
+def load_movie_catalog():
+    """
+    Load movie metadata together with the overview embedding matrix
+
+    Prefers the memory-mapped binary catalog in config.CATALOG_DIR and falls
+    back to parsing the JSON embeddings in the movies CSV.
+
+    Returns:
+        Tuple of (movies DataFrame without the embedding column,
+        row-normalized float32 embedding matrix)
+    """
+    if catalog_exists(config.CATALOG_DIR):
+        try:
+            return load_catalog(config.CATALOG_DIR)
+        except Exception as e:
+            print(f"Error loading binary catalog, falling back to CSV: {e}")
+
+    try:
+        movies_df = pd.read_csv(config.MOVIES_CSV_PATH)
+        embeddings, _ = parse_embedding_column(movies_df[EMBEDDING_COLUMN])
+        return movies_df.drop(columns=[EMBEDDING_COLUMN]), normalize_embeddings(embeddings)
+    except Exception as e:
+        print(f"Error loading movies data: {e}")
+        return pd.DataFrame(), np.zeros((0, 0), dtype=np.float32)
+
+
+def catalog_identity():
+    """
+    Identify the catalog load_movie_catalog serves
+
+    Prebuilt indexes store this value and are rejected when it changes, since
+    their positions refer to the catalog they were built over.
+
+    Returns:
+        The binary catalog's checksum (its creation time for older manifests),
+        or the size and modification time of the movies CSV
+    """
+    try:
+        if catalog_exists(config.CATALOG_DIR):
+            manifest = load_catalog_manifest(config.CATALOG_DIR)
+            return manifest.get("checksum") or f"created:{manifest.get('created_at')}"
+        stat = os.stat(config.MOVIES_CSV_PATH)
+        return f"csv:{stat.st_size}:{stat.st_mtime_ns}"
+    except Exception as e:
+        print(f"Error identifying the movie catalog: {e}")
+        return None
+
+
 def load_emoji_data():
     """Load the emoji dataset"""
     try:
@@ -40,16 +94,38 @@ def parse_genres(genre_string):
     return genre_string.split('|')
 
 
-def extract_genres_from_dataframe():
-    """Extract all unique genres from the movies dataframe"""
-    movies_df = load_movies_data()
-    all_genres = []
-    
-    for genre_str in movies_df['genres'].dropna():
-        genres = parse_genres(genre_str)
-        all_genres.extend(genres)
-    
-    return sorted(list(set(all_genres)))
+def load_genre_column():
+    """
+    Load only the genre strings of the catalog
+
+    Reads the binary catalog's metadata table when present, otherwise just
+    the 'genres' column of the movies CSV (embeddings are never parsed).
+
+    Returns:
+        Object array of pipe-separated genre strings, aligned with catalog positions
+    """
+    try:
+        if catalog_exists(config.CATALOG_DIR):
+            _, metadata_path, _ = catalog_paths(config.CATALOG_DIR)
+            return pd.read_pickle(metadata_path)['genres'].to_numpy(dtype=object)
+        return pd.read_csv(config.MOVIES_CSV_PATH, usecols=['genres'])['genres'].to_numpy(dtype=object)
+    except Exception as e:
+        print(f"Error loading movie genres: {e}")
+        return np.empty(0, dtype=object)
+
+
+def extract_genres_from_dataframe(movies_df=None):
+    """
+    Extract all unique genres from the movies dataframe
+
+    Args:
+        movies_df: Already loaded movies DataFrame (when omitted, only the genre column is read)
+
+    Returns:
+        Sorted list of genres
+    """
+    genre_strings = movies_df['genres'] if movies_df is not None else load_genre_column()
+    return GenreIndex(genre_strings).genres
 
 
 def create_directory_if_not_exists(directory_path):
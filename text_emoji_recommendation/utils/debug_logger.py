@@ -24,7 +24,7 @@ def save_similarity_filtered_data(filtered_df):
     
     # Save only necessary columns
     output_df = filtered_df[['movie_id', 'movie_name', 'year', 'genres', 
-                             'overview', 'similarity_score']].copy()
+                             'overview', 'similarity_score']]
     
     output_df.to_csv(output_file, index=False)
     return output_file
@@ -47,7 +47,7 @@ def save_genre_filtered_data(filtered_df):
     # Save only necessary columns
     output_df = filtered_df[['movie_id', 'movie_name', 'year', 'genres', 
                              'overview', 'similarity_score', 'genre_match_score', 
-                             'final_score']].copy()
+                             'final_score']]
     
     output_df.to_csv(output_file, index=False)
     return output_file
\ No newline at end of file
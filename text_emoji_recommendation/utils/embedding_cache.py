@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed embedding cache with an in-memory LRU tier and an
+    optional sqlite tier that survives restarts
+
+    Cached vectors are float32 NumPy arrays marked read-only, so a hit can be
+    handed out without copying.
+    """
+
+    def __init__(self, namespace="", max_bytes=None, db_path=None, max_disk_entries=None):
+        """
+        Initialize the embedding cache
+
+        Args:
+            namespace: Prefix mixed into every key (e.g. the model name), so
+                embeddings from different models never collide
+            max_bytes: Size limit of the in-memory tier in bytes
+            db_path: Path of the sqlite file for the on-disk tier (None disables it)
+            max_disk_entries: Entry limit of the on-disk tier
+        """
+        self.namespace = namespace
+        self.max_bytes = config.EMBEDDING_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_disk_entries = max_disk_entries or config.EMBEDDING_CACHE_DISK_MAX_ENTRIES
+
+        self._entries = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        db_path = db_path if db_path is not None else config.EMBEDDING_CACHE_DB_PATH
+        self._db = self._open_db(db_path) if db_path else None
+
+    def _open_db(self, db_path):
+        """Open (and create if needed) the sqlite tier"""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            db.commit()
+            return db
+        except Exception as e:
+            print(f"Error opening embedding cache database: {e}")
+            return None
+
+    def key(self, text):
+        """Content hash of the text within this cache's namespace"""
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, text):
+        """
+        Look up the embedding of a text
+
+        Args:
+            text: Text that was embedded
+
+        Returns:
+            Read-only float32 array, or None on a miss
+        """
+        key = self.key(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+            if self._db is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    embedding = np.frombuffer(row[0], dtype=np.float32)
+                    self._store_in_memory(key, embedding)
+                    self.disk_hits += 1
+                    return embedding
+
+            self.misses += 1
+            return None
+
+    def put(self, text, embedding):
+        """
+        Store the embedding of a text in both tiers
+
+        Args:
+            text: Text that was embedded
+            embedding: Embedding vector
+
+        Returns:
+            The cached read-only float32 array
+        """
+        key = self.key(text)
+        embedding = np.array(embedding, dtype=np.float32).reshape(-1)
+        embedding.setflags(write=False)
+
+        with self._lock:
+            self._store_in_memory(key, embedding)
+            if self._db is not None:
+                self._store_on_disk(key, embedding)
+        return embedding
+
+    def _store_in_memory(self, key, embedding):
+        """Insert into the LRU tier and evict least recently used entries over the size limit"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size_bytes -= previous.nbytes
+        if embedding.nbytes > self.max_bytes:
+            return
+
+        self._entries[key] = embedding
+        self._size_bytes += embedding.nbytes
+        while self._size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _store_on_disk(self, key, embedding):
+        """Write to the sqlite tier, trimming the oldest entries now and then"""
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                (key, embedding.tobytes(), time.time())
+            )
+            self._disk_writes += 1
+            if self._disk_writes % 1000 == 0:
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+            self._db.commit()
+        except Exception as e:
+            print(f"Error writing embedding cache database: {e}")
+
+    def clear(self):
+        """Drop every cached embedding from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Cache counters for monitoring
+
+        Returns:
+            Dictionary with hit/miss counts, hit rate and tier sizes
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -1,6 +1,20 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.metrics.pairwise import cosine_similarity
 
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+_search_executor = None
+_search_executor_lock = threading.Lock()
+
 
 def calculate_cosine_similarity(vec1, vec2):
     """Calculate cosine similarity between two vectors"""
@@ -12,7 +26,188 @@ def calculate_cosine_similarity(vec1, vec2):
     return cosine_similarity(vec1, vec2)[0][0]
 
 
-def find_similar_movies(movies_df, query_embedding, top_n=50, threshold=0.6):
+def parse_embedding_column(embedding_series, embedding_dim=None):
+    """
+    Stack a column of JSON-encoded (or list) embeddings into a float32 matrix
+
+    Args:
+        embedding_series: Series of JSON strings or lists
+        embedding_dim: Expected embedding dimension (inferred when None)
+
+    Returns:
+        Tuple of (float32 matrix, embedding dimension); rows without a valid
+        embedding are left as zeros
+    """
+    vectors = []
+    for value in embedding_series:
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                value = None
+        if not isinstance(value, (list, tuple, np.ndarray)) or len(value) == 0:
+            value = None
+        vectors.append(value)
+
+    if embedding_dim is None:
+        embedding_dim = next((len(v) for v in vectors if v is not None), 0)
+
+    matrix = np.zeros((len(vectors), embedding_dim), dtype=np.float32)
+    for row, vector in enumerate(vectors):
+        if vector is not None and len(vector) == embedding_dim:
+            matrix[row] = vector
+
+    return matrix, embedding_dim
+
+
+def normalize_embeddings(embeddings):
+    """
+    L2-normalize embeddings so cosine similarity becomes a plain dot product
+    
+    Args:
+        embeddings: A single vector or a matrix with one embedding per row
+    
+    Returns:
+        float32 array of the same shape; all-zero rows are left as zeros
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def select_top_k(positions, scores, top_n, threshold):
+    """
+    Pick the top_n highest-scoring candidates that meet the threshold
+    
+    Args:
+        positions: Array of candidate row positions
+        scores: Array of candidate similarity scores
+        top_n: Number of candidates to keep
+        threshold: Minimum similarity score to consider
+    
+    Returns:
+        Tuple of (row positions, similarity scores), sorted by descending score
+    """
+    if top_n <= 0 or np.size(scores) == 0 or np.size(positions) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    
+    # Partial selection of the top_n candidates, then sort only those
+    if top_n < len(scores):
+        keep = np.argpartition(-scores, top_n - 1)[:top_n]
+        positions, scores = positions[keep], scores[keep]
+    order = np.argsort(-scores, kind='stable')
+    positions, scores = positions[order], scores[order]
+    mask = scores >= threshold
+    
+    return positions[mask], scores[mask]
+
+
+def get_search_executor():
+    """Return the process-wide thread pool used for sharded similarity search"""
+    global _search_executor
+    with _search_executor_lock:
+        if _search_executor is None:
+            workers = config.SIMILARITY_SEARCH_WORKERS or os.cpu_count() or 1
+            _search_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="similarity-shard")
+        return _search_executor
+
+
+def _search_shard(normalized_embeddings, query, start, end, top_n, threshold):
+    """Score one contiguous shard of the catalog and return its local top_n"""
+    scores = normalized_embeddings[start:end] @ query
+    positions, scores = select_top_k(np.arange(len(scores)), scores, top_n, threshold)
+    return positions + start, scores
+
+
+def top_k_similar(normalized_embeddings, query_embedding, top_n=50, threshold=0.6, num_shards=None,
+                  executor=None):
+    """
+    Score every movie with one matrix-vector product and select the top matches
+    
+    With more than one shard the matrix is split into contiguous row ranges that
+    are scored in parallel on a thread pool (the BLAS product releases the GIL),
+    and the per-shard top_n lists are merged into the global top_n.
+    
+    Args:
+        normalized_embeddings: Row-normalized float32 matrix (see normalize_embeddings)
+        query_embedding: The embedding to compare against
+        top_n: Number of top similar movies to return
+        threshold: Minimum similarity score to consider
+        num_shards: Number of shards (defaults to config.SIMILARITY_NUM_SHARDS)
+        executor: Executor for the shard searches (defaults to get_search_executor())
+    
+    Returns:
+        Tuple of (row positions, similarity scores), sorted by descending score
+    """
+    num_movies = len(normalized_embeddings)
+    if num_movies == 0 or top_n <= 0:
+        # Empty catalog (e.g. the (0, 0) matrix of a failed load): nothing to score
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    
+    query = normalize_embeddings(np.asarray(query_embedding).reshape(-1))
+    num_shards = max(1, min(num_shards or config.SIMILARITY_NUM_SHARDS, num_movies))
+    
+    if num_shards == 1:
+        return _search_shard(normalized_embeddings, query, 0, num_movies, top_n, threshold)
+    
+    executor = executor or get_search_executor()
+    bounds = np.linspace(0, num_movies, num_shards + 1, dtype=np.int64)
+    futures = [
+        executor.submit(_search_shard, normalized_embeddings, query, start, end, top_n, threshold)
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    results = [future.result() for future in futures]
+    
+    positions = np.concatenate([shard_positions for shard_positions, _ in results])
+    scores = np.concatenate([shard_scores for _, shard_scores in results])
+    return select_top_k(positions, scores, top_n, threshold)
+
+
+def benchmark_sharded_search(normalized_embeddings, shard_counts, num_queries=100, top_n=100, threshold=0.0,
+                             concurrency=1, seed=0):
+    """
+    Measure similarity search throughput for different shard counts
+    
+    Args:
+        normalized_embeddings: Row-normalized float32 embedding matrix
+        shard_counts: Iterable of shard counts to compare
+        num_queries: Number of random queries per shard count
+        top_n: Number of results per query
+        threshold: Minimum similarity score to consider
+        concurrency: Number of queries issued at the same time, as with
+            several concurrent sessions
+        seed: Random seed for the queries
+    
+    Returns:
+        List of dictionaries with queries per second and mean latency per shard count
+    """
+    rng = np.random.default_rng(seed)
+    queries = rng.normal(size=(num_queries, normalized_embeddings.shape[1])).astype(np.float32)
+    
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        for num_shards in shard_counts:
+            def run_query(query):
+                start = time.perf_counter()
+                top_k_similar(normalized_embeddings, query, top_n, threshold, num_shards=num_shards)
+                return time.perf_counter() - start
+            
+            # Warm-up so thread start-up and page faults are not measured
+            run_query(queries[0])
+            start = time.perf_counter()
+            latencies = list(clients.map(run_query, queries))
+            elapsed = time.perf_counter() - start
+            results.append({
+                "num_shards": num_shards,
+                "queries_per_second": num_queries / elapsed,
+                "mean_latency_ms": 1000 * float(np.mean(latencies)),
+            })
+    return results
+
+
+def find_similar_movies(movies_df, query_embedding, top_n=50, threshold=0.6, embeddings=None,
+                        normalized=False, index=None, num_shards=None):
     """
     Find movies with similar overview embeddings to the query embedding
     
@@ -21,37 +216,56 @@ def find_similar_movies(movies_df, query_embedding, top_n=50, threshold=0.6):
         query_embedding: The embedding to compare against
         top_n: Number of top similar movies to return
         threshold: Minimum similarity score to consider
+        embeddings: Optional embedding matrix aligned with the rows of movies_df,
+            used instead of the 'overview_embedding' column
+        normalized: Whether the embedding matrix is already row-normalized
+        index: Optional search index (see utils/ann_index.py) used instead of
+            scanning the embedding matrix
+        num_shards: Number of shards for the parallel scan (defaults to
+            config.SIMILARITY_NUM_SHARDS)
     
     Returns:
         DataFrame with similar movies and similarity scores
     """
-    # Ensure query_embedding is the right shape
-    query_embedding = np.array(query_embedding).reshape(1, -1)
+    if index is not None:
+        positions, scores = index.search(query_embedding, top_n=top_n, threshold=threshold)
+        return movies_df.iloc[positions].assign(similarity_score=scores)
     
-    # Calculate similarity for each movie
-    similarities = []
-    for idx, row in movies_df.iterrows():
-        movie_embedding = row['overview_embedding']
-        if movie_embedding is not None and len(movie_embedding) > 0:
-            try:
-                similarity = calculate_cosine_similarity(query_embedding, movie_embedding)
-                similarities.append((idx, similarity))
-            except:
-                similarities.append((idx, 0))
-        else:
-            similarities.append((idx, 0))
+    if embeddings is None:
+        embeddings, _ = parse_embedding_column(movies_df['overview_embedding'])
+        normalized = False
+    
+    if not normalized:
+        embeddings = normalize_embeddings(embeddings)
     
-    # Sort by similarity score
-    similarities.sort(key=lambda x: x[1], reverse=True)
+    positions, scores = top_k_similar(embeddings, query_embedding, top_n=top_n, threshold=threshold,
+                                      num_shards=num_shards)
     
-    # Get indices of top similar movies that meet threshold
-    top_indices = [idx for idx, score in similarities if score >= threshold][:top_n]
+    return movies_df.iloc[positions].assign(similarity_score=scores)
+
+
+def main():
+    """Command-line entry point for the sharded search benchmark"""
+    from utils.data_processor import load_movie_catalog
     
-    # Create result dataframe
-    result_df = movies_df.loc[top_indices].copy()
+    parser = argparse.ArgumentParser(description="Benchmark sharded similarity search throughput")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8], help="Shard counts to compare")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per shard count")
+    parser.add_argument("--concurrency", type=int, default=1, help="Queries in flight at the same time")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Benchmark a random catalog of this many movies instead of the real one")
+    args = parser.parse_args()
     
-    # Add similarity scores
-    similarity_scores = [score for idx, score in similarities if idx in top_indices]
-    result_df['similarity_score'] = similarity_scores
+    if args.synthetic:
+        embeddings = normalize_embeddings(np.random.default_rng(0).normal(size=(args.synthetic, 384)))
+    else:
+        _, embeddings = load_movie_catalog()
     
-    return result_df.sort_values('similarity_score', ascending=False)
\ No newline at end of file
+    print(f"{len(embeddings)} movies, {os.cpu_count()} CPUs, concurrency {args.concurrency}")
+    for result in benchmark_sharded_search(embeddings, args.shards, args.queries, concurrency=args.concurrency):
+        print(f"shards={result['num_shards']:3d}  {result['queries_per_second']:8.1f} queries/s  "
+              f"mean latency {result['mean_latency_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.embedding_utils import normalize_embeddings
+
+
+def emoji_texts(emoji_df):
+    """
+    Texts embedded for each emoji: its name plus its sub-group
+
+    Args:
+        emoji_df: DataFrame with 'name' and 'sub_group' columns
+
+    Returns:
+        List of strings, one per row
+    """
+    sub_groups = emoji_df['sub_group'] if 'sub_group' in emoji_df.columns else [""] * len(emoji_df)
+    return [
+        f"Feeling {name}" + (f" ({str(sub_group).replace('-', ' ')})" if isinstance(sub_group, str) else "")
+        for name, sub_group in zip(emoji_df['name'], sub_groups)
+    ]
+
+
+def _softmax(scores, temperature):
+    """Row-wise softmax of cosine scores"""
+    logits = (scores - scores.max(axis=1, keepdims=True)) / temperature
+    weights = np.exp(logits)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def build_emoji_vectors(embedder, emoji_df, genre_texts, emotion_texts, temperature=None):
+    """
+    Map every emoji to a probability vector over the genre and emotion vocabularies
+
+    Args:
+        embedder: TextEmbedder (or any object with get_embeddings)
+        emoji_df: DataFrame with 'emoji', 'name' and 'sub_group' columns
+        genre_texts: Dictionary of genre label -> text describing it
+        emotion_texts: Dictionary of emotion label -> text describing it
+        temperature: Softmax temperature over cosine similarities
+
+    Returns:
+        Tuple of (emoji array, label array, float16 matrix of shape (emojis, genres + emotions));
+        the genre and emotion parts of every row each sum to 1
+    """
+    temperature = temperature or config.EMOJI_VECTOR_TEMPERATURE
+    emoji_df = emoji_df.dropna(subset=['emoji', 'name']).drop_duplicates(subset='emoji')
+
+    labels = list(genre_texts) + list(emotion_texts)
+    prototypes = normalize_embeddings(embedder.get_embeddings(list(genre_texts.values()) +
+                                                              list(emotion_texts.values())))
+    queries = normalize_embeddings(embedder.get_embeddings(emoji_texts(emoji_df)))
+    scores = queries @ prototypes.T
+
+    num_genres = len(genre_texts)
+    vectors = np.hstack([
+        _softmax(scores[:, :num_genres], temperature),
+        _softmax(scores[:, num_genres:], temperature)
+    ])
+    return np.asarray(emoji_df['emoji'], dtype=str), np.asarray(labels, dtype=str), vectors.astype(np.float16)
+
+
+def save_emoji_vectors(path, emojis, labels, vectors):
+    """Write the emoji matrix as a compressed .npz file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.savez_compressed(path, emojis=emojis, labels=labels, vectors=vectors)
+
+
+class EmojiVectors:
+    """
+    Precomputed emoji -> genre/emotion vectors, combined into a prior at request time
+    """
+
+    def __init__(self, emojis, labels, vectors):
+        """
+        Initialize from the arrays written by save_emoji_vectors
+
+        Args:
+            emojis: Array of emoji characters, one per row
+            labels: Array of genre and emotion labels, one per column
+            vectors: Matrix of shape (emojis, labels)
+        """
+        self.row_of = {emoji: i for i, emoji in enumerate(emojis)}
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+        # Labels that are no longer in the vocabularies are ignored
+        labels = list(labels)
+        self.genres = [label for label in config.MOVIE_GENRES if label in labels]
+        self.emotions = [label for label in config.MOVIE_EMOTIONS if label in labels]
+        self.genre_columns = np.array([labels.index(label) for label in self.genres], dtype=np.intp)
+        self.emotion_columns = np.array([labels.index(label) for label in self.emotions], dtype=np.intp)
+
+    @classmethod
+    def load(cls, path):
+        """Load the matrix written by save_emoji_vectors"""
+        with np.load(path) as data:
+            return cls(data['emojis'], data['labels'], data['vectors'])
+
+    def prior(self, selected_emojis):
+        """
+        Genre and emotion prior of an emoji selection
+
+        Args:
+            selected_emojis: List of selected emoji data (dictionaries with an 'emoji' key)
+
+        Returns:
+            Dictionary with 'genres' and 'emotions' label -> probability mappings,
+            or None if none of the emojis is known
+        """
+        rows = [self.row_of[e['emoji']] for e in selected_emojis or [] if e.get('emoji') in self.row_of]
+        if not rows:
+            return None
+
+        mean = self.vectors[rows].mean(axis=0)
+        return {
+            "genres": dict(zip(self.genres, mean[self.genre_columns].tolist())),
+            "emotions": dict(zip(self.emotions, mean[self.emotion_columns].tolist())),
+        }
+
+
+def load_emoji_vectors(path=None):
+    """
+    Load the precomputed emoji matrix
+
+    Args:
+        path: Path of the .npz file (defaults to config.EMOJI_VECTORS_FILE)
+
+    Returns:
+        EmojiVectors, or None if the file does not exist or cannot be read
+    """
+    path = path or config.EMOJI_VECTORS_FILE
+    if not os.path.exists(path):
+        print(f"No emoji vectors at {path}, sending emojis to the LLM instead")
+        return None
+    try:
+        return EmojiVectors.load(path)
+    except Exception as e:
+        print(f"Error loading emoji vectors: {e}")
+        return None
+
+
+def main():
+    """Command-line entry point for building the emoji -> genre/emotion matrix"""
+    from models.text_embedder import TextEmbedder
+    from models.fast_mood_predictor import GENRE_DESCRIPTIONS, EMOTION_DESCRIPTIONS
+
+    parser = argparse.ArgumentParser(description="Precompute emoji genre/emotion vectors")
+    parser.add_argument("--emoji-csv", default=config.EMOJI_CSV_PATH)
+    parser.add_argument("--out", default=config.EMOJI_VECTORS_FILE)
+    parser.add_argument("--temperature", type=float, default=config.EMOJI_VECTOR_TEMPERATURE)
+    parser.add_argument("--show", default="", help="Space-separated emojis whose top labels are printed")
+    args = parser.parse_args()
+
+    genre_texts = {genre: f"{genre} movie: {GENRE_DESCRIPTIONS.get(genre, genre)}" for genre in config.MOVIE_GENRES}
+    emotion_texts = {emotion: f"{emotion} mood: {EMOTION_DESCRIPTIONS.get(emotion, emotion)}"
+                     for emotion in config.MOVIE_EMOTIONS}
+
+    emojis, labels, vectors = build_emoji_vectors(
+        TextEmbedder(), pd.read_csv(args.emoji_csv), genre_texts, emotion_texts, args.temperature
+    )
+    save_emoji_vectors(args.out, emojis, labels, vectors)
+    print(f"Wrote {vectors.shape[0]} emojis x {vectors.shape[1]} labels "
+          f"({os.path.getsize(args.out) / 1024:.0f} KiB) to {args.out}")
+
+    emoji_vectors = EmojiVectors(emojis, labels, vectors)
+    for emoji in args.show.split():
+        prior = emoji_vectors.prior([{"emoji": emoji}])
+        if prior is None:
+            continue
+        top = [sorted(prior[kind].items(), key=lambda item: -item[1])[:3] for kind in ("genres", "emotions")]
+        print(emoji, "  ".join(f"{label} {p:.2f}" for label, p in top[0] + top[1]))
+
+
+if __name__ == "__main__":
+    main()
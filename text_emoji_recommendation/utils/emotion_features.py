@@ -0,0 +1,181 @@
+import os
+import re
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Text fields searched for emotion keywords, in the order they are concatenated
+EMOTION_TEXT_FIELDS = ['overview', 'description', 'summary', 'plot']
+
+
+class EmotionKeywordMatcher:
+    """
+    Single-pass multi-keyword matcher producing per-emotion keyword counts
+
+    Counts follow plain substring semantics: an emotion's count is the number
+    of its keywords that occur anywhere in the lowercased text. One compiled
+    regex with a lookahead tries every text position once and reports the
+    longest keyword starting there; keywords contained in a found keyword
+    (e.g. 'fun' in 'funny') are added from a precomputed closure.
+    """
+
+    def __init__(self, emotion_keywords=None):
+        """
+        Compile the matcher
+
+        Args:
+            emotion_keywords: Dictionary of emotion -> list of keywords (defaults to config.EMOTION_KEYWORDS)
+        """
+        emotion_keywords = emotion_keywords or config.EMOTION_KEYWORDS
+        self.emotions = list(emotion_keywords)
+        self.keywords = sorted({keyword.lower() for keywords in emotion_keywords.values() for keyword in keywords},
+                               key=lambda keyword: (-len(keyword), keyword))
+        self.keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+
+        # keyword x emotion incidence; a keyword listed twice for one emotion counts twice, as before
+        self.incidence = np.zeros((len(self.keywords), len(self.emotions)), dtype=np.uint8)
+        for j, emotion in enumerate(self.emotions):
+            for keyword in emotion_keywords[emotion]:
+                self.incidence[self.keyword_index[keyword.lower()], j] += 1
+
+        # Every keyword implies the keywords it contains
+        self.implied = [
+            [self.keyword_index[other] for other in self.keywords if other in keyword]
+            for keyword in self.keywords
+        ]
+        # Longest alternatives first, so the lookahead reports the longest keyword at each position
+        self.pattern = re.compile("(?=(" + "|".join(re.escape(keyword) for keyword in self.keywords) + "))")
+
+    def keyword_hits(self, text):
+        """
+        Indices of the keywords occurring in a text
+
+        Args:
+            text: Lowercased text
+
+        Returns:
+            Set of indices into self.keywords
+        """
+        hits = set()
+        for found in {match.group(1) for match in self.pattern.finditer(text)}:
+            hits.update(self.implied[self.keyword_index[found]])
+        return hits
+
+    def emotion_counts(self, texts, chunk_size=10000):
+        """
+        Count matching keywords per emotion for many texts
+
+        Args:
+            texts: Iterable of lowercased texts
+            chunk_size: Rows processed per chunk (bounds the temporary keyword matrix)
+
+        Returns:
+            uint8 matrix of shape (texts, emotions)
+        """
+        texts = list(texts)
+        counts = np.zeros((len(texts), len(self.emotions)), dtype=np.uint8)
+        for start in range(0, len(texts), chunk_size):
+            chunk = texts[start:start + chunk_size]
+            present = np.zeros((len(chunk), len(self.keywords)), dtype=np.uint8)
+            for i, text in enumerate(chunk):
+                present[i, list(self.keyword_hits(text))] = 1
+            counts[start:start + len(chunk)] = present @ self.incidence
+        return counts
+
+
+def movie_emotion_texts(movies_df):
+    """
+    Lowercased text searched for emotion keywords, one per movie
+
+    Args:
+        movies_df: DataFrame with any of the EMOTION_TEXT_FIELDS columns
+
+    Returns:
+        List of strings aligned with the rows of movies_df
+    """
+    columns = [movies_df[field].to_numpy(dtype=object) for field in EMOTION_TEXT_FIELDS if field in movies_df.columns]
+    if not columns:
+        return [""] * len(movies_df)
+    return [" ".join(text for text in texts if isinstance(text, str)).lower() for texts in zip(*columns)]
+
+
+class EmotionFeatures:
+    """
+    Movies x emotions keyword count matrix, computed once per catalog
+    """
+
+    def __init__(self, movies_df, emotion_keywords=None):
+        """
+        Match every movie's text against the emotion keywords
+
+        Args:
+            movies_df: Catalog DataFrame
+            emotion_keywords: Dictionary of emotion -> list of keywords (defaults to config.EMOTION_KEYWORDS)
+        """
+        emotion_keywords = emotion_keywords or config.EMOTION_KEYWORDS
+        matcher = EmotionKeywordMatcher(emotion_keywords)
+        self.emotions = matcher.emotions
+        self.column_of = {emotion: j for j, emotion in enumerate(self.emotions)}
+        self.counts = matcher.emotion_counts(movie_emotion_texts(movies_df))
+        # Matching a third of an emotion's keywords gives the full score
+        self.saturation = np.array(
+            [max(1, len(emotion_keywords[emotion]) / 3) for emotion in self.emotions], dtype=np.float32
+        )
+
+    def scores(self, positions, emotion_weights):
+        """
+        Weighted mean of the normalized keyword match scores of some emotions
+
+        Args:
+            positions: Catalog positions of the movies to score
+            emotion_weights: Dictionary of emotion -> weight; unknown emotions are ignored
+
+        Returns:
+            Array of scores between 0 and 1, or None if no weighted emotion is known
+        """
+        emotion_weights = {
+            emotion: weight for emotion, weight in emotion_weights.items()
+            if emotion in self.column_of and weight > 0
+        }
+        if not emotion_weights:
+            return None
+
+        columns = np.array([self.column_of[emotion] for emotion in emotion_weights], dtype=np.intp)
+        weights = np.array(list(emotion_weights.values()), dtype=np.float64)
+        matched = np.minimum(1.0, self.counts[positions][:, columns] / self.saturation[columns])
+        return matched @ weights / weights.sum()
+
+
+def main():
+    """Command-line entry point: build the catalog's emotion features and check them against substring scans"""
+    from utils.data_processor import load_movie_catalog
+
+    parser = argparse.ArgumentParser(description="Build and verify the movie emotion keyword matrix")
+    parser.add_argument("--verify", type=int, default=2000, help="Movies checked against the naive scan")
+    args = parser.parse_args()
+
+    movies_df, _ = load_movie_catalog()
+    start = time.perf_counter()
+    features = EmotionFeatures(movies_df)
+    elapsed = time.perf_counter() - start
+    print(f"{features.counts.shape[0]} movies x {features.counts.shape[1]} emotions in {elapsed:.2f}s "
+          f"({features.counts.nbytes / 1024:.0f} KiB)")
+
+    texts = movie_emotion_texts(movies_df.iloc[:args.verify])
+    start = time.perf_counter()
+    expected = np.array([
+        [sum(1 for keyword in config.EMOTION_KEYWORDS[emotion] if keyword in text) for emotion in features.emotions]
+        for text in texts
+    ], dtype=np.uint8).reshape(len(texts), len(features.emotions))
+    naive = time.perf_counter() - start
+    mismatches = int((expected != features.counts[:len(texts)]).any(axis=1).sum())
+    print(f"naive scan of {len(texts)} movies: {naive:.2f}s, mismatching rows: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_OVERVIEW = (
+    "After a long week, two old friends rent a creaky cabin by the lake and stumble onto a decades-old "
+    "mystery. Between late-night talks, burnt dinners and a missing diary, they rediscover what made them "
+    "inseparable, and learn that some secrets are worth keeping just a little longer."
+)
+CANNED_PREDICTION = {
+    "genres": ["Drama", "Mystery", "Comedy"],
+    "emotions": ["Nostalgic", "Relaxed"],
+    "overview": CANNED_OVERVIEW
+}
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Handler for POST /api/generate that mimics Ollama's response format"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, so client connection pooling is exercised
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client dropped the connection, e.g. after cutting a stream short
+            pass
+
+    def do_POST(self):
+        settings = self.server.settings
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        with self.server.stats_lock:
+            self.server.stats["requests"] += 1
+
+        # Failure injection
+        if random.random() < settings["hang_rate"]:
+            time.sleep(settings["hang_seconds"])
+        if random.random() < settings["failure_rate"]:
+            with self.server.stats_lock:
+                self.server.stats["failures"] += 1
+            self._send_json(503, {"error": "injected failure"})
+            return
+
+        time.sleep(max(0.0, random.gauss(settings["latency_ms"], settings["jitter_ms"])) / 1000.0)
+
+        text = json.dumps(CANNED_PREDICTION) if payload.get("format") == "json" else CANNED_OVERVIEW
+        model = payload.get("model", "fake")
+        if payload.get("stream", True):
+            self._stream(model, text, settings["token_delay_ms"] / 1000.0)
+        else:
+            self._send_json(200, {"model": model, "response": text, "done": True})
+
+    def _send_json(self, status, data):
+        """Send a complete JSON response"""
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, model, text, token_delay):
+        """Send the text as NDJSON chunks of roughly one word each, like Ollama's streaming mode"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        tokens = text.split(" ")
+        try:
+            for i, token in enumerate(tokens):
+                time.sleep(token_delay)
+                self._write_chunk({"model": model, "response": token + (" " if i < len(tokens) - 1 else ""),
+                                   "done": False})
+            self._write_chunk({"model": model, "response": "", "done": True})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading early (e.g. enough words were received)
+            self.close_connection = True
+
+    def _write_chunk(self, data):
+        line = (json.dumps(data) + "\n").encode()
+        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_ollama(host="127.0.0.1", port=0, latency_ms=200, jitter_ms=50, failure_rate=0.0,
+                      hang_rate=0.0, hang_seconds=30.0, token_delay_ms=20):
+    """
+    Start a fake Ollama server on a background thread
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 = any free port)
+        latency_ms: Mean delay before the response starts
+        jitter_ms: Standard deviation of that delay
+        failure_rate: Fraction of requests answered with HTTP 503
+        hang_rate: Fraction of requests that stall for hang_seconds first (to exercise read timeouts)
+        hang_seconds: Length of an injected stall
+        token_delay_ms: Delay between streamed chunks
+
+    Returns:
+        The running ThreadingHTTPServer; its generate endpoint is server.url
+    """
+    server = ThreadingHTTPServer((host, port), FakeOllamaHandler)
+    server.daemon_threads = True
+    server.settings = {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "failure_rate": failure_rate,
+        "hang_rate": hang_rate,
+        "hang_seconds": hang_seconds,
+        "token_delay_ms": token_delay_ms,
+    }
+    server.stats = {"requests": 0, "failures": 0}
+    server.stats_lock = threading.Lock()
+    server.url = f"http://{host}:{server.server_address[1]}/api/generate"
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def main():
+    """Command-line entry point: run a fake Ollama server until interrupted"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ollama generate API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that stall")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--token-delay-ms", type=float, default=20, help="Delay between streamed chunks")
+    args = parser.parse_args()
+
+    server = start_fake_ollama(args.host, args.port, args.latency_ms, args.jitter_ms, args.failure_rate,
+                               args.hang_rate, args.hang_seconds, args.token_delay_ms)
+    print(f"Fake Ollama listening on {server.url} (point config.OLLAMA_API_URL at it)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served {server.stats['requests']} requests, {server.stats['failures']} injected failures")
+
+
+if __name__ == "__main__":
+    main()
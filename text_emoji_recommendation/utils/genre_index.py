@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+BITS_PER_WORD = 64
+
+
+class GenreIndex:
+    """
+    Catalog genres encoded against a fixed vocabulary
+
+    Every movie gets a bitmask (one bit per genre, in as many uint64 words as
+    the vocabulary needs), and every genre a sorted array of the positions of
+    the movies that have it. Genre matching becomes bit tests over candidate
+    positions and genre filtering becomes sorted-array intersection, instead
+    of splitting pipe-separated strings per movie and request.
+    """
+
+    def __init__(self, genre_strings):
+        """
+        Encode the genres of a catalog
+
+        Args:
+            genre_strings: Pipe-separated genre strings aligned with catalog positions
+                (missing or empty values mean no genres)
+        """
+        series = pd.Series(np.asarray(genre_strings, dtype=object))
+        self.num_movies = len(series)
+
+        # Same parsing as parse_genres; empty segments never match a genre
+        exploded = series[series.map(lambda value: isinstance(value, str) and value != "")].str.split('|').explode()
+        exploded = exploded[exploded != ""]
+
+        self.genres = sorted(exploded.unique())
+        self.bit_of = {genre: bit for bit, genre in enumerate(self.genres)}
+        rows = exploded.index.to_numpy(dtype=np.int64)
+        bits = exploded.map(self.bit_of).to_numpy(dtype=np.int64)
+
+        num_words = max(1, -(-len(self.genres) // BITS_PER_WORD))
+        self.masks = np.zeros((self.num_movies, num_words), dtype=np.uint64)
+        np.bitwise_or.at(
+            self.masks, (rows, bits // BITS_PER_WORD),
+            np.left_shift(np.uint64(1), (bits % BITS_PER_WORD).astype(np.uint64))
+        )
+
+        # Inverted index: genre -> sorted positions of its movies
+        order = np.lexsort((rows, bits))
+        rows, bits = rows[order], bits[order]
+        bounds = np.searchsorted(bits, np.arange(len(self.genres) + 1))
+        self.postings = {
+            genre: np.unique(rows[bounds[bit]:bounds[bit + 1]]) for genre, bit in self.bit_of.items()
+        }
+
+    def has_genre(self, positions, genre):
+        """
+        Whether each movie has a genre
+
+        Args:
+            positions: Catalog positions
+            genre: Genre label
+
+        Returns:
+            Boolean array aligned with positions (all False for unknown genres)
+        """
+        bit = self.bit_of.get(genre)
+        if bit is None:
+            return np.zeros(len(positions), dtype=bool)
+        word = self.masks[positions, bit // BITS_PER_WORD]
+        return ((word >> np.uint64(bit % BITS_PER_WORD)) & np.uint64(1)) == 1
+
+    def weighted_matches(self, positions, genre_weights):
+        """
+        Sum of the weights of the genres each movie has
+
+        Args:
+            positions: Catalog positions
+            genre_weights: Dictionary of genre -> weight
+
+        Returns:
+            Float array aligned with positions
+        """
+        matches = np.zeros(len(positions))
+        for genre, weight in genre_weights.items():
+            if weight and genre in self.bit_of:
+                matches += weight * self.has_genre(positions, genre)
+        return matches
+
+    def positions_with(self, genres, require_all=False):
+        """
+        Catalog positions of the movies with any (or all) of some genres
+
+        Args:
+            genres: Genre labels
+            require_all: Require every genre instead of at least one
+
+        Returns:
+            Sorted array of positions
+        """
+        postings = [self.postings.get(genre, np.empty(0, dtype=np.int64)) for genre in genres]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        result = postings[0]
+        for other in postings[1:]:
+            result = np.intersect1d(result, other, assume_unique=True) if require_all else np.union1d(result, other)
+        return result
+
+    def filter_positions(self, positions, genres, require_all=False):
+        """
+        Keep the candidates with any (or all) of some genres, in their original order
+
+        Args:
+            positions: Candidate catalog positions
+            genres: Genre labels
+            require_all: Require every genre instead of at least one
+
+        Returns:
+            Filtered array of positions
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        return positions[np.isin(positions, self.positions_with(genres, require_all))]
+
+    def genre_counts(self):
+        """Number of movies per genre"""
+        return {genre: len(positions) for genre, positions in self.postings.items()}
+
+
+def main():
+    """Command-line entry point: list the catalog's genres and time bitmask matching against string parsing"""
+    from utils.data_processor import load_genre_column, parse_genres
+
+    parser = argparse.ArgumentParser(description="Inspect the genre index of the movie catalog")
+    parser.add_argument("--candidates", type=int, default=config.TOP_N_SIMILARITY)
+    parser.add_argument("--genres", nargs="+", default=["Drama", "Comedy", "Romance"])
+    args = parser.parse_args()
+
+    genre_strings = load_genre_column()
+    start = time.perf_counter()
+    index = GenreIndex(genre_strings)
+    print(f"Encoded {index.num_movies} movies, {len(index.genres)} genres in {time.perf_counter() - start:.2f}s")
+    for genre, count in sorted(index.genre_counts().items(), key=lambda item: -item[1]):
+        print(f"  {genre:<15} {count}")
+
+    weights = {genre: 1.5 if i == 0 else 1.0 for i, genre in enumerate(args.genres)}
+    positions = np.random.default_rng(0).choice(index.num_movies, min(args.candidates, index.num_movies),
+                                                replace=False)
+    start = time.perf_counter()
+    expected = [sum(weights.get(genre, 0.0) for genre in set(parse_genres(genre_strings[p]))) for p in positions]
+    parsed = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = index.weighted_matches(positions, weights)
+    bitmask = time.perf_counter() - start
+    print(f"{len(positions)} candidates: string parsing {1000 * parsed:.2f} ms, bitmask {1000 * bitmask:.2f} ms, "
+          f"identical: {np.allclose(expected, matches)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class OllamaClient:
+    """
+    Pooled HTTP client for the Ollama generate API
+
+    One requests.Session with a sized connection pool is shared by every
+    caller, so keep-alive connections are reused across Streamlit sessions.
+    Every request has a connect and a read timeout, and connection errors,
+    timeouts and retryable status codes are retried a bounded number of
+    times with exponential backoff and full jitter.
+    """
+
+    def __init__(self, api_url=None, connect_timeout=None, read_timeout=None, max_retries=None,
+                 retry_backoff=None, pool_size=None):
+        """
+        Initialize the client
+
+        Args:
+            api_url: URL of the Ollama generate endpoint
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait between bytes of the response
+            max_retries: Retries after the first attempt
+            retry_backoff: Base delay in seconds, doubled on every retry
+            pool_size: Maximum number of pooled connections
+        """
+        self.api_url = api_url or config.OLLAMA_API_URL
+        self.timeout = (
+            config.OLLAMA_CONNECT_TIMEOUT if connect_timeout is None else connect_timeout,
+            config.OLLAMA_READ_TIMEOUT if read_timeout is None else read_timeout
+        )
+        self.max_retries = config.OLLAMA_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = config.OLLAMA_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+
+        pool_size = pool_size or config.OLLAMA_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, payload, deadline=None):
+        """
+        Send a non-streaming generate request
+
+        Args:
+            payload: JSON body for the generate API
+            deadline: Optional Deadline bounding all attempts together
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            requests.RequestException: If every attempt failed
+        """
+        response = self._post(dict(payload, stream=False), deadline=deadline)
+        try:
+            return response.json()
+        finally:
+            response.close()
+
+    def stream(self, payload, deadline=None):
+        """
+        Send a streaming generate request and yield the text of each NDJSON chunk
+
+        Closing the generator early (e.g. after enough words) closes the
+        connection, which makes Ollama stop generating.
+
+        Args:
+            payload: JSON body for the generate API
+            deadline: Optional Deadline for the whole stream
+
+        Yields:
+            Text fragments in generation order
+
+        Raises:
+            requests.RequestException: If the request failed, the stream reported an error
+                or the deadline passed
+        """
+        response = self._post(dict(payload, stream=True), stream=True, deadline=deadline)
+        try:
+            for line in response.iter_lines():
+                if deadline is not None and deadline.expired():
+                    raise requests.Timeout("Deadline exceeded while streaming")
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise requests.RequestException(chunk["error"])
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    break
+        finally:
+            response.close()
+
+    def _post(self, payload, stream=False, deadline=None):
+        """POST with timeouts and bounded, jittered retries, all within the deadline if given"""
+        for attempt in range(self.max_retries + 1):
+            timeout = self.timeout
+            if deadline is not None:
+                if deadline.expired():
+                    raise requests.Timeout("Deadline exceeded before the request was sent")
+                timeout = (min(timeout[0], deadline.remaining()), min(timeout[1], deadline.remaining()))
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=timeout, stream=stream)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError:
+                        # A streamed response holds its pooled connection until closed
+                        response.close()
+                        raise
+                    return response
+                response.close()
+                print(f"Ollama API returned {response.status_code}, retrying")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"Error calling Ollama API: {e}, retrying")
+
+            delay = random.uniform(0, self.retry_backoff * (2 ** attempt))
+            if deadline is not None and delay >= deadline.remaining():
+                raise requests.Timeout("Deadline exceeded, not retrying")
+            time.sleep(delay)
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_ollama_client(api_url=None):
+    """Return the process-wide OllamaClient for an endpoint, creating it on first use"""
+    api_url = api_url or config.OLLAMA_API_URL
+    with _clients_lock:
+        if api_url not in _clients:
+            _clients[api_url] = OllamaClient(api_url)
+        return _clients[api_url]
+
+
+def main():
+    """Command-line entry point: fire concurrent requests at an Ollama endpoint and report latency"""
+    parser = argparse.ArgumentParser(description="Latency and error-rate check for the Ollama client")
+    parser.add_argument("--url", default=config.OLLAMA_API_URL, help="Generate endpoint (e.g. the fake server)")
+    parser.add_argument("--requests", type=int, default=50, help="Number of requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--read-timeout", type=float, default=config.OLLAMA_READ_TIMEOUT)
+    parser.add_argument("--retries", type=int, default=config.OLLAMA_MAX_RETRIES)
+    args = parser.parse_args()
+
+    client = OllamaClient(args.url, read_timeout=args.read_timeout, max_retries=args.retries,
+                          pool_size=args.concurrency)
+    payload = {"model": config.OLLAMA_MODEL, "prompt": "Describe a cozy movie night in one sentence."}
+
+    def timed_request(_):
+        start = time.perf_counter()
+        try:
+            client.generate(payload)
+            return time.perf_counter() - start, None
+        except requests.RequestException as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(timed_request, range(args.requests)))
+
+    latencies = sorted(1000 * latency for latency, error in results if error is None)
+    errors = [error for _, error in results if error is not None]
+    if latencies:
+        print(f"ok {len(latencies)}/{args.requests}: p50 {latencies[len(latencies) // 2]:.0f} ms, "
+              f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.0f} ms, max {latencies[-1]:.0f} ms")
+    if errors:
+        print(f"failed {len(errors)}: " + ", ".join(f"{name} x{errors.count(name)}" for name in sorted(set(errors))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import re
+import json
+import time
+import argparse
+
+TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+
+
+class IncrementalJSONParser:
+    """
+    Tolerant parser for a JSON object produced piece by piece by an LLM
+
+    Text before the first '{' (prose, code fences) is skipped and anything
+    after the matching '}' is ignored. feed() only scans the new chunk and
+    records the last point where the text is a valid prefix (an opened or
+    closed container, a finished string, the end of a member). snapshot()
+    is lazy: it parses that prefix once per new boundary and otherwise
+    reuses the last parse, adding the top-level string value being written
+    from an incrementally decoded buffer. A streamed response therefore
+    costs one parse per member, not one per chunk.
+    """
+
+    def __init__(self):
+        """Initialize an empty parser"""
+        self._chars = []
+        self._started = False
+        self._stack = []
+        self._in_string = False
+        self._escape_at = None
+        self._unicode_left = 0
+        self._expect_value = False
+        self.complete = False
+
+        # Last valid-prefix boundary as (text length, closers to append), and its version
+        self._boundary = None
+        self._version = 0
+        self._parsed_version = 0
+        self._parsed = None
+        self.parses = 0
+
+        # Top-level member being written: its key and, for a string value, the decoded prefix
+        self._key = None
+        self._string_start = 0
+        self._string_is_key = False
+        self._string_is_value = False
+        self._decoded = ""
+        self._decoded_upto = 0
+
+    def feed(self, chunk):
+        """
+        Add the next piece of text
+
+        Args:
+            chunk: Newly received text
+        """
+        for char in chunk or "":
+            if self.complete:
+                break
+            if not self._started:
+                if char != '{':
+                    continue
+                self._started = True
+
+            self._chars.append(char)
+            if self._in_string:
+                if self._unicode_left:
+                    self._unicode_left -= 1
+                    if not self._unicode_left:
+                        self._escape_at = None
+                elif self._escape_at is not None:
+                    if char == 'u':
+                        self._unicode_left = 4
+                    else:
+                        self._escape_at = None
+                elif char == '\\':
+                    self._escape_at = len(self._chars) - 1
+                elif char == '"':
+                    self._close_string()
+            elif char == '"':
+                self._open_string()
+            elif char in '{[':
+                self._stack.append('}' if char == '{' else ']')
+                self._expect_value = False
+                self._mark_boundary(len(self._chars))
+            elif char in '}]':
+                if self._stack and self._stack[-1] == char:
+                    self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+                self._mark_boundary(len(self._chars))
+            elif char == ':':
+                self._expect_value = True
+            elif char == ',':
+                self._expect_value = False
+                self._mark_boundary(len(self._chars) - 1)
+
+    def snapshot(self):
+        """
+        Best-effort parse of the text received so far
+
+        Members still being written are left out, except a string value of
+        the top-level object, which holds the text received so far.
+
+        Returns:
+            Parsed object (usually a dict), or None if nothing parseable was seen yet
+        """
+        if not self._started:
+            return None
+
+        if self._parsed_version != self._version:
+            length, closers = self._boundary
+            parsed = _loads("".join(self._chars[:length]) + closers)
+            self.parses += 1
+            # Keep the previous parse if this prefix is malformed, unless the object is complete
+            if parsed is not None or self.complete:
+                self._parsed = parsed
+            self._parsed_version = self._version
+
+        if not isinstance(self._parsed, dict):
+            return self._parsed
+        result = dict(self._parsed)
+        if self._in_string and self._string_is_value and self._key is not None:
+            result[self._key] = self._open_string_value()
+        return result
+
+    def _mark_boundary(self, length):
+        """Record that the first length characters, with the open containers closed, are valid JSON"""
+        self._boundary = (length, "".join(reversed(self._stack)))
+        self._version += 1
+
+    def _open_string(self):
+        self._in_string = True
+        self._string_start = len(self._chars)
+        top_level = len(self._stack) == 1 and self._stack[0] == '}'
+        self._string_is_key = self._stack[-1:] == ['}'] and not self._expect_value
+        self._string_is_value = top_level and self._expect_value
+        self._decoded = ""
+        self._decoded_upto = self._string_start
+
+    def _close_string(self):
+        self._in_string = False
+        if self._string_is_key:
+            if len(self._stack) == 1:
+                self._key = _loads("".join(self._chars[self._string_start - 1:]))
+        else:
+            # A finished value (or array item) completes a valid prefix
+            self._mark_boundary(len(self._chars))
+        self._string_is_value = False
+
+    def _open_string_value(self):
+        """Decoded text of the open string value, decoding only what arrived since the last call"""
+        end = self._escape_at if self._escape_at is not None else len(self._chars)
+        if end > self._decoded_upto:
+            decoded = _loads('"' + "".join(self._chars[self._decoded_upto:end]) + '"')
+            if decoded is None:
+                return self._decoded
+            if decoded and '\ud800' <= decoded[-1] <= '\udbff':
+                # Hold back a high surrogate escape until its pair arrives
+                decoded, end = decoded[:-1], end - 6
+            self._decoded += decoded
+            self._decoded_upto = end
+        return self._decoded
+
+
+def _loads(text):
+    """json.loads that tolerates trailing commas and returns None instead of raising"""
+    try:
+        return json.loads(TRAILING_COMMA_PATTERN.sub(r"\1", text))
+    except ValueError:
+        return None
+
+
+def parse_json_object(text):
+    """
+    Parse the first JSON object in an LLM response
+
+    Args:
+        text: Response text, possibly wrapped in prose or code fences, possibly truncated
+
+    Returns:
+        Dictionary, or None if the text holds no JSON object
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    result = parser.snapshot()
+    return result if isinstance(result, dict) else None
+
+
+def main():
+    """Command-line entry point: stream synthetic responses token by token and show parsing stays linear"""
+    parser = argparse.ArgumentParser(description="Check the cost of streaming through IncrementalJSONParser")
+    parser.add_argument("--words", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--chunk-chars", type=int, default=4, help="Characters per streamed token")
+    args = parser.parse_args()
+
+    for words in args.words:
+        overview = " ".join(f"w\\u00e9rd{i} \\\"q\\\"" if i % 50 == 0 else f"word{i}" for i in range(words))
+        text = ('Sure! ```json\n{"genres": ["Drama", "Comedy", "Romance"], "emotions": ["Happy", "Nostalgic"], '
+                f'"overview": "{overview}"}}```')
+        chunks = [text[i:i + args.chunk_chars] for i in range(0, len(text), args.chunk_chars)]
+
+        stream = IncrementalJSONParser()
+        start = time.perf_counter()
+        for chunk in chunks:
+            stream.feed(chunk)
+            partial = stream.snapshot()
+        elapsed = time.perf_counter() - start
+
+        expected = json.loads(text[text.index('{'):text.rindex('}') + 1])
+        print(f"{words:>5} words, {len(chunks):>5} chunks: {stream.parses} full parses, "
+              f"{1e6 * elapsed / len(chunks):.1f} us/chunk, final object correct: {partial == expected}")
+
+
+if __name__ == "__main__":
+    main()
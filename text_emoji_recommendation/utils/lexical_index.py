@@ -0,0 +1,314 @@
+import os
+import re
+import sys
+import time
+import argparse
+import numpy as np
+from collections import Counter
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "he", "her", "his",
+    "i", "in", "into", "is", "it", "its", "me", "my", "of", "on", "or", "she", "so", "that", "the",
+    "their", "them", "they", "this", "to", "was", "who", "with", "you", "your"
+}
+
+# Field name -> how many times its tokens are counted (titles and cast are short but precise)
+INDEXED_FIELDS = {"movie_name": 2, "cast": 2, "overview": 1}
+
+
+def tokenize(text):
+    """Lowercase a text and split it into indexable terms"""
+    if not isinstance(text, str):
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Inverted index over movie titles, cast and overviews with BM25 scoring
+
+    Postings are stored as flat arrays grouped by term (CSR layout). The BM25
+    term-frequency saturation and length normalization are folded into each
+    posting's weight at build time, so a query is a gather plus one bincount.
+    """
+
+    def __init__(self, vocabulary, idf, postings_offsets, postings_docs, postings_weights, num_docs):
+        """
+        Initialize the index from its arrays
+
+        Args:
+            vocabulary: Dictionary of term -> term id
+            idf: Inverse document frequency per term id
+            postings_offsets: Start of each term's postings (length num_terms + 1)
+            postings_docs: Movie positions, grouped by term
+            postings_weights: Precomputed BM25 term weights, aligned with postings_docs
+            num_docs: Number of indexed movies
+        """
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.postings_offsets = postings_offsets
+        self.postings_docs = postings_docs
+        self.postings_weights = postings_weights
+        self.num_docs = num_docs
+
+    def __len__(self):
+        return self.num_docs
+
+    @classmethod
+    def build(cls, movies_df, fields=None, k1=None, b=None):
+        """
+        Build the index over a movies DataFrame
+
+        Args:
+            movies_df: DataFrame of movies, row order defines movie positions
+            fields: Dictionary of column -> repeat count (defaults to INDEXED_FIELDS)
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            BM25Index
+        """
+        fields = fields or INDEXED_FIELDS
+        k1 = config.BM25_K1 if k1 is None else k1
+        b = config.BM25_B if b is None else b
+        columns = [(movies_df[name].tolist(), repeat) for name, repeat in fields.items() if name in movies_df.columns]
+
+        vocabulary = {}
+        term_ids = []
+        doc_ids = []
+        term_freqs = []
+        doc_lengths = np.zeros(len(movies_df), dtype=np.float32)
+
+        for doc in range(len(movies_df)):
+            counts = Counter()
+            for values, repeat in columns:
+                for token in tokenize(values[doc]):
+                    counts[token] += repeat
+            doc_lengths[doc] = sum(counts.values())
+            for token, count in counts.items():
+                term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+                doc_ids.append(doc)
+                term_freqs.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        term_freqs = np.asarray(term_freqs, dtype=np.float32)
+
+        order = np.argsort(term_ids, kind='stable')
+        term_ids, doc_ids, term_freqs = term_ids[order], doc_ids[order], term_freqs[order]
+
+        document_frequency = np.bincount(term_ids, minlength=len(vocabulary)).astype(np.float32)
+        postings_offsets = np.concatenate([[0], np.cumsum(document_frequency)]).astype(np.int64)
+        num_docs = len(movies_df)
+        idf = np.log1p((num_docs - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+
+        average_length = float(doc_lengths.mean()) if num_docs else 0.0
+        length_norm = 1 - b + b * doc_lengths[doc_ids] / max(average_length, 1e-9)
+        postings_weights = (term_freqs * (k1 + 1) / (term_freqs + k1 * length_norm)).astype(np.float32)
+
+        return cls(vocabulary, idf, postings_offsets, doc_ids, postings_weights, num_docs)
+
+    def search(self, query_text, top_n=100):
+        """
+        Score movies against a free-text query
+
+        Args:
+            query_text: Query text (story overview, user's own words, names...)
+            top_n: Number of top movies to return
+
+        Returns:
+            Tuple of (row positions, BM25 scores), sorted by descending score
+        """
+        term_counts = Counter(self.vocabulary[t] for t in tokenize(query_text) if t in self.vocabulary)
+        if not term_counts or top_n <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        docs = []
+        weights = []
+        for term_id, query_count in term_counts.items():
+            start, end = self.postings_offsets[term_id], self.postings_offsets[term_id + 1]
+            docs.append(self.postings_docs[start:end])
+            weights.append(self.postings_weights[start:end] * (self.idf[term_id] * query_count))
+
+        docs = np.concatenate(docs)
+        scores = np.bincount(docs, weights=np.concatenate(weights))
+        candidates = np.flatnonzero(scores)
+        scores = scores[candidates].astype(np.float32)
+
+        if top_n < len(candidates):
+            keep = np.argpartition(-scores, top_n - 1)[:top_n]
+            candidates, scores = candidates[keep], scores[keep]
+        order = np.argsort(-scores, kind='stable')
+        return candidates[order].astype(np.int64), scores[order]
+
+    def save(self, path, catalog_id=None):
+        """
+        Save the index to a .npz file
+
+        Args:
+            path: Output path
+            catalog_id: Identity of the catalog the index was built over (see catalog_identity)
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        terms = np.empty(len(self.vocabulary), dtype=object)
+        for term, term_id in self.vocabulary.items():
+            terms[term_id] = term
+        np.savez(
+            path,
+            terms=terms.astype(str),
+            idf=self.idf,
+            postings_offsets=self.postings_offsets,
+            postings_docs=self.postings_docs,
+            postings_weights=self.postings_weights,
+            num_docs=np.array(self.num_docs),
+            catalog_id=np.array(catalog_id or "")
+        )
+
+    @classmethod
+    def load(cls, path, catalog_id=None):
+        """
+        Load an index saved with save()
+
+        Args:
+            path: Path of the .npz file
+            catalog_id: Identity of the loaded catalog; the index must have been built over it
+
+        Returns:
+            BM25Index
+
+        Raises:
+            ValueError: If the index was built over a different catalog
+        """
+        with np.load(path) as data:
+            built_for = str(data['catalog_id']) if 'catalog_id' in data.files else ""
+            if catalog_id is not None and built_for != catalog_id:
+                raise ValueError(f"Lexical index at {path} was built for a different catalog, rebuild it")
+            vocabulary = {term: term_id for term_id, term in enumerate(data['terms'].tolist())}
+            return cls(vocabulary, data['idf'], data['postings_offsets'], data['postings_docs'],
+                       data['postings_weights'], int(data['num_docs']))
+
+
+def reciprocal_rank_fusion(rankings, k=None, top_n=None):
+    """
+    Fuse several ranked lists of movie positions with reciprocal rank fusion
+
+    Args:
+        rankings: List of position arrays, each sorted best first
+        k: RRF damping constant (defaults to config.RRF_K)
+        top_n: Number of fused results to return (None = all)
+
+    Returns:
+        Tuple of (row positions, fused scores), sorted by descending score
+    """
+    k = config.RRF_K if k is None else k
+    rankings = [np.asarray(ranking, dtype=np.int64) for ranking in rankings if len(ranking) > 0]
+    if not rankings:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    positions = np.concatenate(rankings)
+    contributions = np.concatenate([1.0 / (k + np.arange(1, len(ranking) + 1)) for ranking in rankings])
+    unique_positions, inverse = np.unique(positions, return_inverse=True)
+    scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+
+    order = np.argsort(-scores, kind='stable')[:top_n]
+    return unique_positions[order], scores[order]
+
+
+def weighted_score_fusion(dense, lexical, lexical_weight=None, top_n=None):
+    """
+    Blend max-normalized dense and lexical scores over the union of both result lists
+
+    Args:
+        dense: Tuple of (positions, similarity scores) from embedding search
+        lexical: Tuple of (positions, BM25 scores) from the lexical index
+        lexical_weight: Weight of the lexical score (defaults to config.HYBRID_LEXICAL_WEIGHT)
+        top_n: Number of fused results to return (None = all)
+
+    Returns:
+        Tuple of (row positions, blended scores), sorted by descending score
+    """
+    lexical_weight = config.HYBRID_LEXICAL_WEIGHT if lexical_weight is None else lexical_weight
+    parts = []
+    for (positions, scores), weight in ((dense, 1 - lexical_weight), (lexical, lexical_weight)):
+        if len(positions) > 0:
+            max_score = float(np.max(scores))
+            parts.append((np.asarray(positions, dtype=np.int64),
+                          weight * np.asarray(scores, dtype=np.float32) / (max_score if max_score > 0 else 1.0)))
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    unique_positions, inverse = np.unique(np.concatenate([p for p, _ in parts]), return_inverse=True)
+    scores = np.bincount(inverse, weights=np.concatenate([s for _, s in parts])).astype(np.float32)
+
+    order = np.argsort(-scores, kind='stable')[:top_n]
+    return unique_positions[order], scores[order]
+
+
+def default_index_path():
+    """Location of the lexical index inside the catalog directory"""
+    return os.path.join(config.CATALOG_DIR, config.LEXICAL_INDEX_FILE)
+
+
+def load_lexical_index(movies_df, index_path=None):
+    """
+    Load the prebuilt lexical index
+
+    The index is never built here: a BM25 build is a pure-Python pass over
+    every document, too slow for app startup. Without a matching index,
+    retrieval is dense-only until `python utils/lexical_index.py` is run.
+
+    Args:
+        movies_df: Catalog DataFrame the index must cover
+        index_path: Path of a prebuilt index
+
+    Returns:
+        BM25Index, or None if no index matching the catalog could be loaded
+    """
+    from utils.data_processor import catalog_identity
+
+    index_path = index_path or default_index_path()
+    hint = "using dense-only retrieval (run python utils/lexical_index.py to build it)"
+    if not os.path.exists(index_path):
+        print(f"No lexical index at {index_path}, {hint}")
+        return None
+
+    try:
+        index = BM25Index.load(index_path, catalog_id=catalog_identity())
+    except Exception as e:
+        print(f"Error loading lexical index, {hint}: {e}")
+        return None
+    if len(index) != len(movies_df):
+        print(f"Lexical index does not match the catalog, {hint}")
+        return None
+    return index
+
+
+def main():
+    """Command-line entry point for building the lexical index"""
+    from utils.data_processor import load_movie_catalog, catalog_identity
+
+    parser = argparse.ArgumentParser(description="Build the BM25 index over titles, cast and overviews")
+    parser.add_argument("--out", default=default_index_path(), help="Output path")
+    parser.add_argument("--query", help="Optionally run a test query against the new index")
+    args = parser.parse_args()
+
+    movies_df, _ = load_movie_catalog()
+    start = time.perf_counter()
+    index = BM25Index.build(movies_df)
+    index.save(args.out, catalog_identity())
+    print(f"Indexed {len(index)} movies, {len(index.vocabulary)} terms in "
+          f"{time.perf_counter() - start:.1f}s -> {args.out}")
+
+    if args.query:
+        positions, scores = index.search(args.query, top_n=10)
+        for position, score in zip(positions, scores):
+            print(f"{score:6.2f}  {movies_df.iloc[position].get('movie_name', position)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import os
+import sys
+import argparse
+import numpy as np
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from utils.embedding_utils import normalize_embeddings, select_top_k
+
+QUANTIZATION_MODES = ("int8", "binary")
+
+# Number of set bits for every byte value, used for Hamming distances
+_POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def quantize_int8(normalized_embeddings, chunk_size=65536):
+    """
+    Scalar-quantize embeddings to int8 with one scale per dimension
+
+    Args:
+        normalized_embeddings: Row-normalized float32 embedding matrix
+        chunk_size: Rows quantized at a time, bounding memory use
+
+    Returns:
+        Tuple of (int8 codes, float32 per-dimension scale)
+    """
+    num_movies, dim = normalized_embeddings.shape
+    max_abs = np.zeros(dim, dtype=np.float32)
+    for start in range(0, num_movies, chunk_size):
+        chunk = np.asarray(normalized_embeddings[start:start + chunk_size])
+        max_abs = np.maximum(max_abs, np.abs(chunk).max(axis=0))
+    scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+
+    codes = np.empty((num_movies, dim), dtype=np.int8)
+    for start in range(0, num_movies, chunk_size):
+        chunk = np.asarray(normalized_embeddings[start:start + chunk_size])
+        codes[start:start + chunk_size] = np.clip(np.rint(chunk / scale), -127, 127)
+
+    return codes, scale
+
+
+def quantize_binary(normalized_embeddings, chunk_size=65536):
+    """
+    Encode embeddings as sign bits packed into bytes (1 bit per dimension)
+
+    Args:
+        normalized_embeddings: Row-normalized float32 embedding matrix
+        chunk_size: Rows encoded at a time, bounding memory use
+
+    Returns:
+        uint8 matrix of packed codes, shape (num_movies, ceil(dim / 8))
+    """
+    num_movies, dim = normalized_embeddings.shape
+    codes = np.empty((num_movies, (dim + 7) // 8), dtype=np.uint8)
+    for start in range(0, num_movies, chunk_size):
+        chunk = np.asarray(normalized_embeddings[start:start + chunk_size])
+        codes[start:start + chunk_size] = np.packbits(chunk > 0, axis=1)
+    return codes
+
+
+class QuantizedIndex:
+    """
+    Search over compact int8 or binary codes with full-precision rescoring
+
+    Every movie is scored against its compact code, a shortlist of
+    top_n * rescore_factor candidates is kept, and only the shortlist is
+    rescored against the full-precision embeddings. With a memory-mapped
+    catalog, just the shortlisted rows are paged in from disk.
+    """
+
+    def __init__(self, codes, mode, scale=None, embeddings=None, rescore_factor=None, chunk_size=65536):
+        """
+        Initialize the quantized index
+
+        Args:
+            codes: int8 codes or packed binary codes, one row per movie
+            mode: "int8" or "binary"
+            scale: Per-dimension scale for int8 codes
+            embeddings: Row-normalized full-precision embedding matrix for rescoring
+            rescore_factor: Shortlist size as a multiple of top_n
+            chunk_size: Rows scored at a time, bounding temporary memory
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+        if mode == "int8" and scale is None:
+            raise ValueError("int8 codes need a scale")
+
+        self.codes = codes
+        self.mode = mode
+        self.scale = scale
+        self.embeddings = embeddings
+        self.rescore_factor = rescore_factor or config.QUANTIZATION_RESCORE_FACTOR
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def build(cls, normalized_embeddings, mode="int8", **kwargs):
+        """Quantize the catalog embeddings and build an index over them"""
+        if mode == "int8":
+            codes, scale = quantize_int8(normalized_embeddings)
+        else:
+            codes, scale = quantize_binary(normalized_embeddings), None
+        return cls(codes, mode, scale, normalized_embeddings, **kwargs)
+
+    def _approximate_scores(self, query):
+        """Score every movie against its compact code (higher is more similar)"""
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        if self.mode == "int8":
+            scaled_query = (query * self.scale).astype(np.float32)
+            for start in range(0, len(self.codes), self.chunk_size):
+                chunk = self.codes[start:start + self.chunk_size]
+                scores[start:start + self.chunk_size] = chunk.astype(np.float32) @ scaled_query
+        else:
+            query_bits = np.packbits(query > 0)
+            for start in range(0, len(self.codes), self.chunk_size):
+                chunk = self.codes[start:start + self.chunk_size]
+                distances = _POPCOUNT_TABLE[np.bitwise_xor(chunk, query_bits)].sum(axis=1, dtype=np.int32)
+                scores[start:start + self.chunk_size] = -distances
+        return scores
+
+    def search(self, query_embedding, top_n=50, threshold=0.6):
+        """
+        Find the most similar movies to the query embedding
+
+        Args:
+            query_embedding: The embedding to compare against
+            top_n: Number of top similar movies to return
+            threshold: Minimum similarity score to consider
+
+        Returns:
+            Tuple of (row positions, exact similarity scores), sorted by descending score
+        """
+        query = normalize_embeddings(np.asarray(query_embedding).reshape(-1))
+        if top_n <= 0 or len(self.codes) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        approximate = self._approximate_scores(query)
+        shortlist_size = min(len(approximate), top_n * self.rescore_factor)
+        if shortlist_size < len(approximate):
+            shortlist = np.argpartition(-approximate, shortlist_size - 1)[:shortlist_size]
+        else:
+            shortlist = np.arange(len(approximate))
+
+        if self.embeddings is None:
+            # Without full-precision vectors fall back to the int8 estimate
+            if self.mode != "int8":
+                raise ValueError("Binary codes need full-precision embeddings for rescoring")
+            return select_top_k(shortlist, approximate[shortlist], top_n, threshold)
+
+        shortlist.sort()
+        exact_scores = self.embeddings[shortlist] @ query
+        return select_top_k(shortlist, exact_scores, top_n, threshold)
+
+    def memory_footprint(self):
+        """
+        Compare the resident size of the codes with other embedding layouts
+
+        Returns:
+            Dictionary of sizes in bytes
+        """
+        num_movies = len(self.codes)
+        dim = self.embeddings.shape[1] if self.embeddings is not None else self.codes.shape[1] * (
+            8 if self.mode == "binary" else 1)
+        return {
+            "num_movies": num_movies,
+            "embedding_dim": dim,
+            # JSON-parsed lists: one pointer plus one boxed float object per value
+            "python_lists_bytes": num_movies * (56 + dim * (8 + 24)),
+            "float64_bytes": num_movies * dim * 8,
+            "float32_bytes": num_movies * dim * 4,
+            "codes_bytes": int(self.codes.nbytes) + (int(self.scale.nbytes) if self.scale is not None else 0),
+        }
+
+
+def codes_path(mode, catalog_dir=None):
+    """Location of the quantized codes inside the catalog directory"""
+    return os.path.join(catalog_dir or config.CATALOG_DIR, f"embeddings_{mode}.npz")
+
+
+def save_quantized_codes(index, path, catalog_id=None):
+    """
+    Save the codes (and int8 scale) of a quantized index
+
+    Args:
+        index: QuantizedIndex to save
+        path: Output path
+        catalog_id: Identity of the catalog the codes were built from (see catalog_identity)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    arrays = {"codes": index.codes}
+    if index.scale is not None:
+        arrays["scale"] = index.scale
+    np.savez(path, mode=np.array(index.mode), catalog_id=np.array(catalog_id or ""), **arrays)
+
+
+def load_quantized_index(path, embeddings=None, rescore_factor=None, catalog_id=None):
+    """
+    Load codes saved with save_quantized_codes()
+
+    Args:
+        path: Path of the .npz file
+        embeddings: Row-normalized full-precision embedding matrix for rescoring
+        rescore_factor: Shortlist size as a multiple of top_n
+        catalog_id: Identity of the loaded catalog; the codes must have been built from it
+
+    Returns:
+        QuantizedIndex ready for search
+
+    Raises:
+        ValueError: If the codes were built from a different catalog
+    """
+    with np.load(path) as data:
+        scale = data["scale"] if "scale" in data.files else None
+        index = QuantizedIndex(data["codes"], str(data["mode"]), scale, embeddings, rescore_factor)
+        built_for = str(data["catalog_id"]) if "catalog_id" in data.files else ""
+    if catalog_id is not None and built_for != catalog_id:
+        raise ValueError(f"Quantized codes at {path} were built from a different catalog, rebuild them")
+    if embeddings is not None and len(index) != len(embeddings):
+        raise ValueError(f"Quantized codes at {path} cover {len(index)} movies, catalog has {len(embeddings)}")
+    return index
+
+
+def main():
+    """Command-line entry point for building and evaluating quantized codes"""
+    from utils.data_processor import load_movie_catalog, catalog_identity
+    from utils.ann_index import evaluate_index, sample_queries
+
+    parser = argparse.ArgumentParser(description="Build or evaluate quantized catalog embeddings")
+    parser.add_argument("command", choices=["build", "report"])
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, default=config.CATALOG_QUANTIZATION or "int8")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled queries")
+    parser.add_argument("--top-n", type=int, default=config.TOP_N_SIMILARITY)
+    parser.add_argument("--threshold", type=float, default=config.SIMILARITY_THRESHOLD)
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[config.QUANTIZATION_RESCORE_FACTOR],
+                        help="Shortlist multipliers to compare")
+    args = parser.parse_args()
+
+    _, embeddings = load_movie_catalog()
+    path = codes_path(args.mode)
+
+    if args.command == "build":
+        index = QuantizedIndex.build(embeddings, args.mode)
+        save_quantized_codes(index, path, catalog_identity())
+        print(f"Wrote {args.mode} codes for {len(index)} movies -> {path}")
+        return
+
+    index = load_quantized_index(path, embeddings, catalog_id=catalog_identity())
+    footprint = index.memory_footprint()
+    print(f"{footprint['num_movies']} movies x {footprint['embedding_dim']} dims")
+    for key in ("python_lists_bytes", "float64_bytes", "float32_bytes", "codes_bytes"):
+        print(f"  {key[:-6]:>13}: {footprint[key] / 2 ** 20:10.1f} MiB")
+
+    queries = sample_queries(embeddings, args.queries)
+    for factor in args.rescore_factors:
+        index.rescore_factor = factor
+        report = evaluate_index(index, embeddings, queries, args.top_n, args.threshold)
+        print(f"rescore x{factor:<3d} recall@{report['top_n']}={report['recall_at_k']:.3f} "
+              f"(loss {1 - report['recall_at_k']:.3f})  "
+              f"exact p50={report['exact_p50_ms']:.2f}ms  {args.mode} p50={report['index_p50_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
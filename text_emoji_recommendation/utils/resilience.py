@@ -0,0 +1,281 @@
+import os
+import sys
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+
+class OllamaUnavailableError(Exception):
+    """Raised when the LLM backend cannot answer within the request's budget"""
+
+
+class AdmissionRejectedError(OllamaUnavailableError):
+    """Raised when a call is turned away because too many are already in flight or queued"""
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request (or one of its stages) has to finish
+    """
+
+    def __init__(self, seconds):
+        """
+        Start the clock
+
+        Args:
+            seconds: Time budget from now
+        """
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left before the deadline (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        """Whether the deadline has passed"""
+        return time.monotonic() >= self.expires_at
+
+    def stage(self, fraction):
+        """
+        Sub-deadline for one stage of the request
+
+        Args:
+            fraction: Share of the total budget the stage may use
+
+        Returns:
+            Deadline that ends after fraction * budget, or with this deadline if that is sooner
+        """
+        return Deadline(min(self.remaining(), self.budget * fraction))
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing backend until it has had time to recover
+
+    After failure_threshold consecutive failures the circuit opens and every
+    call is refused immediately. Once reset_timeout has passed, one trial
+    call is let through (half-open); its success closes the circuit again,
+    its failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        """
+        Initialize a closed circuit
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold or config.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = config.CIRCUIT_BREAKER_RESET_SECONDS if reset_timeout is None else reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_owner = None
+
+    @property
+    def state(self):
+        """Current state: closed, open or half_open"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """
+        Whether a call may be made now
+
+        Returns:
+            True if the circuit is closed, or if this caller gets the half-open trial call
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            self._trial_owner = threading.get_ident()
+            return True
+
+    def release_trial(self):
+        """Give back a half-open trial call granted to this thread that was never made"""
+        with self._lock:
+            if self._trial_in_flight and self._trial_owner == threading.get_ident():
+                self._trial_in_flight = False
+
+    def record_success(self):
+        """Report a successful call"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Report a failed call"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Circuit opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ConcurrencyLimiter:
+    """
+    Admission control in front of a backend that only handles a few calls at once
+
+    At most max_in_flight calls run concurrently. Further callers wait in a
+    priority queue (lower value first, FIFO within a priority) for up to
+    max_wait seconds; when the queue is full, or the wait runs out, the call
+    is rejected with AdmissionRejectedError instead of piling onto the backend.
+    """
+
+    def __init__(self, max_in_flight=None, max_queue=None, max_wait=None):
+        """
+        Initialize the limiter
+
+        Args:
+            max_in_flight: Maximum concurrent calls
+            max_queue: Maximum number of waiting callers
+            max_wait: Maximum seconds a caller waits for a slot
+        """
+        self.max_in_flight = max_in_flight or config.OLLAMA_MAX_IN_FLIGHT
+        self.max_queue = config.OLLAMA_MAX_QUEUE if max_queue is None else max_queue
+        self.max_wait = config.OLLAMA_MAX_QUEUE_WAIT_SECONDS if max_wait is None else max_wait
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self._recent_waits = deque(maxlen=1000)
+
+    def acquire(self, priority=0, max_wait=None):
+        """
+        Wait for a call slot
+
+        Args:
+            priority: Queue priority, lower values are served first
+            max_wait: Seconds to wait at most (defaults to the limiter's max_wait)
+
+        Raises:
+            AdmissionRejectedError: If the queue is full or no slot freed up in time
+        """
+        max_wait = self.max_wait if max_wait is None else min(max_wait, self.max_wait)
+        start = time.monotonic()
+        with self._cond:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self._admit(0.0)
+                return
+
+            if len(self._waiters) >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise AdmissionRejectedError(f"Ollama queue is full ({len(self._waiters)} waiting)")
+
+            # [priority, arrival order, granted]
+            ticket = [priority, next(self._sequence), False]
+            heapq.heappush(self._waiters, ticket)
+            while not ticket[2]:
+                remaining = start + max_wait - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self.rejected_timeout += 1
+                    raise AdmissionRejectedError(f"No Ollama slot freed up within {max_wait:.1f}s")
+                self._cond.wait(remaining)
+
+            self._admit(time.monotonic() - start)
+
+    def _admit(self, waited):
+        """Count an admitted call and how long it waited (caller holds the lock)"""
+        self.admitted += 1
+        self._recent_waits.append(waited)
+
+    def release(self):
+        """Free a call slot, handing it straight to the first waiter if there is one"""
+        with self._cond:
+            if self._waiters:
+                heapq.heappop(self._waiters)[2] = True
+                self._cond.notify_all()
+            else:
+                self._in_flight -= 1
+
+    def has_idle_slot(self):
+        """Whether a call made now would start right away instead of queueing"""
+        with self._cond:
+            return self._in_flight < self.max_in_flight and not self._waiters
+
+    @contextmanager
+    def slot(self, priority=0, max_wait=None):
+        """Context manager holding a call slot for the duration of the block"""
+        self.acquire(priority, max_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        """
+        Limiter counters for monitoring
+
+        Returns:
+            Dictionary with in-flight count, queue depth, wait times (ms) and rejections
+        """
+        with self._cond:
+            waits = sorted(self._recent_waits)
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_timeout": self.rejected_timeout,
+                "mean_wait_ms": 1000 * sum(waits) / len(waits) if waits else 0.0,
+                "p95_wait_ms": 1000 * waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+                "max_wait_ms": 1000 * waits[-1] if waits else 0.0,
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(name):
+    """Return the process-wide ConcurrencyLimiter for a backend, creating it on first use"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = ConcurrencyLimiter()
+        return _limiters[name]
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name):
+    """Return the process-wide CircuitBreaker for a backend, creating it on first use"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker()
+        return _breakers[name]
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+
+# Add project root to path to allow imports from other modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+
+def normalize_inputs(inputs):
+    """
+    Canonical form of prompt inputs, so trivially different answers share a cache entry
+
+    Args:
+        inputs: Dictionary of prompt inputs (e.g. questionnaire responses)
+
+    Returns:
+        Dictionary with lowercased, whitespace-collapsed string values; empty values dropped
+    """
+    normalized = {}
+    for key, value in inputs.items():
+        text = " ".join(str(value).lower().split()) if value is not None else ""
+        if text:
+            normalized[str(key)] = text
+    return normalized
+
+
+def response_cache_key(kind, model_name, inputs, prompt_version=None):
+    """
+    Cache key of an LLM call
+
+    Args:
+        kind: Which prompt is used (e.g. "genres", "overview", "combined")
+        model_name: Ollama model name
+        inputs: Dictionary of prompt inputs
+        prompt_version: Version of the prompt templates (defaults to config.PROMPT_VERSION)
+
+    Returns:
+        Hex digest identifying the call
+    """
+    prompt_version = config.PROMPT_VERSION if prompt_version is None else prompt_version
+    payload = json.dumps([kind, model_name, prompt_version, normalize_inputs(inputs)], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Key-value cache for parsed LLM responses with a TTL, an in-memory LRU
+    tier and an optional sqlite tier that survives restarts
+
+    Values must be JSON-serializable; they are stored serialized, so every
+    hit returns a fresh copy the caller may modify.
+    """
+
+    def __init__(self, ttl_seconds=None, max_entries=None, db_path=None, max_disk_entries=None):
+        """
+        Initialize the response cache
+
+        Args:
+            ttl_seconds: Lifetime of an entry (None or 0 = never expires)
+            max_entries: Entry limit of the in-memory tier
+            db_path: Path of the sqlite file for the on-disk tier (None disables it)
+            max_disk_entries: Entry limit of the on-disk tier
+        """
+        self.ttl = config.LLM_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = config.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_disk_entries = max_disk_entries or config.LLM_CACHE_DISK_MAX_ENTRIES
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        self._db = self._open_db(db_path) if db_path else None
+
+    def _open_db(self, db_path):
+        """Open (and create if needed) the sqlite tier"""
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(db_path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            db.commit()
+            return db
+        except Exception as e:
+            print(f"Error opening response cache database: {e}")
+            return None
+
+    def _is_fresh(self, created_at, now):
+        return not self.ttl or now - created_at < self.ttl
+
+    def get(self, key):
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key (see response_cache_key)
+
+        Returns:
+            A copy of the cached value, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if self._is_fresh(created_at, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                del self._entries[key]
+                self.expired += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and self._is_fresh(row[1], now):
+                    self._store_in_memory(key, row[1], row[0])
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """
+        Store a response in both tiers
+
+        Args:
+            key: Cache key (see response_cache_key)
+            value: JSON-serializable response
+        """
+        created_at = time.time()
+        serialized = json.dumps(value)
+        with self._lock:
+            self._store_in_memory(key, created_at, serialized)
+            if self._db is not None:
+                self._store_on_disk(key, created_at, serialized)
+
+    def _store_in_memory(self, key, created_at, serialized):
+        """Insert into the LRU tier and evict least recently used entries over the limit"""
+        self._entries.pop(key, None)
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (created_at, serialized)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _store_on_disk(self, key, created_at, serialized):
+        """Write to the sqlite tier, dropping expired and surplus entries now and then"""
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, serialized, created_at)
+            )
+            self._disk_writes += 1
+            if self._disk_writes % 1000 == 0:
+                if self.ttl:
+                    self._db.execute("DELETE FROM responses WHERE created_at < ?", (created_at - self.ttl,))
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+            self._db.commit()
+        except Exception as e:
+            print(f"Error writing response cache database: {e}")
+
+    def clear(self):
+        """Drop every cached response from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Cache counters for monitoring
+
+        Returns:
+            Dictionary with hit/miss counts, hit rate and tier sizes
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            disk_entries = None
+            if self._db is not None:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "disk_entries": disk_entries,
+            }
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process-wide LLM response cache, creating it on first use"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(db_path=config.LLM_CACHE_DB_PATH)
+        return _response_cache
+
+
+def main():
+    """Command-line entry point for inspecting or clearing the persistent response cache"""
+    parser = argparse.ArgumentParser(description="Inspect the persistent LLM response cache")
+    parser.add_argument("--db", default=config.LLM_CACHE_DB_PATH, help="Path of the sqlite cache file")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached response")
+    args = parser.parse_args()
+
+    if not args.db or not os.path.exists(args.db):
+        print(f"No response cache at {args.db}")
+        return
+
+    cache = ResponseCache(db_path=args.db)
+    if args.clear:
+        cache.clear()
+        print(f"Cleared {args.db}")
+    else:
+        print(f"{cache.stats()['disk_entries']} cached responses in {args.db}")
+
+
+if __name__ == "__main__":
+    main()